@@ -1 +1,12 @@
-from .canopy import Canopy
+# Canopy and Session are imported when they are first used, so that the
+# modules that do not need arcpy can be imported without ArcGIS.
+
+
+def __getattr__(name):
+    if name == 'Canopy':
+        from .canopy import Canopy
+        return Canopy
+    if name == 'Session':
+        from .session import Session
+        return Session
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -0,0 +1,51 @@
+################################################################################
+# Name:    __main__.py
+# Purpose: This module provides the command line interface for running CanoPy
+#          stages, e.g.,
+#            python -m canopy canopy.cfg --regions 8 7 --dry-run
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import argparse
+from . import Canopy
+from . import planner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m canopy',
+            description='Runs CanoPy stages for physiographic regions.')
+    parser.add_argument('config', help='path to the *.cfg file')
+    parser.add_argument('--regions', nargs='+', type=int, required=True,
+                        help='physiographic region IDs')
+    parser.add_argument('--stages', nargs='+', choices=planner.STAGES,
+                        default=['convert_afe_to_final_tiles',
+                                 'clip_final_tiles',
+                                 'mosaic_clipped_final_tiles'],
+                        help='stages to run in order')
+    parser.add_argument('--max-gap-size', type=int, default=16,
+                        help='maximum gap size for fill_canopy_tif_gaps')
+    parser.add_argument('--min-area', type=float, default=4,
+                        help='minimum patch area for sieve_canopy_tif')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='print the plan with estimated costs and exit')
+    args = parser.parse_args(argv)
+
+    canopy = Canopy(args.config)
+    canopy.regions(args.regions)
+    tasks = canopy.plan(args.stages, dry_run=True)
+    if args.dry_run:
+        return
+
+    stage_args = {
+        'fill_canopy_tif_gaps': (args.max_gap_size,),
+        'sieve_canopy_tif': (args.min_area,),
+    }
+    # the printed plan is run
+    canopy.run(args.stages, stage_args, tasks)
+
+
+if __name__ == '__main__':
+    main()
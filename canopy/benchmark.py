@@ -0,0 +1,155 @@
+################################################################################
+# Name:    benchmark.py
+# Purpose: This module benchmarks output profiles by writing and reading
+#          synthetic canopy and NAIP rasters with each compression, e.g.,
+#            python -m canopy.benchmark C:/Temp/benchmark
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import arcpy
+from . import profiles
+
+
+def synthetic_canopy(size, seed=0):
+    '''
+    Creates a canopy array with clustered canopy patches and nodata corners
+    similar to a clipped final tile.
+
+    Parameters
+    ----------
+        size : int
+            Number of rows and columns
+        seed : int
+            Random seed
+
+    Returns
+    -------
+        numpy.ndarray
+            uint8 array of 0 (noncanopy), 1 (canopy), and 3 (nodata)
+    '''
+    rng = np.random.default_rng(seed)
+    # smooth noise by averaging coarse noise upsampled to the full size
+    coarse = rng.random((size // 16 + 1, size // 16 + 1))
+    noise = np.kron(coarse, np.ones((16, 16)))[:size, :size]
+    noise += rng.random((size, size)) * 0.3
+    arr = (noise > 0.65).astype(np.uint8)
+    rows, cols = np.indices(arr.shape)
+    arr[rows + cols < size // 8] = 3
+    arr[rows + cols > 2 * size - size // 8] = 3
+    return arr
+
+
+def synthetic_naip(size, seed=0):
+    '''
+    Creates a 4-band NAIP array with smooth spatially correlated values.
+
+    Parameters
+    ----------
+        size : int
+            Number of rows and columns
+        seed : int
+            Random seed
+
+    Returns
+    -------
+        numpy.ndarray
+            uint8 array of shape (4, size, size)
+    '''
+    rng = np.random.default_rng(seed)
+    bands = []
+    for i in range(4):
+        coarse = rng.random((size // 8 + 1, size // 8 + 1)) * 200
+        band = np.kron(coarse, np.ones((8, 8)))[:size, :size]
+        band += rng.normal(0, 4, (size, size))
+        bands.append(np.clip(band, 0, 255))
+    return np.stack(bands).astype(np.uint8)
+
+
+def run(outdir_path, size=4096, compressions=None, block_size=256):
+    '''
+    Writes and reads synthetic canopy and NAIP rasters with each compression
+    and measures their sizes and speeds.
+
+    Parameters
+    ----------
+        outdir_path : str
+            Folder where rasters are written
+        size : int
+            Number of rows and columns of the rasters
+        compressions : list
+            Compressions to benchmark; None for all
+        block_size : int
+            Number of rows and columns of a tile
+
+    Returns
+    -------
+        list
+            (raster, compression, MB, write seconds, read seconds, ratio)
+            tuples where ratio is the size of the first compression divided
+            by the size
+    '''
+    if compressions is None:
+        compressions = list(profiles.COMPRESSIONS)
+    if not os.path.exists(outdir_path):
+        os.makedirs(outdir_path)
+
+    arcpy.env.addOutputsToMap = False
+    rasters = [('canopy', synthetic_canopy(size), '2_BIT', 3),
+               ('naip', synthetic_naip(size), '8_BIT_UNSIGNED', None)]
+    results = []
+    for raster, arr, pixel_type, nodata in rasters:
+        ras = arcpy.NumPyArrayToRaster(arr, arcpy.Point(0, 0), 1, 1, nodata)
+        base_size = None
+        for compression in compressions:
+            profiles.set_profile(profiles.make_profile(compression,
+                                                       block_size))
+            path = '%s/%s_%s.tif' % (outdir_path, raster, compression.lower())
+            if arcpy.Exists(path):
+                arcpy.Delete_management(path)
+            start_time = time.time()
+            arcpy.CopyRaster_management(ras, path, pixel_type=pixel_type,
+                    nodata_value='' if nodata is None else '%d' % nodata)
+            write_seconds = time.time() - start_time
+            start_time = time.time()
+            arcpy.RasterToNumPyArray(path)
+            read_seconds = time.time() - start_time
+            mb = os.path.getsize(path) / 1024**2
+            if base_size is None:
+                base_size = mb
+            results.append((raster, compression, mb, write_seconds,
+                            read_seconds, base_size / mb if mb else 0))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m canopy.benchmark',
+            description='Benchmarks the compressions of output profiles.')
+    parser.add_argument('outdir', help='folder where rasters are written')
+    parser.add_argument('--size', type=int, default=4096,
+                        help='number of rows and columns of the rasters')
+    parser.add_argument('--compressions', nargs='+',
+                        choices=list(profiles.COMPRESSIONS),
+                        help='compressions to benchmark')
+    parser.add_argument('--block-size', type=int, default=256,
+                        help='number of rows and columns of a tile')
+    args = parser.parse_args(argv)
+
+    results = run(args.outdir, args.size, args.compressions, args.block_size)
+    print('%-8s %-10s %10s %10s %10s %8s' % ('raster', 'compress', 'MB',
+                                             'write s', 'read s', 'ratio'))
+    for raster, compression, mb, write_seconds, read_seconds, ratio in \
+            results:
+        print('%-8s %-10s %10.2f %10.2f %10.2f %8.2f' % (raster, compression,
+              mb, write_seconds, read_seconds, ratio))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,211 @@
+################################################################################
+# Name:    blocks.py
+# Purpose: This module provides functions for splitting rasters into blocks
+#          with halo overlap and processing them in parallel.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import sys
+import queue
+import multiprocessing
+
+
+def iter_blocks(shape, block_size, halo=0):
+    '''
+    Yields the windows of raster blocks in row-major order.
+
+    Parameters
+    ----------
+        shape : tuple
+            (rows, columns) raster dimensions
+        block_size : int
+            Number of rows and columns in a block
+        halo : int
+            Number of overlapping cells to add around each block
+
+    Yields
+    ------
+        block, window : tuple
+            (row_start, row_end, col_start, col_end) of the block itself and
+            of the block expanded by the halo and clipped to the raster
+    '''
+    rows, cols = shape
+    for r0 in range(0, rows, block_size):
+        r1 = min(r0 + block_size, rows)
+        for c0 in range(0, cols, block_size):
+            c1 = min(c0 + block_size, cols)
+            window = (max(r0 - halo, 0), min(r1 + halo, rows),
+                      max(c0 - halo, 0), min(c1 + halo, cols))
+            yield (r0, r1, c0, c1), window
+
+
+def crop(arr, block, window):
+    '''
+    Crops the halo off an array read for a window.
+
+    Parameters
+    ----------
+        arr : numpy.ndarray
+            Array of the window
+        block : tuple
+            Block from iter_blocks()
+        window : tuple
+            Window from iter_blocks()
+
+    Returns
+    -------
+        numpy.ndarray
+            Array of the block
+    '''
+    return arr[block[0] - window[0]:block[1] - window[0],
+               block[2] - window[2]:block[3] - window[2]]
+
+
+# Pool of warm worker processes and its size set by set_pool(), or None
+_warm_pool = None
+
+
+def set_pool(pool, processes=0):
+    '''
+    Sets a long-lived pool of worker processes that map_parallel() uses
+    instead of starting a new pool for each call, e.g., in the daemon.
+
+    Parameters
+    ----------
+        pool : multiprocessing.pool.Pool
+            Pool of worker processes; None to start a new pool for each call
+            again
+        processes : int
+            Number of worker processes in the pool; 0 for all CPUs
+    '''
+    global _warm_pool
+    _warm_pool = None if pool is None else (pool, processes or
+                                            os.cpu_count())
+
+
+def _set_executable():
+    # Inside ArcGIS Pro, sys.executable is ArcGISPro.exe, so worker processes
+    # have to be started by python.exe in the same environment.
+    python_path = os.path.join(sys.exec_prefix, 'python.exe')
+    if (os.name == 'nt' and os.path.exists(python_path) and
+            os.path.basename(sys.executable).lower() != 'python.exe'):
+        multiprocessing.set_executable(python_path)
+
+
+def working_set(shape, bands=1, bytes_per_cell=1):
+    '''
+    Estimates the working set of a task from the dimensions and band count of
+    the raster or window it processes.
+
+    Parameters
+    ----------
+        shape : tuple
+            (rows, columns) dimensions
+        bands : int
+            Number of bands
+        bytes_per_cell : float
+            Bytes used per cell and band by all the arrays of the task
+
+    Returns
+    -------
+        int
+            Estimated bytes
+    '''
+    return int(shape[0] * shape[1] * bands * bytes_per_cell)
+
+
+def map_parallel(func, tasks, processes=1, costs=None, memory=None,
+                 memory_budget=0):
+    '''
+    Applies a function to tasks in worker processes and yields the results in
+    the order in which the tasks are started. The function has to be defined
+    at the module level so that it can be pickled. If the memory of tasks and
+    a memory budget are given, a task is started only while the memory of
+    running tasks stays within the budget, and a task larger than the budget
+    runs alone. Tasks are started in order, so a large task waits for memory
+    instead of being overtaken by smaller tasks. The pool set by set_pool(),
+    if any, is used instead of a new pool.
+
+    Parameters
+    ----------
+        func : function
+            Function that takes one task
+        tasks : list
+            List of tasks
+        processes : int
+            Number of worker processes; 0 uses all CPUs and 1 runs the tasks
+            in the current process
+        costs : list
+            Estimated costs of the tasks; if given, tasks are started longest
+            first so that a long task does not start last
+        memory : list
+            Estimated working sets of the tasks in bytes
+        memory_budget : int
+            Maximum bytes for running tasks; 0 for no limit
+
+    Yields
+    ------
+        Results of func
+    '''
+    tasks = list(tasks)
+    if memory is None or memory_budget <= 0:
+        memory = [0] * len(tasks)
+    memory = list(memory)
+    if costs is not None:
+        costs = list(costs)
+        order = sorted(range(len(tasks)), key=lambda i: -costs[i])
+        tasks = [tasks[i] for i in order]
+        memory = [memory[i] for i in order]
+    if processes == 0:
+        processes = os.cpu_count()
+    processes = min(processes, len(tasks))
+    if processes <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    if _warm_pool is not None:
+        yield from _map_pool(_warm_pool[0], func, tasks,
+                             min(processes, _warm_pool[1]), memory,
+                             memory_budget)
+        return
+
+    _set_executable()
+    with multiprocessing.Pool(processes) as pool:
+        yield from _map_pool(pool, func, tasks, processes, memory,
+                             memory_budget)
+
+
+def _map_pool(pool, func, tasks, processes, memory, memory_budget):
+    # Applies a function to tasks in a pool and yields the results in order
+    if not any(memory):
+        for result in pool.imap(func, tasks):
+            yield result
+        return
+
+    # indices of finished tasks are put by the result handler thread
+    finished = queue.Queue()
+    running = {}
+    results = {}
+    used = 0
+    next_start = next_yield = 0
+    while next_yield < len(tasks):
+        while (next_start < len(tasks) and len(running) < processes and
+               (not running or used + memory[next_start] <= memory_budget)):
+            i = next_start
+            running[i] = pool.apply_async(func, (tasks[i],),
+                    callback=lambda x, i=i: finished.put(i),
+                    error_callback=lambda x, i=i: finished.put(i))
+            used += memory[i]
+            next_start += 1
+        i = finished.get()
+        results[i] = running.pop(i)
+        used -= memory[i]
+        while next_yield in results:
+            # raises the exception of a failed task
+            yield results.pop(next_yield).get()
+            next_yield += 1
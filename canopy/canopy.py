@@ -16,8 +16,26 @@ import os
 import sys
 import glob
 from .templates import config_template
+from . import grid
+from . import blocks
+from . import filters
+from . import watch
+from . import planner
+from . import profiles
+from . import ndvi
+from . import catalog
+from . import inversion
+from . import masks
+from . import sharedmem
+from . import cover
+from . import naipqq
+from . import classifier
+from . import retention
+from . import history
+from . import qa
 from configparser import ConfigParser
 import time
+import shutil
 import numpy as np
 
 
@@ -52,10 +70,52 @@ class Canopy:
         NAIP imagery data (naip_path).
     results_path : str
         Folder which will contain all outputs.
+    tile_store_path : str
+        Folder which will contain the reprojected and output tiles of all
+        regions. If empty, tiles are stored by region.
+    mask_path : str
+        Folder which will contain the cached region masks on the snap grid.
+        If empty, masks are stored in results_path/Masks.
     analysis_year : int
         Specifies which year is being analyzed.
+    processes : int
+        Number of worker processes for parallelized functions.
+    block_size : int
+        Number of rows and columns of the blocks in which large rasters are
+        processed.
+    memory_budget : int
+        Maximum bytes for the working sets of concurrent worker tasks; 0 for
+        no limit.
+    ndvi_vegetation : float
+        Minimum NDVI of vegetated cells for the NDVI pre-screen.
+    detect_inverted_tiles : bool
+        True to detect and correct inverted tiles before mosaicking.
+    inverted_phyreg_ids : list
+        Physiographic region IDs whose canopy TIFF files are inverted unless
+        they have been corrected or their inverted tiles were detected before
+        mosaicking.
+    min_vegetation_score : float
+        Reprojected tiles with a smaller fraction of vegetated cells get an
+        all-noncanopy final TIFF file and need not be classified; 0 disables
+        the NDVI pre-screen.
+    classifier_path : str
+        Path to the *.npz file of the pixel classifier trained by
+        train_pixel_classifier().
+    cover_origin : tuple
+        (x, y) of any cell corner of the coarse grid for canopy cover, e.g.,
+        the NLCD grid; None for the snap grid.
+    output_profiles : dict
+        Compression and block size profiles of intermediate and final rasters
+        from the [output] section; None for arcpy defaults.
+    retention_policy : retention.Policy
+        Actions on intermediate files by kind from the [retention] section.
+    timings : planner.TimingLog
+        Timings of tasks recorded in results_path for planning.
     phyreg_ids : list
         List of phyreg ids to process.
+    session : session.Session
+        Multi-year session that shares regions, tiles, snap grids, region
+        masks, and shared memory with other analysis years, or None.
 
     Methods
     -------
@@ -66,6 +126,12 @@ class Canopy:
         file.
     regions(phyregs):
         Adds the desired regions to self.phyreg_ids
+    plan(stages, dry_run):
+        Lists the pending work of stages with estimated costs.
+    run(stages, stage_args, tasks):
+        Runs stages for the regions with planned tasks, longest first.
+    is_region_inverted(name):
+        Checks if the uncorrected canopy TIFF files of a region are inverted.
     calculate_row_column(xy, rast_ext, rast_res):
         Calculates array row and column using x, y, extent, and
         resolution.
@@ -76,23 +142,53 @@ class Canopy:
     reproject_naip_tiles():
         Function reprojects and snaps the NAIP tiles that intersect
         selected physiographic regions.
+    train_pixel_classifier(samples_per_tile):
+        Trains a pixel classifier from AFE outputs and GT points.
+    classify_naip_tiles():
+        Classifies reprojected tiles into final TIFF files with the pixel
+        classifier instead of Feature Analyst.
     convert_afe_to_final_tiles():
         Converts AFE outputs to final TIFF files.
     clip_final_tiles():
         Clips final TIFF files.
+    scan_clipped_final_tiles():
+        Ranks clipped final TIFF files by anomalies before mosaicking.
     mosaic_clipped_final_tiles():
         Mosaics clipped final TIFF files and clips mosaicked files
         to physiographic regions.
+    patch_region_mosaics(filenames):
+        Updates the mosaicked and canopy TIFF files in place for changed
+        tiles.
+    watch_afe_outputs(interval, stable_time):
+        Converts, clips, and mosaics AFE outputs as soon as Feature Analyst
+        writes them.
     convert_afe_to_canopy_tif():
         A wrapper function that converts AFE outputs to the
         final canopy TIFF file by invoking convert_afe_to_final_tiles(),
         clip_final_tiles(), and mosaic_clipped_final_tiles() in the correct
         order.
+    fill_canopy_tif_gaps(max_gap_size):
+        Fills nodata gaps enclosed by canopy and noncanopy cells in the canopy
+        TIFF files.
+    sieve_canopy_tif(min_area, connectivity):
+        Removes canopy and noncanopy patches smaller than a minimum mapping
+        unit from the canopy TIFF files.
     correct_inverted_canopy_tif(inverted_phyreg_ids):
         Corrects the values of mosaikced and clipped regions that
         have been inverted.
-    convert_canopy_tif_to_shp():
-        Converts the canopy TIFF files to shapefile.
+    convert_canopy_tif_to_shp(tolerances):
+        Converts the canopy TIFF files to shapefile and optionally to
+        simplified levels of detail in GeoPackages.
+    aggregate_canopy_tif(factor, percent):
+        Aggregates the canopy TIFF files to canopy cover on a coarse grid.
+    merge_canopy_cover(factor, percent):
+        Merges the canopy cover of all regions into one raster.
+    build_history_stack():
+        Packs the canopy TIFF files of the analysis years of the session into
+        a history stack raster.
+    reclaim_intermediates(dry_run):
+        Deletes or archives intermediate files whose downstream outputs are
+        complete and reports the space reclaimed by region.
     generate_gtpoints(phyreg_ids, min_area_sqkm, max_area_sqkm, min_points,
                       max_points):
         Generates randomized points for ground truthing.
@@ -100,6 +196,9 @@ class Canopy:
         Copies a previous years GT points but with the new years GT values.
     add_naip_tiles_for_gt(gtpoints):
         Adds NAIP imagery where a ground truthing point is located.
+    iter_reproject_naip_tiles(), iter_convert_afe_to_final_tiles(), ...:
+        Iterator forms of the stages that yield a planner.Result for each
+        tile or region as soon as it is processed.
     '''
 
     def __init__(self, config_path):
@@ -122,6 +221,9 @@ class Canopy:
         if not os.path.exists(config_path):
             self.gen_cfg(config_path)
             self.config = config_path
+        self.session = None
+        self.__mask_cache = None
+        self.__shared_arrays = None
         self.__reload_cfg()
 
     def __timed(func):
@@ -129,14 +231,28 @@ class Canopy:
         def wrapper(self, *args, **kwargs):
             if self.verbosity == 1:
                 start_time = time.time()
-                func(self, *args, **kwargs)
+                result = func(self, *args, **kwargs)
                 end_time = time.time() - start_time
                 print(f"---- {end_time / 60} minutes elapsed----")
             else:
-                func(self, *args, **kwargs)
+                result = func(self, *args, **kwargs)
+            return result
 
         return wrapper
 
+    def __run_stage(self, results):
+        # Runs a stage iterator to the end, printing each physiographic region
+        # as its first result arrives, and returns the list of results
+        records = []
+        region = None
+        for result in results:
+            if result.region != region:
+                region = result.region
+                print(region)
+            records.append(result)
+        print('Completed')
+        return records
+
     def __get_cellsizes(self, input_raster):
         # Returns a tuple of the x,y cell dimensions of raster
         x = arcpy.Raster(input_raster).meanCellWidth
@@ -208,7 +324,34 @@ class Canopy:
         self.spatref_wkid = int(conf.get('config', 'spatref_wkid'))
         self.snaprast_path = str.strip(conf.get('config', 'snaprast_path'))
         self.results_path = str.strip(conf.get('config', 'results_path'))
+        self.tile_store_path = str.strip(conf.get('config', 'tile_store_path',
+                                                  fallback=''))
+        self.mask_path = str.strip(conf.get('config', 'mask_path',
+                                            fallback='')) or \
+                '%s/Masks' % self.results_path
         self.analysis_year = int(conf.get('config', 'analysis_year'))
+        self.processes = int(conf.get('config', 'processes', fallback=1))
+        self.block_size = int(conf.get('config', 'block_size', fallback=4096))
+        self.memory_budget = int(float(conf.get('config', 'memory_budget',
+                                                fallback=0)) * 1024**2)
+        self.ndvi_vegetation = float(conf.get('config', 'ndvi_vegetation',
+                                              fallback=0.2))
+        self.min_vegetation_score = float(conf.get('config',
+                'min_vegetation_score', fallback=0))
+        self.detect_inverted_tiles = conf.getboolean('config',
+                'detect_inverted_tiles', fallback=False)
+        self.inverted_phyreg_ids = [int(x) for x in conf.get('config',
+                'inverted_phyreg_ids', fallback='').split(',') if x.strip()]
+        self.classifier_path = str.strip(conf.get('config',
+                'classifier_path', fallback='')) or \
+                '%s/classifier.npz' % self.results_path
+        cover_origin = conf.get('config', 'cover_origin', fallback='').strip()
+        self.cover_origin = tuple(float(x) for x in cover_origin.split(
+            ',')) if cover_origin else None
+        self.output_profiles = {kind: profiles.read_profile(conf, kind)
+                                for kind in profiles.KINDS}
+        self.retention_policy = retention.read_policy(conf)
+        self.timings = planner.TimingLog('%s/timings.json' % self.results_path)
 
     def update_config(self, **parameters):
         '''
@@ -316,6 +459,366 @@ class Canopy:
         for i in range(len(phyregs)):
             self.phyreg_ids.append(phyregs[i])
 
+    def plan(self, stages=None, dry_run=True):
+        '''
+        This function plans the pending work of stages for the physiographic
+        regions in phyreg_ids. Region and tile lists are read with one cursor
+        each and each folder is scanned only once. The cost of each task is
+        estimated from its input size and the timings recorded by earlier
+        runs, and tasks are listed longest first.
+
+        Parameters
+        ----------
+            stages : list
+                Stage names from planner.STAGES; all stages by default
+            dry_run : bool
+                True to print the plan
+
+        Returns
+        -------
+            list
+                List of planner.Task
+        '''
+        phyregs_layer = self.phyregs_layer
+        naipqq_layer = self.naipqq_layer
+        results_path = self.results_path
+
+        if stages is None:
+            stages = planner.STAGES
+
+        arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                'CLEAR_SELECTION')
+        arcpy.SelectLayerByAttribute_management(naipqq_layer,
+                                                'CLEAR_SELECTION')
+
+        names = {x: y for x, y in self.__get_region_names().items()
+                 if x in self.phyreg_ids}
+        region_tiles = self.__get_region_tiles()
+
+        if self.session:
+            scan = self.session.scan
+        else:
+            scans = {}
+
+            def scan(path):
+                if path not in scans:
+                    scans[path] = planner.scan_dir(path)
+                return scans[path]
+
+        naip_files = {}
+        if 'reproject_naip_tiles' in stages:
+            for folder in set(x[2:7] for phyreg_id in names
+                              for x in region_tiles.get(phyreg_id, [])):
+                naip_files[folder] = scan('%s/%s' % (self.naip_path, folder))
+
+        tasks = {}
+        for phyreg_id, name in sorted(names.items(), key=lambda x: x[1]):
+            inputs_path, outputs_path = self.__get_tile_paths(name)
+            region_outputs_path = '%s/%s/Outputs' % (results_path, name)
+            tiles = region_tiles.get(phyreg_id, [])
+            for task in planner.plan_region(name, tiles, scan(inputs_path),
+                    scan(outputs_path), scan(region_outputs_path), naip_files,
+                    self.analysis_year, self.timings,
+                    (inputs_path, outputs_path, region_outputs_path)):
+                # tiles in the shared tile store are planned once
+                if task.stage in stages and task.path not in tasks:
+                    tasks[task.path] = task
+
+        tasks = planner.longest_first(tasks.values())
+        if dry_run:
+            print(planner.summarize(tasks, self.processes or os.cpu_count()))
+        return tasks
+
+    def run(self, stages=None, stage_args=None, tasks=None):
+        '''
+        This function runs stages from their planned tasks. Stages are run in
+        the order of planner.STAGES, and for each stage, regions are run one
+        at a time in descending order of their estimated seconds, so that the
+        largest region does not start last. Regions without planned tasks for
+        a stage are skipped.
+
+        Parameters
+        ----------
+            stages : list
+                Stage names from planner.STAGES; all stages by default
+            stage_args : dict
+                Tuples of arguments by stage name, e.g.,
+                {'sieve_canopy_tif': (4,)}
+            tasks : list
+                List of planner.Task from plan(); None to plan the stages
+
+        Returns
+        -------
+            dict
+                Lists of planner.Result by stage name
+        '''
+        if stages is None:
+            stages = planner.STAGES
+        if stage_args is None:
+            stage_args = {}
+        if tasks is None:
+            tasks = self.plan(stages, dry_run=False)
+        phyreg_ids = {y: x for x, y in self.__get_region_names().items()
+                      if x in self.phyreg_ids}
+        all_phyreg_ids = self.phyreg_ids
+        results = {}
+        try:
+            for stage in planner.STAGES:
+                if stage not in stages:
+                    continue
+                seconds = {}
+                for task in tasks:
+                    if task.stage == stage:
+                        seconds[task.region] = seconds.get(task.region, 0) + \
+                                task.seconds
+                for region in sorted(seconds, key=lambda x: -seconds[x]):
+                    self.phyreg_ids = [phyreg_ids[region]]
+                    # iterator forms yield planner.Result for all stages
+                    results.setdefault(stage, []).extend(self.__run_stage(
+                        getattr(self, 'iter_%s' % stage)(
+                            *stage_args.get(stage, ()))))
+        finally:
+            self.phyreg_ids = all_phyreg_ids
+        return results
+
+    def is_region_inverted(self, name):
+        '''
+        This function checks if the canopy TIFF files of a physiographic
+        region other than the corrected one are inverted as a whole, which is
+        the case if the region is listed in inverted_phyreg_ids and its
+        inverted tiles were not detected before mosaicking.
+
+        Parameters
+        ----------
+            name : str
+                Physiographic region name with underscores
+
+        Returns
+        -------
+            bool
+                True if the region is inverted
+        '''
+        return any(self.__is_region_inverted(name, x) for x, y in
+                   self.__get_region_names().items() if y == name)
+
+    def __get_region_names(self):
+        # Returns the names of all physiographic regions by ID, which are
+        # shared by the analysis years of a session.
+        if self.session:
+            return self.session.get_region_names(self.phyregs_layer)
+        return catalog.read_region_names(self.phyregs_layer)
+
+    def __get_region_tiles(self):
+        # Returns the NAIP tiles of all physiographic regions by ID, which are
+        # shared by the analysis years of a session using the same NAIP QQ
+        # layer.
+        if self.session:
+            return self.session.get_region_tiles(self.naipqq_layer,
+                                                 self.naipqq_phyregs_field)
+        return catalog.read_region_tiles(self.naipqq_layer,
+                                         self.naipqq_phyregs_field)
+
+    def __get_region_geometries(self):
+        # Returns the polygons of all physiographic regions by ID in the output
+        # spatial reference, which are shared by the analysis years of a
+        # session.
+        if self.session:
+            return self.session.get_region_geometries(self.phyregs_layer,
+                                                      self.spatref_wkid)
+        return catalog.read_region_geometries(self.phyregs_layer,
+                                              self.spatref_wkid)
+
+    def __get_qq_lookup(self):
+        # Returns the lookup of NAIP tile filenames by QQ name, which is
+        # shared by the analysis years of a session using the same NAIP QQ
+        # layer.
+        if self.session:
+            filenames = self.session.get_tile_filenames(self.naipqq_layer)
+        else:
+            filenames = catalog.read_tile_filenames(self.naipqq_layer)
+        return naipqq.QQLookup(filenames)
+
+    def __get_tile_areas(self):
+        # Returns the footprint areas of all NAIP tiles in the output spatial
+        # reference, which are shared by the analysis years of a session
+        # using the same NAIP QQ layer.
+        if self.session:
+            return self.session.get_tile_areas(self.naipqq_layer,
+                                               self.spatref_wkid)
+        return catalog.read_tile_areas(self.naipqq_layer, self.spatref_wkid)
+
+    def __get_point_tiles(self, points):
+        # Returns the NAIP tile filenames of points by object ID. Points are
+        # read in NAD83 geographic coordinates and addressed on the QQ grid.
+        oids = []
+        lonlat = []
+        with arcpy.da.SearchCursor(points, ['OID@', 'SHAPE@XY'],
+                spatial_reference=arcpy.SpatialReference(
+                    naipqq.SPATREF_WKID)) as cur:
+            for oid, xy in cur:
+                oids.append(oid)
+                lonlat.append(xy)
+        if not oids:
+            return {}
+        lonlat = np.array(lonlat, dtype=float)
+        filenames = self.__get_qq_lookup().resolve(lonlat[:, 0],
+                                                   lonlat[:, 1])
+        return dict(zip(oids, filenames))
+
+    def __is_region_inverted(self, name, phyreg_id):
+        # Returns True if the canopy TIFF files of a region are inverted as a
+        # whole. Listed regions are not if their inverted tiles were detected
+        # and flipped before their mosaic was built, whatever
+        # detect_inverted_tiles is now.
+        return (phyreg_id in self.inverted_phyreg_ids and
+                not os.path.exists(self.__get_inverted_tiles_path(name)))
+
+    def __get_inverted_tiles_path(self, name):
+        # Returns the path to the list of the inverted tiles of a region, which
+        # is written only when they are detected before mosaicking
+        return '%s/%s/inverted_tiles_%d.txt' % (self.results_path, name,
+                                                self.analysis_year)
+
+    def __get_tile_paths(self, name):
+        # Returns the folders for the reprojected and output tiles of a region,
+        # which are shared by all regions if tile_store_path is configured.
+        if self.tile_store_path:
+            return ('%s/Inputs' % self.tile_store_path,
+                    '%s/Outputs' % self.tile_store_path)
+        return ('%s/%s/Inputs' % (self.results_path, name),
+                '%s/%s/Outputs' % (self.results_path, name))
+
+    def __read_region_tiles(self, name):
+        # Returns the reprojected tile filenames listed in the manifest of a
+        # region in the shared tile store.
+        manifest_path = '%s/%s/tiles.txt' % (self.results_path, name)
+        if not os.path.exists(manifest_path):
+            return []
+        with open(manifest_path) as f:
+            return [x.strip() for x in f if x.strip()]
+
+    def __link_region_tiles(self, name, filenames):
+        '''
+        This function writes the manifest of the reprojected tiles of a region
+        in the shared tile store and the batch manifest of the tiles to be
+        classified for the region, and hard links the batch tiles into the
+        Inputs folder of the region so that they can be batch classified by
+        region. A tile shared with other regions is batched only by the
+        region that listed it first, so that Feature Analyst classifies it
+        once. Tiles are only listed in the batch manifest if hard links are
+        not supported.
+
+        Parameters
+        ----------
+            name : str
+                Physiographic region name
+            filenames : list
+                Reprojected tile filenames
+        '''
+        store_path = self.__get_tile_paths(name)[0]
+        regdir_path = '%s/%s' % (self.results_path, name)
+        inputs_path = '%s/Inputs' % regdir_path
+        batched = set()
+        for batch_path in glob.glob('%s/*/batch.txt' % self.results_path):
+            if os.path.basename(os.path.dirname(batch_path)) != name:
+                with open(batch_path) as f:
+                    batched.update(x.strip() for x in f if x.strip())
+        with open('%s/tiles.txt' % regdir_path, 'w') as f:
+            f.writelines('%s\n' % x for x in filenames)
+        with open('%s/batch.txt' % regdir_path, 'w') as f:
+            f.writelines('%s\n' % x for x in filenames if x not in batched)
+        for filename in filenames:
+            tile_path = '%s/%s' % (store_path, filename)
+            link_path = '%s/%s' % (inputs_path, filename)
+            if not os.path.exists(tile_path):
+                continue
+            if filename in batched:
+                # remove links batched by another region
+                if os.path.exists(link_path) and os.path.samefile(
+                        tile_path, link_path):
+                    os.remove(link_path)
+            elif not os.path.exists(link_path):
+                try:
+                    os.link(tile_path, link_path)
+                except OSError:
+                    pass
+
+    def __prescreen_tile(self, rtiffile_path, outdir_path):
+        '''
+        This function scores the vegetation of a reprojected tile from the NDVI
+        histogram of its red and near-infrared bands read block by block. If
+        the score is less than min_vegetation_score, it writes an
+        all-noncanopy final TIFF file with nodata where the tile has no data.
+
+        Parameters
+        ----------
+            rtiffile_path : str
+                Path to the reprojected tile
+            outdir_path : str
+                Folder for the final TIFF file
+
+        Returns
+        -------
+            float
+                Vegetation score from 0 to 1
+        '''
+        ras = arcpy.Raster(rtiffile_path)
+        if ras.bandCount < 4:
+            return 1.0
+        shape = (ras.height, ras.width)
+        hist = ndvi.NDVIHistogram()
+        arr = np.full(shape, 3, dtype=np.uint8)
+        for block, _ in blocks.iter_blocks(shape, self.block_size):
+            valid = hist.add(_read_window(rtiffile_path, block, 0))
+            arr[block[0]:block[1], block[2]:block[3]][valid] = 0
+        score = hist.score(self.ndvi_vegetation)
+        frtiffile_path = '%s/f%s' % (outdir_path,
+                                     os.path.basename(rtiffile_path))
+        if score < self.min_vegetation_score and not os.path.exists(
+                frtiffile_path):
+            if not os.path.exists(outdir_path):
+                os.makedirs(outdir_path)
+            _save_array(arr, frtiffile_path,
+                        (ras.extent.XMin, ras.extent.YMin),
+                        (ras.meanCellWidth, ras.meanCellHeight),
+                        self.spatref_wkid)
+        return score
+
+    def __read_vegetation_scores(self, name):
+        # Returns the vegetation scores of reprojected tiles by filename from
+        # vegetation.txt in the region folder.
+        scores = {}
+        scores_path = '%s/%s/vegetation.txt' % (self.results_path, name)
+        if os.path.exists(scores_path):
+            with open(scores_path) as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 2:
+                        scores[fields[0]] = float(fields[1])
+        return scores
+
+    def __write_vegetation_scores(self, name, scores):
+        # Writes the vegetation scores of reprojected tiles to vegetation.txt
+        # in the region folder with 1 for tiles to classify and 0 for skipped
+        # tiles.
+        with open('%s/%s/vegetation.txt' % (self.results_path, name),
+                  'w') as f:
+            for filename, score in sorted(scores.items()):
+                f.write('%s %.4f %d\n' % (filename, score,
+                        score >= self.min_vegetation_score))
+
+    def __get_canopy_tif_path(self, outdir_path, name,
+                              prefixes=('sieved_', 'filled_')):
+        # Returns the path to the first existing canopy TIFF of a region with
+        # one of the prefixes of processed canopy TIFFs, or the path to the
+        # original canopy TIFF.
+        for prefix in prefixes:
+            path = '%s/%scanopy_%d_%s.tif' % (outdir_path, prefix,
+                                              self.analysis_year, name)
+            if os.path.exists(path):
+                return path
+        return '%s/canopy_%d_%s.tif' % (outdir_path, self.analysis_year, name)
+
     def __calculate_row_column(self, xy, rast_ext, rast_res):
         '''
         This function calculates array row and column using x, y, extent, and
@@ -416,8 +919,31 @@ class Canopy:
     def reproject_naip_tiles(self):
         '''
         This function reprojects and snaps the NAIP tiles that intersect
-        selected physiographic regions.
+        selected physiographic regions. See iter_reproject_naip_tiles().
+
+        Returns
+        -------
+            list
+                List of planner.Result by tile
         '''
+        return self.__run_stage(self.iter_reproject_naip_tiles())
+
+    def iter_reproject_naip_tiles(self):
+        '''
+        This function reprojects and snaps the NAIP tiles that intersect
+        selected physiographic regions. If min_vegetation_score is greater than
+        0, the NDVI of each reprojected tile is scored and tiles with too
+        little vegetation get an all-noncanopy final TIFF file so that they
+        need not be classified. Scores are written to vegetation.txt in the
+        region folder.
+
+        Yields
+        ------
+            planner.Result
+                Result of each tile with its vegetation score as the value if
+                scored
+        '''
+        stage = 'reproject_naip_tiles'
         phyregs_layer = self.phyregs_layer
         naipqq_layer = self.naipqq_layer
         naipqq_phyregs_field = self.naipqq_phyregs_field
@@ -429,6 +955,7 @@ class Canopy:
         spatref = arcpy.SpatialReference(spatref_wkid)
 
         arcpy.env.addOutputsToMap = False
+        profiles.set_profile(self.output_profiles['intermediate'])
         if not os.path.exists(snaprast_path):
             snaprast_file = os.path.basename(snaprast_path)
             # Account for different filename lengths between years
@@ -444,49 +971,96 @@ class Canopy:
         arcpy.SelectLayerByAttribute_management(phyregs_layer,
                 where_clause='PHYSIO_ID in (%s)' % ','.join(map(str,
                                             self.phyreg_ids)))
-        with arcpy.da.SearchCursor(phyregs_layer, ['NAME', 'PHYSIO_ID']) as cur:
-            for row in cur:
-                name = row[0]
-                print(name)
+        try:
+            with arcpy.da.SearchCursor(phyregs_layer,
+                                       ['NAME', 'PHYSIO_ID']) as cur:
+                rows = list(cur)
+            for row in rows:
                 # CreateRandomPoints cannot create a shapefile with - in its
                 # filename
-                name = name.replace(' ', '_').replace('-', '_')
+                name = row[0].replace(' ', '_').replace('-', '_')
                 phyreg_id = row[1]
-                outdir_path = '%s/%s/Inputs' % (results_path, name)
+                regdir_path = '%s/%s' % (results_path, name)
+                for path in (regdir_path, '%s/Inputs' % regdir_path,
+                             '%s/Outputs' % regdir_path):
+                    if not os.path.exists(path):
+                        os.mkdir(path)
+                outdir_path, tiledir_path = self.__get_tile_paths(name)
                 if not os.path.exists(outdir_path):
-                    if not os.path.exists(outdir_path[:-7]):
-                        os.mkdir(outdir_path[:-7])
-                    os.mkdir(outdir_path)
-                outputs_path = '%s/%s/Outputs' % (results_path, name)
-                if not os.path.exists(outputs_path):
-                    os.mkdir(outputs_path)
+                    os.makedirs(outdir_path)
                 arcpy.SelectLayerByAttribute_management(naipqq_layer,
                         where_clause="%s like '%%,%d,%%'" % (
                             naipqq_phyregs_field, phyreg_id))
-                with arcpy.da.SearchCursor(naipqq_layer, ['FileName']) as cur2:
-                    for row2 in sorted(cur2):
-                        filename = '%s.tif' % row2[0][:-13]
-                        folder = filename[2:7]
-                        infile_path = '%s/%s/%s' % (naip_path, folder, filename)
-                        outfile_path = '%s/r%s' % (outdir_path, filename)
+                manifest = []
+                scores = self.__read_vegetation_scores(name)
+                with arcpy.da.SearchCursor(naipqq_layer, ['FileName']) as cur:
+                    filenames = sorted(x[0] for x in cur)
+                for filename in filenames:
+                    filename = '%s.tif' % filename[:-13]
+                    folder = filename[2:7]
+                    infile_path = '%s/%s/%s' % (naip_path, folder, filename)
+                    outfile_path = '%s/r%s' % (outdir_path, filename)
+                    manifest.append('r%s' % filename)
+                    start_time = time.time()
+                    exists = os.path.exists(outfile_path)
+                    if not exists:
                         self.__check_snap(infile_path)
-                        if not os.path.exists(outfile_path):
-                            arcpy.ProjectRaster_management(infile_path,
-                                    outfile_path, spatref)
-
-        # clear selection
-        arcpy.SelectLayerByAttribute_management(phyregs_layer,
-                                                'CLEAR_SELECTION')
-        arcpy.SelectLayerByAttribute_management(naipqq_layer,
-                                                'CLEAR_SELECTION')
-
-        print('Completed')
+                        arcpy.ProjectRaster_management(infile_path,
+                                outfile_path, spatref)
+                        self.timings.record(stage,
+                                os.path.getsize(infile_path),
+                                time.time() - start_time)
+                    if (self.min_vegetation_score > 0 and
+                            'r%s' % filename not in scores):
+                        scores['r%s' % filename] = self.__prescreen_tile(
+                                outfile_path, tiledir_path)
+                    yield planner.Result(stage, name, phyreg_id,
+                            'r%s' % filename, outfile_path,
+                            'skipped' if exists else 'done',
+                            time.time() - start_time,
+                            'exists' if exists else None,
+                            scores.get('r%s' % filename))
+                if self.tile_store_path:
+                    self.__link_region_tiles(name, manifest)
+                if self.min_vegetation_score > 0:
+                    self.__write_vegetation_scores(name, scores)
+                    skipped = [x for x in manifest
+                               if scores[x] < self.min_vegetation_score]
+                    print('%d of %d tiles need not be classified' % (
+                        len(skipped), len(manifest)))
+                self.timings.save()
+        finally:
+            # clear selection
+            arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                    'CLEAR_SELECTION')
+            arcpy.SelectLayerByAttribute_management(naipqq_layer,
+                                                    'CLEAR_SELECTION')
 
     @__timed
     def convert_afe_to_final_tiles(self):
         '''
-        This function converts AFE outputs to final TIFF files.
+        This function converts AFE outputs to final TIFF files. See
+        iter_convert_afe_to_final_tiles().
+
+        Returns
+        -------
+            list
+                List of planner.Result by tile
+        '''
+        return self.__run_stage(self.iter_convert_afe_to_final_tiles())
+
+    def iter_convert_afe_to_final_tiles(self):
+        '''
+        This function converts AFE outputs to final TIFF files. Shapefile
+        outputs are rasterized directly onto the snap grid in parallel and
+        TIFF outputs are reclassified.
+
+        Yields
+        ------
+            planner.Result
+                Result of each tile, and of each region without outputs
         '''
+        stage = 'convert_afe_to_final_tiles'
         phyregs_layer = self.phyregs_layer
         naipqq_layer = self.naipqq_layer
         naipqq_phyregs_field = self.naipqq_phyregs_field
@@ -499,78 +1073,370 @@ class Canopy:
         arcpy.SelectLayerByAttribute_management(phyregs_layer,
                 where_clause='PHYSIO_ID in (%s)' % ','.join(map(str,
                                                         self.phyreg_ids)))
-        with arcpy.da.SearchCursor(phyregs_layer, ['NAME', 'PHYSIO_ID']) as cur:
-            for row in cur:
-                name = row[0]
-                print(name)
+        try:
+            with arcpy.da.SearchCursor(phyregs_layer,
+                                       ['NAME', 'PHYSIO_ID']) as cur:
+                rows = list(cur)
+            for row in rows:
                 # CreateRandomPoints cannot create a shapefile with - in its
                 # filename
-                name = name.replace(' ', '_').replace('-', '_')
+                name = row[0].replace(' ', '_').replace('-', '_')
                 phyreg_id = row[1]
                 # Check and ensure that FA has classified all files.
-                outdir_path = '%s/%s/Outputs' % (results_path, name)
-                # Path for reprojected tiles
-                inputs_path = '%s/%s/Inputs' % (results_path, name)
+                # Paths for reprojected and classified tiles
+                inputs_path, outdir_path = self.__get_tile_paths(name)
 
                 if len(os.listdir(outdir_path)) == 0:
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         outdir_path, 'skipped',
+                                         reason='no outputs')
                     continue
                 # File names for all reprojected inputs
-                inputs_check = [os.path.basename(x) for x in
-                                glob.glob(f"{inputs_path}/rm_*.tif")]
+                if self.tile_store_path:
+                    inputs_check = [x for x in self.__read_region_tiles(name)
+                                    if x.startswith('rm_')]
+                else:
+                    inputs_check = [os.path.basename(x) for x in
+                                    glob.glob(f"{inputs_path}/rm_*.tif")]
                 # File names for all classified outputs
-                output_class_check = [os.path.basename(x) for x in
-                                      glob.glob(f"{outdir_path}/rm_*.tif")]
-                # Check and get file names of those missing.
-                missing = []
-                for i in inputs_check:
-                    if i not in output_class_check:
-                        missing.append(i)
-                # If any are missing then the length of each list will be
-                # different. Raise I/O error and return missing file names.
-                if len(inputs_check) != len(output_class_check):
+                output_class_check = set(os.listdir(outdir_path))
+                # Check and get file names of those missing. Tiles skipped by
+                # the NDVI pre-screen already have final TIFF files.
+                missing = [i for i in inputs_check
+                           if i not in output_class_check and
+                           '%s.shp' % i[:-4] not in output_class_check and
+                           'f%s' % i not in output_class_check]
+                # If any are missing then raise I/O error and return missing
+                # file names. The shared tile store contains the outputs of
+                # other regions as well.
+                if missing:
                     # Format the same way FA specifies batch inputs.
                     missing_formated = " ".join(missing).replace(' ', '; ')
                     raise IOError(f"Missing classified file: {missing_formated}")
                 arcpy.SelectLayerByAttribute_management(naipqq_layer,
                         where_clause="%s like '%%,%d,%%'" % (
                             naipqq_phyregs_field, phyreg_id))
-                with arcpy.da.SearchCursor(naipqq_layer, ['FileName']) as cur2:
-                    for row2 in sorted(cur2):
-                        filename = row2[0][:-13]
-                        rshpfile_path = '%s/r%s.shp' % (outdir_path, filename)
-                        rtiffile_path = '%s/r%s.tif' % (outdir_path, filename)
-                        frtiffile_path = '%s/fr%s.tif' % (outdir_path, filename)
-                        if os.path.exists(frtiffile_path):
-                            continue
-                        if os.path.exists(rshpfile_path):
-                            arcpy.FeatureToRaster_conversion(rshpfile_path,
-                                    'CLASS_ID', frtiffile_path)
-                            # Compare output tif cell size to snap raster
-                            self.__check_snap(frtiffile_path)
-                        elif os.path.exists(rtiffile_path):
-                            # Compare input tif cell size to snap raster
-                            self.__check_snap(rtiffile_path)
-                            arcpy.Reclassify_3d(rtiffile_path, 'Value',
-                                                '1 0;2 1', frtiffile_path)
-        # clear selection
-        arcpy.SelectLayerByAttribute_management(phyregs_layer,
-                                                'CLEAR_SELECTION')
-        arcpy.SelectLayerByAttribute_management(naipqq_layer,
-                                                'CLEAR_SELECTION')
+                # shapefile outputs are rasterized in parallel
+                tasks = []
+                with arcpy.da.SearchCursor(naipqq_layer, ['FileName']) as cur:
+                    filenames = sorted(x[0][:-13] for x in cur)
+                for filename in filenames:
+                    frtiffile_path = '%s/fr%s.tif' % (outdir_path, filename)
+                    task = self.__get_rasterize_task(outdir_path, filename)
+                    if task:
+                        tasks.append(task)
+                        continue
+                    start_time = time.time()
+                    if os.path.exists(frtiffile_path):
+                        status, reason = 'skipped', 'exists'
+                    elif self.__convert_afe_tile(outdir_path, filename):
+                        status, reason = 'done', None
+                    else:
+                        status, reason = 'skipped', 'no AFE output'
+                    yield planner.Result(stage, name, phyreg_id, filename,
+                                         frtiffile_path, status,
+                                         time.time() - start_time, reason)
+                sizes = [os.path.getsize(x[0]) for x in tasks]
+                memory = [_estimate_rasterize_memory(x) for x in tasks]
+                # results are yielded longest first
+                order = sorted(range(len(tasks)), key=lambda i: -sizes[i])
+                for i, (converted, seconds) in zip(order,
+                        blocks.map_parallel(_timed_task,
+                            [(_rasterize_afe_tile, x) for x in tasks],
+                            self.processes, sizes, memory,
+                            self.memory_budget)):
+                    self.timings.record(stage, sizes[i], seconds)
+                    frtiffile_path = tasks[i][1]
+                    yield planner.Result(stage, name, phyreg_id,
+                            os.path.basename(frtiffile_path)[2:-4],
+                            frtiffile_path,
+                            'done' if converted else 'skipped', seconds,
+                            None if converted else 'no polygons')
+                self.timings.save()
+        finally:
+            # clear selection
+            arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                    'CLEAR_SELECTION')
+            arcpy.SelectLayerByAttribute_management(naipqq_layer,
+                                                    'CLEAR_SELECTION')
+
+    def __convert_afe_tile(self, outdir_path, filename):
+        # Converts the AFE output of a tile, if any, to the final TIFF file and
+        # returns True if the final TIFF file exists.
+        rshpfile_path = '%s/r%s.shp' % (outdir_path, filename)
+        rtiffile_path = '%s/r%s.tif' % (outdir_path, filename)
+        frtiffile_path = '%s/fr%s.tif' % (outdir_path, filename)
+        if os.path.exists(frtiffile_path):
+            return True
+        profiles.set_profile(self.output_profiles['intermediate'])
+        start_time = time.time()
+        if os.path.exists(rshpfile_path):
+            if not _rasterize_afe_tile(self.__get_rasterize_task(outdir_path,
+                                                                 filename)):
+                return False
+            size = os.path.getsize(rshpfile_path)
+        elif os.path.exists(rtiffile_path):
+            # Compare input tif cell size to snap raster
+            self.__check_snap(rtiffile_path)
+            arcpy.Reclassify_3d(rtiffile_path, 'Value', '1 0;2 1',
+                                frtiffile_path)
+            size = os.path.getsize(rtiffile_path)
+        else:
+            return False
+        self.timings.record('convert_afe_to_final_tiles', size,
+                            time.time() - start_time)
+        return True
+
+    def __get_rasterize_task(self, outdir_path, filename):
+        # Returns the task for rasterizing the AFE shapefile output of a tile
+        # if it has not been converted yet, or None.
+        rshpfile_path = '%s/r%s.shp' % (outdir_path, filename)
+        frtiffile_path = '%s/fr%s.tif' % (outdir_path, filename)
+        if os.path.exists(frtiffile_path) or not os.path.exists(rshpfile_path):
+            return None
+        origin, cellsize = self.__get_snap_grid()
+        return (rshpfile_path, frtiffile_path, origin, cellsize,
+                self.spatref_wkid, self.output_profiles['intermediate'])
+
+    def __get_snap_grid(self):
+        # Returns the upper left corner and cell size of the snap raster
+        if self.session:
+            return self.session.get_snap_grid(self.snaprast_path)
+        return catalog.read_snap_grid(self.snaprast_path)
 
-        print('Completed')
+    @__timed
+    def train_pixel_classifier(self, samples_per_tile=5000):
+        '''
+        This function trains a pixel classifier on the 4 NAIP bands and NDVI,
+        and saves it to classifier_path. Training pixels are sampled from the
+        reprojected tiles of the physiographic regions in phyreg_ids that have
+        been classified by Feature Analyst, with the classes of their final
+        TIFF files. GT points of the analysis year, if any, are added with
+        their GT values.
+
+        Parameters
+        ----------
+            samples_per_tile : int
+                Number of pixels sampled from each classified tile
+
+        Returns
+        -------
+            int
+                Number of training samples
+        '''
+        names = self.__get_region_names()
+        rng = np.random.default_rng(0)
+        xs = []
+        ys = []
+        tiles = set()
+        for phyreg_id in self.phyreg_ids:
+            name = names[phyreg_id]
+            inputs_path, outdir_path = self.__get_tile_paths(name)
+            for filename in self.__get_region_tiles().get(phyreg_id, []):
+                rtiffile_path = '%s/r%s.tif' % (inputs_path, filename)
+                frtiffile_path = '%s/fr%s.tif' % (outdir_path, filename)
+                # tiles without AFE outputs may have been pre-screened
+                if rtiffile_path in tiles or not (
+                        os.path.exists(rtiffile_path) and
+                        os.path.exists(frtiffile_path) and
+                        self.__get_afe_output_paths(outdir_path, filename)):
+                    continue
+                tiles.add(rtiffile_path)
+                x, y = self.__sample_tile(rtiffile_path, frtiffile_path,
+                                          samples_per_tile, rng)
+                xs.append(x)
+                ys.append(y)
+            x, y = self.__sample_gtpoints(name)
+            xs.append(x)
+            ys.append(y)
+        x = np.concatenate(xs) if xs else np.empty((0,
+                                                    len(classifier.FEATURES)))
+        y = np.concatenate(ys) if ys else np.empty(0)
+        if len(y) == 0:
+            raise ValueError('No training samples')
+        print('Training with %d samples from %d tiles' % (len(y), len(tiles)))
+        model = classifier.PixelClassifier().fit(x, y)
+        if not os.path.exists(os.path.dirname(self.classifier_path)):
+            os.makedirs(os.path.dirname(self.classifier_path))
+        model.save(self.classifier_path)
+        return len(y)
+
+    def __sample_tile(self, rtiffile_path, frtiffile_path, count, rng):
+        # Samples the features and classes of valid pixels from a random block
+        # of a classified tile
+        ras = arcpy.Raster(frtiffile_path)
+        fr_extent = (ras.extent.XMin, ras.extent.YMin, ras.extent.XMax,
+                     ras.extent.YMax)
+        ras = arcpy.Raster(rtiffile_path)
+        extent = (ras.extent.XMin, ras.extent.YMin, ras.extent.XMax,
+                  ras.extent.YMax)
+        cellsize = (ras.meanCellWidth, ras.meanCellHeight)
+        windows = grid.overlap_windows(extent, fr_extent, cellsize)
+        if windows is None or ras.bandCount < 4:
+            return np.empty((0, len(classifier.FEATURES))), np.empty(0)
+        (r0, r1, c0, c1), fr_window = windows
+        rows = min(self.block_size, r1 - r0)
+        cols = min(self.block_size, c1 - c0)
+        dr = int(rng.integers(0, r1 - r0 - rows + 1))
+        dc = int(rng.integers(0, c1 - c0 - cols + 1))
+        arr = _read_window(rtiffile_path, (r0 + dr, r0 + dr + rows,
+                                           c0 + dc, c0 + dc + cols), 0)
+        classes = _read_window(frtiffile_path, (fr_window[0] + dr,
+                               fr_window[0] + dr + rows, fr_window[2] + dc,
+                               fr_window[2] + dc + cols)).ravel()
+        x, valid = classifier.features(arr)
+        idx = np.nonzero(valid & (classes < 2))[0]
+        idx = rng.choice(idx, min(count, len(idx)), replace=False)
+        return x[idx], classes[idx]
+
+    def __sample_gtpoints(self, name):
+        # Samples the features and GT values of the GT points of a region
+        outdir_path = '%s/%s/Outputs' % (self.results_path, name)
+        shp_path = '%s/gtpoints_%d_%s.shp' % (outdir_path, self.analysis_year,
+                                              name)
+        empty = np.empty((0, len(classifier.FEATURES))), np.empty(0)
+        if not os.path.exists(shp_path):
+            return empty
+        fields = [x.name for x in arcpy.ListFields(shp_path)]
+        gt_field = 'GT_%d' % self.analysis_year
+        if gt_field not in fields:
+            gt_field = 'GT'
+            if gt_field not in fields:
+                return empty
+        inputs_path = self.__get_tile_paths(name)[0]
+        point_tiles = self.__get_point_tiles(shp_path)
+        xs = []
+        ys = []
+        with arcpy.da.SearchCursor(shp_path, ['OID@', 'SHAPE@XY',
+                                              gt_field]) as cur:
+            for oid, xy, gt in cur:
+                rtiffile_path = '%s/r%s.tif' % (inputs_path, point_tiles[oid])
+                if gt not in (0, 1) or point_tiles[oid] is None or \
+                        not os.path.exists(rtiffile_path):
+                    continue
+                ras = arcpy.Raster(rtiffile_path)
+                if ras.bandCount < 4:
+                    continue
+                r, c = self.__calculate_row_column(xy, ras.extent,
+                        (ras.meanCellWidth, ras.meanCellHeight))
+                x, valid = classifier.features(_read_window(rtiffile_path,
+                                               (r, r + 1, c, c + 1), 0))
+                if valid[0]:
+                    xs.append(x[0])
+                    ys.append(gt)
+        if not xs:
+            return empty
+        return np.array(xs), np.array(ys)
+
+    @__timed
+    def classify_naip_tiles(self):
+        '''
+        This function classifies reprojected tiles with the pixel classifier.
+        See iter_classify_naip_tiles().
+
+        Returns
+        -------
+            list
+                List of planner.Result by tile
+        '''
+        return self.__run_stage(self.iter_classify_naip_tiles())
+
+    def iter_classify_naip_tiles(self):
+        '''
+        This function classifies the reprojected tiles of the physiographic
+        regions in phyreg_ids with the pixel classifier in classifier_path as
+        a batch alternative to Feature Analyst. Tiles are classified block by
+        block in parallel, and final TIFF files with 0 for noncanopy, 1 for
+        canopy, and 3 for nodata are written next to AFE outputs, so
+        clip_final_tiles() can use them directly. Tiles that already have
+        final TIFF files or AFE outputs are skipped.
+
+        Yields
+        ------
+            planner.Result
+                Result of each tile
+        '''
+        stage = 'classify_naip_tiles'
+        if not os.path.exists(self.classifier_path):
+            raise IOError('No pixel classifier: %s' % self.classifier_path)
+
+        names = self.__get_region_names()
+        planned = set()
+        for phyreg_id in self.phyreg_ids:
+            name = names[phyreg_id]
+            inputs_path, outdir_path = self.__get_tile_paths(name)
+            if not os.path.exists(outdir_path):
+                os.makedirs(outdir_path)
+            tasks = []
+            for filename in self.__get_region_tiles().get(phyreg_id, []):
+                rtiffile_path = '%s/r%s.tif' % (inputs_path, filename)
+                frtiffile_path = '%s/fr%s.tif' % (outdir_path, filename)
+                if frtiffile_path in planned:
+                    continue
+                planned.add(frtiffile_path)
+                if not os.path.exists(rtiffile_path):
+                    yield planner.Result(stage, name, phyreg_id, filename,
+                                         frtiffile_path, 'skipped',
+                                         reason='not reprojected')
+                elif os.path.exists(frtiffile_path) or \
+                        self.__get_afe_output_paths(outdir_path, filename):
+                    yield planner.Result(stage, name, phyreg_id, filename,
+                                         frtiffile_path, 'skipped',
+                                         reason='exists')
+                else:
+                    tasks.append((rtiffile_path, frtiffile_path,
+                                  self.classifier_path, self.block_size,
+                                  self.spatref_wkid,
+                                  self.output_profiles['intermediate']))
+            sizes = [os.path.getsize(x[0]) for x in tasks]
+            memory = [blocks.working_set((self.block_size, self.block_size),
+                      bytes_per_cell=_BYTES_PER_CELL['classify'])] * len(tasks)
+            order = sorted(range(len(tasks)), key=lambda i: -sizes[i])
+            for i, (classified, seconds) in zip(order, blocks.map_parallel(
+                    _timed_task, [(_classify_tile, x) for x in tasks],
+                    self.processes, sizes, memory, self.memory_budget)):
+                self.timings.record(stage, sizes[i], seconds)
+                frtiffile_path = tasks[i][1]
+                yield planner.Result(stage, name, phyreg_id,
+                        os.path.basename(frtiffile_path)[2:-4],
+                        frtiffile_path, 'done' if classified else 'skipped',
+                        seconds, None if classified else 'not 4 bands')
+            self.timings.save()
 
     @__timed
     def clip_final_tiles(self):
         '''
-        This function clips final TIFF files.
+        This function clips final TIFF files. See iter_clip_final_tiles().
+
+        Returns
+        -------
+            list
+                List of planner.Result by tile
+        '''
+        return self.__run_stage(self.iter_clip_final_tiles())
+
+    def iter_clip_final_tiles(self):
+        '''
+        This function clips final TIFF files. Each tile is clipped by slicing
+        the pixel window of its QQ footprint on the snap grid. Tiles whose
+        footprints are not simple convex polygons are clipped using
+        ExtractByMask instead.
+
+        Yields
+        ------
+            planner.Result
+                Result of each tile, and of each region without outputs
         '''
+        stage = 'clip_final_tiles'
         phyregs_layer = self.phyregs_layer
         naipqq_layer = self.naipqq_layer
         naipqq_phyregs_field = self.naipqq_phyregs_field
+        spatref_wkid = self.spatref_wkid
         results_path = self.results_path
         snaprast_path = self.snaprast_path
 
+        spatref = arcpy.SpatialReference(spatref_wkid)
+
         # Get inmutiable ID's, does not need to be encoded.
         naipqq_oid_field = arcpy.Describe(naipqq_layer).OIDFieldName
 
@@ -580,58 +1446,228 @@ class Canopy:
         arcpy.SelectLayerByAttribute_management(phyregs_layer,
                 where_clause='PHYSIO_ID in (%s)' % ','.join(map(str,
                                                         self.phyreg_ids)))
-        with arcpy.da.SearchCursor(phyregs_layer, ['NAME', 'PHYSIO_ID']) as cur:
-            for row in cur:
-                name = row[0]
-                print(name)
+        try:
+            with arcpy.da.SearchCursor(phyregs_layer,
+                                       ['NAME', 'PHYSIO_ID']) as cur:
+                rows = list(cur)
+            for row in rows:
                 # CreateRandomPoints cannot create a shapefile with - in its
                 # filename
-                name = name.replace(' ', '_').replace('-', '_')
+                name = row[0].replace(' ', '_').replace('-', '_')
                 phyreg_id = row[1]
-                outdir_path = '%s/%s/Outputs' % (results_path, name)
+                outdir_path = self.__get_tile_paths(name)[1]
                 if len(os.listdir(outdir_path)) == 0:
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         outdir_path, 'skipped',
+                                         reason='no outputs')
                     continue
                 arcpy.SelectLayerByAttribute_management(naipqq_layer,
                         where_clause="%s like '%%,%d,%%'" % (
                             naipqq_phyregs_field, phyreg_id))
+                # read footprints in the output spatial reference
                 with arcpy.da.SearchCursor(naipqq_layer,
-                        [naipqq_oid_field, 'FileName']) as cur2:
-                    for row2 in sorted(cur2):
-                        oid = row2[0]
-                        filename = row2[1][:-13]
-                        frtiffile_path = '%s/fr%s.tif' % (
-                            outdir_path, filename)
-                        cfrtiffile_path = '%s/cfr%s.tif' % (
-                            outdir_path, filename)
-                        if os.path.exists(cfrtiffile_path):
-                            continue
-                        if os.path.exists(frtiffile_path):
-                            arcpy.SelectLayerByAttribute_management(
-                                    naipqq_layer,
-                                    where_clause='%s=%d' % (
-                                        naipqq_oid_field, oid))
-                            out_raster = arcpy.sa.ExtractByMask(
-                                frtiffile_path, naipqq_layer)
-                            out_raster.save(cfrtiffile_path)
-        # clear selection
-        arcpy.SelectLayerByAttribute_management(phyregs_layer,
-                                                'CLEAR_SELECTION')
-        arcpy.SelectLayerByAttribute_management(naipqq_layer,
-                                                'CLEAR_SELECTION')
+                        [naipqq_oid_field, 'FileName', 'SHAPE@'],
+                        spatial_reference=spatref) as cur:
+                    tiles = sorted(cur, key=lambda x: x[1])
+                for oid, filename, footprint in tiles:
+                    filename = filename[:-13]
+                    cfrtiffile_path = '%s/cfr%s.tif' % (outdir_path, filename)
+                    start_time = time.time()
+                    if os.path.exists(cfrtiffile_path):
+                        status, reason = 'skipped', 'exists'
+                    elif self.__clip_final_tile(outdir_path, filename, oid,
+                                                footprint):
+                        status, reason = 'done', None
+                    else:
+                        status, reason = 'skipped', 'no final tile'
+                    yield planner.Result(stage, name, phyreg_id, filename,
+                                         cfrtiffile_path, status,
+                                         time.time() - start_time, reason)
+                self.timings.save()
+        finally:
+            # clear selection
+            arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                    'CLEAR_SELECTION')
+            arcpy.SelectLayerByAttribute_management(naipqq_layer,
+                                                    'CLEAR_SELECTION')
+
+    def __clip_final_tile(self, outdir_path, filename, oid, footprint):
+        # Clips the final TIFF file of a tile, if any, to its QQ footprint and
+        # returns True if the clipped final TIFF file exists.
+        naipqq_layer = self.naipqq_layer
+        frtiffile_path = '%s/fr%s.tif' % (outdir_path, filename)
+        cfrtiffile_path = '%s/cfr%s.tif' % (outdir_path, filename)
+        if os.path.exists(cfrtiffile_path):
+            return True
+        if not os.path.exists(frtiffile_path):
+            return False
+        profiles.set_profile(self.output_profiles['intermediate'])
+        start_time = time.time()
+        if not self.__clip_tile_by_footprint(frtiffile_path, cfrtiffile_path,
+                                             footprint):
+            # fall back to polygon masking
+            naipqq_oid_field = arcpy.Describe(naipqq_layer).OIDFieldName
+            arcpy.SelectLayerByAttribute_management(naipqq_layer,
+                    where_clause='%s=%d' % (naipqq_oid_field, oid))
+            out_raster = arcpy.sa.ExtractByMask(frtiffile_path, naipqq_layer)
+            out_raster.save(cfrtiffile_path)
+        self.timings.record('clip_final_tiles',
+                            os.path.getsize(frtiffile_path),
+                            time.time() - start_time)
+        return True
+
+    def __clip_tile_by_footprint(self, frtiffile_path, cfrtiffile_path,
+                                 footprint):
+        '''
+        This function clips a final tile to its QQ footprint without
+        geoprocessing. The footprint window is computed on the snap grid of the
+        tile, sliced out of the tile array, and cells outside the footprint are
+        set to nodata.
 
-        print('Completed')
+        Parameters
+        ----------
+            frtiffile_path : str
+                Path to the final tile
+            cfrtiffile_path : str
+                Path to the clipped final tile to write
+            footprint : arcpy.Polygon
+                QQ footprint in the spatial reference of the final tile
+
+        Returns
+        -------
+            bool
+                False if the footprint is not a simple convex polygon and the
+                tile was not clipped
+        '''
+        if footprint is None or footprint.partCount != 1:
+            return False
+        ring = [(p.X, p.Y) if p else None for p in footprint.getPart(0)]
+        # interior rings are separated by None
+        if None in ring or not grid.is_convex(ring):
+            return False
+
+        ras = arcpy.Raster(frtiffile_path)
+        ext = ras.extent
+        extent = (ext.XMin, ext.YMin, ext.XMax, ext.YMax)
+        cellsize = (ras.meanCellWidth, ras.meanCellHeight)
+        window = grid.cell_window(extent, cellsize, (ras.height, ras.width),
+                                  grid.ring_bbox(ring))
+        r0, r1, c0, c1 = window
+        if r0 == r1 or c0 == c1:
+            return False
+
+        lower_left = (ext.XMin + c0 * cellsize[0], ext.YMax - r1 * cellsize[1])
+        arr = arcpy.RasterToNumPyArray(ras, arcpy.Point(*lower_left),
+                                       c1 - c0, r1 - r0, nodata_to_value=3)
+        mask = grid.convex_footprint_mask(extent, cellsize, window, ring)
+        arr[~mask] = 3
+        _save_array(arr, cfrtiffile_path, lower_left, cellsize,
+                    self.spatref_wkid)
+        return True
+
+    @__timed
+    def scan_clipped_final_tiles(self):
+        '''
+        This function scans clipped final TIFF files for anomalies and writes
+        a ranked report for each region. See iter_scan_clipped_final_tiles().
+
+        Returns
+        -------
+            list
+                List of planner.Result by region
+        '''
+        return self.__run_stage(self.iter_scan_clipped_final_tiles())
+
+    def iter_scan_clipped_final_tiles(self):
+        '''
+        This function scans the clipped final TIFF files of physiographic
+        regions for anomalies, so that bad tiles can be reclassified before
+        mosaic_clipped_final_tiles() is run. Tiles are read block by block in
+        parallel to count canopy, noncanopy, and nodata cells by row and
+        column. Tiles are flagged as all canopy or all noncanopy from their
+        canopy fractions, as mostly nodata against the areas of their QQ
+        footprints, as striped from their row and column banding scores, and
+        as outliers against the median of their neighboring tiles and the
+        distribution of the region, using the thresholds in qa.THRESHOLDS.
+        Tiles are ranked by their anomaly scores in qa_tiles.csv in the region
+        folder, and the top flagged tiles are printed.
+
+        Yields
+        ------
+            planner.Result
+                Result of each region with the number of flagged tiles as the
+                value
+        '''
+        stage = 'scan_clipped_final_tiles'
+
+        names = self.__get_region_names()
+        region_tiles = self.__get_region_tiles()
+        tile_areas = self.__get_tile_areas()
+        cellsize = self.__get_snap_grid()[1]
+        for phyreg_id in self.phyreg_ids:
+            name = names[phyreg_id]
+            tiledir_path = self.__get_tile_paths(name)[1]
+            report_path = '%s/%s/qa_tiles.csv' % (self.results_path, name)
+            tiles = [x for x in region_tiles.get(phyreg_id, []) if
+                     os.path.exists('%s/cfr%s.tif' % (tiledir_path, x))]
+            if not tiles:
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     report_path, 'skipped',
+                                     reason='no clipped final tiles')
+                continue
+            start_time = time.time()
+            tasks = [('%s/cfr%s.tif' % (tiledir_path, x), self.block_size)
+                     for x in tiles]
+            # tiles are scanned block by block
+            memory = [blocks.working_set(
+                (self.block_size, self.block_size),
+                bytes_per_cell=_BYTES_PER_CELL['scan_tile'])] * len(tasks)
+            extents = []
+            summaries = []
+            for tile, (extent, stats) in zip(tiles, blocks.map_parallel(
+                    _scan_tile, tasks, self.processes, memory=memory,
+                    memory_budget=self.memory_budget)):
+                extents.append(extent)
+                area = tile_areas.get(tile)
+                summaries.append(qa.summarize(stats, area / (
+                    cellsize[0] * cellsize[1]) if area else None))
+            rows = qa.scan(tiles, summaries,
+                           qa.find_neighbors(extents, max(cellsize)))
+            qa.write_report(report_path, rows)
+            flagged = [x for x in rows if x['flags']]
+            for row in flagged[:10]:
+                print('%s: %s (%.1f)' % (row['tile'], row['flags'],
+                                         row['score']))
+            yield planner.Result(stage, name, phyreg_id, name, report_path,
+                                 'done', time.time() - start_time,
+                                 value=len(flagged))
 
     @__timed
     def mosaic_clipped_final_tiles(self):
+        '''
+        This function mosaics clipped final TIFF files and clips mosaicked files
+        to physiographic regions. See iter_mosaic_clipped_final_tiles().
+
+        Returns
+        -------
+            list
+                List of planner.Result by region
+        '''
+        return self.__run_stage(self.iter_mosaic_clipped_final_tiles())
+
+    def iter_mosaic_clipped_final_tiles(self):
         '''
         This function mosaics clipped final TIFF files and clips mosaicked files
         to physiographic regions.
+
+        Yields
+        ------
+            planner.Result
+                Result of each region
         '''
+        stage = 'mosaic_clipped_final_tiles'
         phyregs_layer = self.phyregs_layer
         naipqq_layer = self.naipqq_layer
-        naipqq_phyregs_field = self.naipqq_phyregs_field
-        analysis_year = self.analysis_year
-        results_path = self.results_path
         snaprast_path = self.snaprast_path
 
         arcpy.env.addOutputsToMap = False
@@ -640,58 +1676,548 @@ class Canopy:
         arcpy.SelectLayerByAttribute_management(phyregs_layer,
                 where_clause='PHYSIO_ID in (%s)' % ','.join(map(str,
                                                         self.phyreg_ids)))
-        with arcpy.da.SearchCursor(phyregs_layer, ['NAME', 'PHYSIO_ID']) as cur:
-            for row in cur:
-                name = row[0]
-                print(name)
+        try:
+            with arcpy.da.SearchCursor(phyregs_layer,
+                                       ['NAME', 'PHYSIO_ID']) as cur:
+                rows = list(cur)
+            for row in rows:
                 # CreateRandomPoints cannot create a shapefile with - in its
                 # filename
-                name = name.replace(' ', '_').replace('-', '_')
+                name = row[0].replace(' ', '_').replace('-', '_')
                 phyreg_id = row[1]
-                outdir_path = '%s/%s/Outputs' % (results_path, name)
-                if len(os.listdir(outdir_path)) == 0:
-                    continue
-                canopytif_path = '%s/canopy_%d_%s.tif' % (outdir_path,
-                    analysis_year, name)
+                canopytif_path = '%s/%s/Outputs/canopy_%d_%s.tif' % (
+                        self.results_path, name, self.analysis_year, name)
+                start_time = time.time()
                 if os.path.exists(canopytif_path):
+                    status, reason = 'skipped', 'exists'
+                elif self.__mosaic_region(name, phyreg_id):
+                    status, reason = 'done', None
+                else:
+                    status, reason = 'skipped', 'no clipped cells'
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     canopytif_path, status,
+                                     time.time() - start_time, reason)
+        finally:
+            # clear selection
+            arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                    'CLEAR_SELECTION')
+            arcpy.SelectLayerByAttribute_management(naipqq_layer,
+                                                    'CLEAR_SELECTION')
+
+    def __mosaic_region(self, name, phyreg_id):
+        '''
+        This function mosaics the clipped final TIFF files of a physiographic
+        region and clips the mosaicked file to the region.
+
+        Parameters
+        ----------
+            name : str
+                Physiographic region name with underscores
+            phyreg_id : int
+                Physiographic region ID
+
+        Returns
+        -------
+            bool
+                True if the canopy TIFF file exists; False if there are no
+                clipped final tiles or none of their cells are in the region
+        '''
+        naipqq_layer = self.naipqq_layer
+        naipqq_phyregs_field = self.naipqq_phyregs_field
+        analysis_year = self.analysis_year
+
+        outdir_path = '%s/%s/Outputs' % (self.results_path, name)
+        tiledir_path = self.__get_tile_paths(name)[1]
+        if len(os.listdir(tiledir_path)) == 0:
+            return False
+        canopytif_path = '%s/canopy_%d_%s.tif' % (outdir_path, analysis_year,
+                                                  name)
+        if os.path.exists(canopytif_path):
+            return True
+        mosaictif_filename = 'mosaic_%d_%s.tif' % (analysis_year, name)
+        mosaictif_path = '%s/%s' % (outdir_path, mosaictif_filename)
+        if not os.path.exists(mosaictif_path):
+            arcpy.SelectLayerByAttribute_management(naipqq_layer,
+                    where_clause="%s like '%%,%d,%%'" % (
+                        naipqq_phyregs_field, phyreg_id))
+            input_rasters = []
+            filenames = []
+            size = 0
+            with arcpy.da.SearchCursor(naipqq_layer, ['FileName']) as cur:
+                for row in sorted(cur):
+                    filename = row[0][:-13]
+                    cfrtiffile_path = '%s/cfr%s.tif' % (tiledir_path,
+                                                        filename)
+                    if os.path.exists(cfrtiffile_path):
+                        input_rasters.append("'%s'" % cfrtiffile_path)
+                        filenames.append(filename)
+                        size += os.path.getsize(cfrtiffile_path)
+            if not input_rasters:
+                return False
+            # the region is inverted as a whole unless the list of its
+            # inverted tiles is written for this mosaic
+            inverted_path = self.__get_inverted_tiles_path(name)
+            if os.path.exists(inverted_path):
+                os.remove(inverted_path)
+            if self.detect_inverted_tiles:
+                inverted = self.__correct_inverted_tiles(name, filenames)
+                with open(inverted_path, 'w') as f:
+                    f.writelines('%s\n' % x for x in inverted)
+            start_time = time.time()
+            profiles.set_profile(self.output_profiles['intermediate'])
+            arcpy.MosaicToNewRaster_management(';'.join(input_rasters),
+                    outdir_path, mosaictif_filename, pixel_type='2_BIT',
+                    number_of_bands=1)
+        else:
+            size = os.path.getsize(mosaictif_path)
+            start_time = time.time()
+        if not self.__mask_raster(mosaictif_path, canopytif_path,
+                                  self.__get_region_mask(phyreg_id)):
+            print('%s has no cells in the region' % mosaictif_filename)
+            return False
+        self.timings.record('mosaic_clipped_final_tiles', size,
+                            time.time() - start_time)
+        self.timings.save()
+        return True
+
+    def __mask_raster(self, raster_path, out_path, mask):
+        '''
+        This function masks a canopy raster to a physiographic region block by
+        block. Blocks outside the region are skipped, and the masked blocks
+        are mosaicked into a new raster.
+
+        Parameters
+        ----------
+            raster_path : str
+                Path to the raster on the snap grid
+            out_path : str
+                Path to the masked raster
+            mask : masks.RegionMask
+                Region mask
+
+        Returns
+        -------
+            bool
+                True if the masked raster is written; False if no blocks are
+                inside the region
+        '''
+        # masked blocks are written to a temporary folder
+        out_dir, out_file = os.path.split(out_path)
+        tmp_path = '%s/tmp_%s' % (out_dir, os.path.splitext(out_file)[0])
+        if not os.path.exists(tmp_path):
+            os.mkdir(tmp_path)
+        ras = arcpy.Raster(raster_path)
+        xmin, ymax = ras.extent.XMin, ras.extent.YMax
+        w, h = ras.meanCellWidth, ras.meanCellHeight
+        # workers attach to the mask in shared memory instead of receiving
+        # copies of it
+        bits = mask.bits
+        if self.processes != 1:
+            bits = self.__get_shared_arrays().publish(('mask', mask.key),
+                                                      bits)
+        tasks = []
+        memory = []
+        for block, _ in blocks.iter_blocks((ras.height, ras.width),
+                                           self.block_size):
+            r0, r1, c0, c1 = block
+            extent = (xmin + c0 * w, ymax - r1 * h, xmin + c1 * w,
+                      ymax - r0 * h)
+            if grid.overlap_windows(extent, mask.extent, mask.cellsize) is \
+                    None:
+                continue
+            block_path = '%s/block_%d_%d.tif' % (tmp_path, r0, c0)
+            tasks.append((raster_path, block, block_path, self.spatref_wkid,
+                          (bits, mask.extent, mask.cellsize, mask.shape),
+                          extent, self.output_profiles['intermediate']))
+            memory.append(blocks.working_set((r1 - r0, c1 - c0),
+                          bytes_per_cell=_BYTES_PER_CELL['mask_region']))
+        del ras
+        block_paths = [x for x in blocks.map_parallel(_mask_block, tasks,
+                       self.processes, memory=memory,
+                       memory_budget=self.memory_budget) if x]
+
+        if block_paths:
+            profiles.set_profile(self.output_profiles['final'])
+            arcpy.MosaicToNewRaster_management(';'.join(block_paths), out_dir,
+                    out_file, pixel_type='2_BIT', number_of_bands=1)
+        shutil.rmtree(tmp_path)
+        return bool(block_paths)
+
+    def __get_shared_arrays(self):
+        # Returns the shared memory arrays for worker processes, which are
+        # managed by the session if any. Blocks left by a crashed run are
+        # removed when they are first needed.
+        if self.session:
+            return self.session.shared_arrays
+        if self.__shared_arrays is None:
+            self.__shared_arrays = sharedmem.SharedArrays(
+                    '%s/shared_memory.txt' % self.results_path)
+        return self.__shared_arrays
+
+    def __get_region_mask(self, phyreg_id):
+        # Returns the mask of a physiographic region on the snap grid, which is
+        # cached on disk and shared by the analysis years of a session.
+        if self.session:
+            cache = self.session.get_mask_cache(self.mask_path)
+        else:
+            if self.__mask_cache is None or \
+                    self.__mask_cache.path != self.mask_path:
+                self.__mask_cache = masks.MaskCache(self.mask_path)
+            cache = self.__mask_cache
+        origin, cellsize = self.__get_snap_grid()
+        return cache.get(_polygon_rings(
+            self.__get_region_geometries()[phyreg_id]), origin, cellsize)
+
+    @__timed
+    def patch_region_mosaics(self, filenames=None):
+        '''
+        This function updates the mosaicked and canopy TIFF files of
+        physiographic regions in place for changed tiles. See
+        iter_patch_region_mosaics().
+
+        Parameters
+        ----------
+            filenames : list
+                Tile filenames without the date and extension, e.g.,
+                m_3408301_ne_17_1; None for the tiles whose clipped final TIFF
+                files are newer than the mosaicked TIFF files
+
+        Returns
+        -------
+            list
+                List of planner.Result by region
+        '''
+        return self.__run_stage(self.iter_patch_region_mosaics(filenames))
+
+    def iter_patch_region_mosaics(self, filenames=None):
+        '''
+        This function updates the mosaicked and canopy TIFF files of
+        physiographic regions in place after a few tiles have been
+        reclassified, instead of rebuilding them from all tiles. Only the
+        snap-grid windows of changed tiles are mosaicked again from the
+        clipped final TIFF files that overlap them in the same order as
+        mosaic_clipped_final_tiles(), masked to the region, and written into
+        the existing rasters. Statistics are recalculated, and pyramids are
+        rebuilt if the rasters have them. Products derived from the canopy
+        TIFF files, e.g., filled_ and sieved_ canopy TIFF files and
+        shapefiles, are not updated and are reported as stale. Mosaicking in
+        place cannot write nodata over valid cells, so a region where any
+        valid cell would become nodata is mosaicked again from all tiles.
+
+        Parameters
+        ----------
+            filenames : list
+                Tile filenames without the date and extension, e.g.,
+                m_3408301_ne_17_1; None for the tiles whose clipped final TIFF
+                files are newer than the mosaicked TIFF files
+
+        Yields
+        ------
+            planner.Result
+                Result of each region with the number of patched tiles as the
+                value
+        '''
+        stage = 'patch_region_mosaics'
+        analysis_year = self.analysis_year
+
+        arcpy.env.addOutputsToMap = False
+        arcpy.env.snapRaster = self.snaprast_path
+
+        names = self.__get_region_names()
+        region_tiles = self.__get_region_tiles()
+        for phyreg_id in self.phyreg_ids:
+            name = names[phyreg_id]
+            outdir_path = '%s/%s/Outputs' % (self.results_path, name)
+            tiledir_path = self.__get_tile_paths(name)[1]
+            mosaictif_path = '%s/mosaic_%d_%s.tif' % (outdir_path,
+                                                      analysis_year, name)
+            canopytif_path = '%s/canopy_%d_%s.tif' % (outdir_path,
+                                                      analysis_year, name)
+            if not (os.path.exists(mosaictif_path) and
+                    os.path.exists(canopytif_path)):
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     canopytif_path, 'skipped',
+                                     reason='no mosaic')
+                continue
+
+            tiles = [x for x in region_tiles.get(phyreg_id, []) if
+                     os.path.exists('%s/cfr%s.tif' % (tiledir_path, x))]
+            if filenames is None:
+                mosaic_mtime = os.path.getmtime(mosaictif_path)
+                changed = [x for x in tiles if os.path.getmtime(
+                    '%s/cfr%s.tif' % (tiledir_path, x)) > mosaic_mtime]
+            else:
+                changed = [x for x in tiles if x in filenames]
+            if not changed:
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     canopytif_path, 'skipped',
+                                     reason='no changed tiles')
+                continue
+
+            start_time = time.time()
+            reason = None
+            if not self.__patch_region(outdir_path, tiledir_path, tiles,
+                                       changed, mosaictif_path,
+                                       canopytif_path,
+                                       self.__get_region_mask(phyreg_id)):
+                print('Mosaicking %s again for nodata cells' % name)
+                reason = 'mosaicked again'
+                arcpy.Delete_management(mosaictif_path)
+                arcpy.Delete_management(canopytif_path)
+                try:
+                    mosaicked = self.__mosaic_region(name, phyreg_id)
+                finally:
+                    arcpy.SelectLayerByAttribute_management(
+                            self.naipqq_layer, 'CLEAR_SELECTION')
+                if not mosaicked:
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         canopytif_path, 'skipped',
+                                         reason='no clipped cells')
                     continue
-                mosaictif_filename = 'mosaic_%d_%s.tif' % (analysis_year, name)
-                mosaictif_path = '%s/%s' % (outdir_path, mosaictif_filename)
-                if not os.path.exists(mosaictif_path):
-                    arcpy.SelectLayerByAttribute_management(naipqq_layer,
-                            where_clause="%s like '%%,%d,%%'" % (
-                                naipqq_phyregs_field, phyreg_id))
-                    input_rasters = ''
-                    with arcpy.da.SearchCursor(naipqq_layer,
-                                               ['FileName']) as cur2:
-                        for row2 in sorted(cur2):
-                            filename = row2[0][:-13]
-                            cfrtiffile_path = '%s/cfr%s.tif' % (outdir_path,
-                                    filename)
-                            if not os.path.exists(cfrtiffile_path):
-                                input_rasters += ''
-                            if input_rasters is not '':
-                                input_rasters += ';'
-                            if os.path.exists(cfrtiffile_path):
-                                input_rasters += "'%s'" % cfrtiffile_path
-                    if input_rasters == '':
-                        continue
-                    arcpy.MosaicToNewRaster_management(input_rasters,
-                        outdir_path, mosaictif_filename, pixel_type='2_BIT',
-                        number_of_bands=1)
-                arcpy.SelectLayerByAttribute_management(phyregs_layer,
-                        where_clause='PHYSIO_ID=%d' % phyreg_id)
-                canopytif_raster = arcpy.sa.ExtractByMask(mosaictif_path,
-                        phyregs_layer)
-                canopytif_raster.save(canopytif_path)
+            stale = [x for x in os.listdir(outdir_path) if
+                     x.endswith('canopy_%d_%s.tif' % (analysis_year, name))
+                     or x.endswith('canopy_%d_%s.shp' % (analysis_year,
+                                                          name))]
+            stale = [x for x in stale if x != os.path.basename(canopytif_path)]
+            if stale:
+                print('Stale products: %s' % ', '.join(sorted(stale)))
+            yield planner.Result(stage, name, phyreg_id, name, canopytif_path,
+                                 'done', time.time() - start_time, reason,
+                                 len(changed))
+
+    def __patch_region(self, outdir_path, tiledir_path, tiles, changed,
+                       mosaictif_path, canopytif_path, mask):
+        '''
+        This function mosaics the windows of changed tiles again and writes
+        them into the mosaicked and canopy TIFF files of a region. Nothing is
+        written if any valid cell of the rasters would become nodata because
+        Mosaic does not write nodata cells of its inputs.
 
-        # clear selection
-        arcpy.SelectLayerByAttribute_management(phyregs_layer,
-                                                'CLEAR_SELECTION')
-        arcpy.SelectLayerByAttribute_management(naipqq_layer,
-                                                'CLEAR_SELECTION')
+        Parameters
+        ----------
+            outdir_path : str
+                Outputs folder of the region
+            tiledir_path : str
+                Folder of the clipped final TIFF files
+            tiles : list
+                Tile filenames in the mosaicking order
+            changed : list
+                Changed tile filenames
+            mosaictif_path : str
+                Path to the mosaicked TIFF file
+            canopytif_path : str
+                Path to the canopy TIFF file
+            mask : masks.RegionMask
+                Region mask
 
-        print('Completed')
+        Returns
+        -------
+            bool
+                True if the rasters are patched; False if they need to be
+                mosaicked again from all tiles
+        '''
+        tif_paths = ['%s/cfr%s.tif' % (tiledir_path, x) for x in tiles]
+        extents = {}
+        for tile, tif_path in zip(tiles, tif_paths):
+            ras = arcpy.Raster(tif_path)
+            extents[tile] = (ras.extent.XMin, ras.extent.YMin,
+                             ras.extent.XMax, ras.extent.YMax)
+            cellsize = (ras.meanCellWidth, ras.meanCellHeight)
+
+        tmp_path = '%s/tmp_patch' % outdir_path
+        if not os.path.exists(tmp_path):
+            os.mkdir(tmp_path)
+        profiles.set_profile(self.output_profiles['intermediate'])
+        patch_paths = {mosaictif_path: [], canopytif_path: []}
+        for target_path in patch_paths:
+            ras = arcpy.Raster(target_path)
+            target_extent = (ras.extent.XMin, ras.extent.YMin,
+                             ras.extent.XMax, ras.extent.YMax)
+            del ras
+            for tile in changed:
+                windows = grid.overlap_windows(target_extent, extents[tile],
+                                               cellsize)
+                if windows is None:
+                    continue
+                r0, r1, c0, c1 = windows[0]
+                extent = (target_extent[0] + c0 * cellsize[0],
+                          target_extent[3] - r1 * cellsize[1],
+                          target_extent[0] + c1 * cellsize[0],
+                          target_extent[3] - r0 * cellsize[1])
+                arr = self.__compose_window(tif_paths, [extents[x] for x in
+                                            tiles], extent, cellsize)
+                if target_path == canopytif_path:
+                    mask.apply(arr, extent)
+                if ((_read_window(target_path, windows[0]) < 3) &
+                        (arr == 3)).any():
+                    shutil.rmtree(tmp_path)
+                    return False
+                patch_path = '%s/%s_%s.tif' % (tmp_path,
+                        os.path.basename(target_path)[:6], tile)
+                _save_array(arr, patch_path, (extent[0], extent[1]),
+                            cellsize, self.spatref_wkid)
+                patch_paths[target_path].append(patch_path)
+
+        for target_path, paths in patch_paths.items():
+            if not paths:
+                continue
+            arcpy.Mosaic_management(';'.join(paths), target_path, 'LAST')
+            arcpy.CalculateStatistics_management(target_path,
+                                                 skip_existing='OVERWRITE')
+            if (os.path.exists('%s.ovr' % target_path) or
+                    os.path.exists('%s.ovr' % os.path.splitext(
+                        target_path)[0])):
+                arcpy.BuildPyramids_management(target_path)
+        shutil.rmtree(tmp_path)
+        return True
+
+    def __compose_window(self, tif_paths, tif_extents, extent, cellsize):
+        # Mosaics the windows of tiles that overlap an extent on the snap grid
+        # with later tiles overwriting earlier ones as MosaicToNewRaster does
+        shape = (int(round((extent[3] - extent[1]) / cellsize[1])),
+                 int(round((extent[2] - extent[0]) / cellsize[0])))
+        arr = np.full(shape, 3, dtype=np.uint8)
+        for tif_path, tif_extent in zip(tif_paths, tif_extents):
+            windows = grid.overlap_windows(extent, tif_extent, cellsize)
+            if windows is None:
+                continue
+            r0, r1, c0, c1 = windows[0]
+            tile = _read_window(tif_path, windows[1])
+            valid = tile < 3
+            arr[r0:r1, c0:c1][valid] = tile[valid]
+        return arr
+
+    def __correct_inverted_tiles(self, name, filenames):
+        '''
+        This function detects final tiles whose canopy and noncanopy classes
+        were inverted by Feature Analyst and flips their clipped final TIFF
+        files. Each pair of overlapping final tiles is compared over its
+        overlap on the snap grid, and the mean NDVI of canopy and noncanopy
+        cells of each tile is computed from a sample of the reprojected tile.
+        Tiles are flipped only once and listed in inverted_tiles.txt in the
+        tile folder. Evidence is always read from the unclipped final tiles,
+        which are never flipped, so tiles whose final TIFF files have been
+        reclaimed are skipped and listed.
+
+        Parameters
+        ----------
+            name : str
+                Physiographic region name with underscores
+            filenames : list
+                Tile filenames without the date and extension whose clipped
+                final TIFF files exist
+
+        Returns
+        -------
+            list
+                Filenames of the tiles that have been flipped by this or an
+                earlier call
+        '''
+        inputs_path, tiledir_path = self.__get_tile_paths(name)
+        manifest_path = '%s/inverted_tiles.txt' % tiledir_path
+        flipped = set()
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                flipped = set(x.strip() for x in f if x.strip())
+        all_filenames = filenames
+
+        missing = [x for x in filenames if not os.path.exists(
+            '%s/fr%s.tif' % (tiledir_path, x))]
+        if missing:
+            print('Skipped %d tiles without final TIFF files: %s' % (
+                len(missing), ', '.join(missing)))
+            filenames = [x for x in filenames if x not in missing]
+        frtif_paths = ['%s/fr%s.tif' % (tiledir_path, x) for x in filenames]
+        extents = []
+        for frtiffile_path in frtif_paths:
+            ras = arcpy.Raster(frtiffile_path)
+            extents.append((ras.extent.XMin, ras.extent.YMin,
+                            ras.extent.XMax, ras.extent.YMax))
+            cellsize = (ras.meanCellWidth, ras.meanCellHeight)
+        if not extents:
+            return [x for x in all_filenames if x in flipped]
+
+        # pairs of tiles whose extents intersect
+        ext = np.array(extents)
+        first, second = np.nonzero((ext[:, None, 0] < ext[None, :, 2]) &
+                                   (ext[:, None, 2] > ext[None, :, 0]) &
+                                   (ext[:, None, 1] < ext[None, :, 3]) &
+                                   (ext[:, None, 3] > ext[None, :, 1]))
+        pairs = []
+        agreements = []
+        for i, j in zip(first[first < second], second[first < second]):
+            windows = grid.overlap_windows(extents[i], extents[j], cellsize)
+            if windows is None:
+                continue
+            agree, valid = inversion.agreement(
+                    _read_window(frtif_paths[i], windows[0]),
+                    _read_window(frtif_paths[j], windows[1]))
+            pairs.append((i, j))
+            agreements.append(agree / valid if valid >= 1000 else np.nan)
+
+        scores = []
+        # tiles without NDVI evidence are detected from agreement only
+        no_ndvi = []
+        for filename, frtiffile_path, extent in zip(filenames, frtif_paths,
+                                                    extents):
+            score = self.__score_tile_ndvi(frtiffile_path, extent,
+                    '%s/r%s.tif' % (inputs_path, filename), cellsize)
+            if score is None:
+                no_ndvi.append(filename)
+                score = 0.0
+            scores.append(score)
+        if no_ndvi:
+            print('Scored %d tiles without NDVI: %s' % (len(no_ndvi),
+                                                        ', '.join(no_ndvi)))
+
+        inverted = inversion.detect_inverted(scores, pairs, agreements)
+        flipped_now = [x for x, y in zip(filenames, inverted)
+                       if y and x not in flipped]
+        for filename in flipped_now:
+            cfrtiffile_path = '%s/cfr%s.tif' % (tiledir_path, filename)
+            ras = arcpy.Raster(cfrtiffile_path)
+            lower_left = (ras.extent.XMin, ras.extent.YMin)
+            arr = arcpy.RasterToNumPyArray(ras, nodata_to_value=3)
+            del ras
+            valid = arr < 2
+            arr[valid] = 1 - arr[valid]
+            arcpy.Delete_management(cfrtiffile_path)
+            _save_array(arr, cfrtiffile_path, lower_left, cellsize,
+                        self.spatref_wkid)
+            with open(manifest_path, 'a') as f:
+                f.write('%s\n' % filename)
+            print('Flipped inverted tile %s' % filename)
+        flipped.update(flipped_now)
+        return [x for x in all_filenames if x in flipped]
+
+    def __score_tile_ndvi(self, frtiffile_path, extent, rtiffile_path,
+                          cellsize, step=4):
+        # Returns inversion.contrast_score() of a final tile from every step-th
+        # row and column of the tile and its reprojected NAIP tile, or None if
+        # the reprojected tile is not available, e.g., after it was reclaimed.
+        if not os.path.exists(rtiffile_path):
+            return None
+        ras = arcpy.Raster(rtiffile_path)
+        if ras.bandCount < 4:
+            return None
+        windows = grid.overlap_windows(extent, (ras.extent.XMin,
+                ras.extent.YMin, ras.extent.XMax, ras.extent.YMax), cellsize)
+        if windows is None:
+            return None
+        fr_window, r_window = windows
+        sums = np.zeros(4)
+        for block, _ in blocks.iter_blocks((fr_window[1] - fr_window[0],
+                                            fr_window[3] - fr_window[2]),
+                                           self.block_size):
+            arr = _read_window(frtiffile_path, (fr_window[0] + block[0],
+                    fr_window[0] + block[1], fr_window[2] + block[2],
+                    fr_window[2] + block[3]))[::step, ::step]
+            naip = _read_window(rtiffile_path, (r_window[0] + block[0],
+                    r_window[0] + block[1], r_window[2] + block[2],
+                    r_window[2] + block[3]), 0)[:, ::step, ::step]
+            values, valid = ndvi.ndvi(naip[ndvi.RED], naip[ndvi.NIR])
+            sums += inversion.ndvi_contrast(arr, values, valid)
+        return inversion.contrast_score(sums)
 
     @__timed
     def convert_afe_to_canopy_tif(self):
@@ -707,70 +2233,519 @@ class Canopy:
         self.mosaic_clipped_final_tiles()
 
     @__timed
-    def correct_inverted_canopy_tif(self, inverted_phyreg_ids):
+    def watch_afe_outputs(self, interval=10, stable_time=30):
         '''
-        This function corrects the values of mosaikced and clipped regions that
-        have been inverted with values canopy 0 and noncanopy 1, and changes
-        them to canopy 1 and noncanopy 0.
+        This function watches the folders of AFE outputs while Feature Analyst
+        is classifying tiles. Each AFE output is converted to the final TIFF
+        file and clipped as soon as it has not been modified for stable_time
+        seconds, and each physiographic region is mosaicked as soon as all of
+        its tiles are clipped. Folders are watched using inotify where
+        available and polled otherwise. This function returns when all regions
+        are mosaicked or it is interrupted.
 
         Parameters
         ----------
-            inverted_phyreg_ids : list
-                list of physiographic region IDs to process
+            interval : float
+                Seconds between checks for changes
+            stable_time : float
+                Seconds for which an AFE output must remain unmodified before
+                it is processed
         '''
         phyregs_layer = self.phyregs_layer
-        analysis_year = self.analysis_year
-        results_path = self.results_path
-        snaprast_path = self.snaprast_path
+        naipqq_layer = self.naipqq_layer
+        naipqq_phyregs_field = self.naipqq_phyregs_field
+        spatref_wkid = self.spatref_wkid
+        snaprast_path = self.snaprast_path
+
+        spatref = arcpy.SpatialReference(spatref_wkid)
+        naipqq_oid_field = arcpy.Describe(naipqq_layer).OIDFieldName
 
         arcpy.env.addOutputsToMap = False
         arcpy.env.snapRaster = snaprast_path
 
+        # tiles by (outdir_path, filename) and their regions
+        tiles = {}
+        regions = {}
         arcpy.SelectLayerByAttribute_management(phyregs_layer,
-                where_clause='PHYSIO_ID in (%s)' % ','.join(
-                    map(str, inverted_phyreg_ids)))
+                where_clause='PHYSIO_ID in (%s)' % ','.join(map(str,
+                                                        self.phyreg_ids)))
         with arcpy.da.SearchCursor(phyregs_layer, ['NAME', 'PHYSIO_ID']) as cur:
             for row in cur:
-                name = row[0]
-                print(name)
-                name = name.replace(' ', '_').replace('-', '_')
+                name = row[0].replace(' ', '_').replace('-', '_')
                 phyreg_id = row[1]
-                outdir_path = '%s/%s/Outputs' % (results_path, name)
+                outdir_path = self.__get_tile_paths(name)[1]
                 if not os.path.exists(outdir_path):
                     continue
+                arcpy.SelectLayerByAttribute_management(naipqq_layer,
+                        where_clause="%s like '%%,%d,%%'" % (
+                            naipqq_phyregs_field, phyreg_id))
+                region_tiles = set()
+                with arcpy.da.SearchCursor(naipqq_layer,
+                        [naipqq_oid_field, 'FileName', 'SHAPE@'],
+                        spatial_reference=spatref) as cur2:
+                    for oid, filename, footprint in cur2:
+                        key = (outdir_path, filename[:-13])
+                        tiles[key] = (oid, footprint)
+                        region_tiles.add(key)
+                regions[name] = (phyreg_id, region_tiles)
+
+        # AFE outputs are named r + tile filename
+        keys_by_stem = {(os.path.abspath(k[0]), 'r%s' % k[1]): k
+                        for k in tiles}
+        watcher = watch.FolderWatcher(set(k[0] for k in tiles), interval)
+        print('Watching %d tiles in %d regions%s' % (len(tiles), len(regions),
+              ' using inotify' if watcher.use_inotify else ''))
+
+        done = set()
+        # check all tiles first for existing outputs
+        waiting = set(tiles)
+        try:
+            while regions:
+                unstable = set()
+                for key in sorted(waiting):
+                    outdir_path, filename = key
+                    afe_paths = self.__get_afe_output_paths(outdir_path,
+                                                            filename)
+                    if afe_paths and not watch.is_stable(afe_paths,
+                                                         stable_time):
+                        unstable.add(key)
+                        continue
+                    oid, footprint = tiles[key]
+                    if (self.__convert_afe_tile(outdir_path, filename) and
+                        self.__clip_final_tile(outdir_path, filename, oid,
+                                               footprint)):
+                        print(filename)
+                        done.add(key)
+
+                for name in sorted(regions):
+                    phyreg_id, region_tiles = regions[name]
+                    if region_tiles <= done:
+                        print(name)
+                        self.__mosaic_region(name, phyreg_id)
+                        del regions[name]
+                if not regions:
+                    break
+
+                # wait for changes, but recheck unstable outputs in time
+                timeout = min(interval, stable_time) if unstable else interval
+                waiting = set(unstable)
+                for path in watcher.wait(timeout):
+                    stem = os.path.splitext(os.path.basename(path))[0]
+                    key = keys_by_stem.get((os.path.dirname(path), stem))
+                    if key is not None and key not in done:
+                        waiting.add(key)
+        except KeyboardInterrupt:
+            print('Interrupted')
+        finally:
+            watcher.close()
+
+        # clear selection
+        arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                'CLEAR_SELECTION')
+        arcpy.SelectLayerByAttribute_management(naipqq_layer,
+                                                'CLEAR_SELECTION')
+
+        print('Completed')
+
+    def __get_afe_output_paths(self, outdir_path, filename):
+        # Returns the files of the AFE output of a tile, if any
+        rshpfile_path = '%s/r%s.shp' % (outdir_path, filename)
+        rtiffile_path = '%s/r%s.tif' % (outdir_path, filename)
+        if os.path.exists(rshpfile_path):
+            return [rshpfile_path] + ['%s/r%s.%s' % (outdir_path, filename,
+                                                     ext)
+                                      for ext in ('shx', 'dbf')]
+        if os.path.exists(rtiffile_path):
+            return [rtiffile_path]
+        return []
+
+    @__timed
+    def fill_canopy_tif_gaps(self, max_gap_size=16):
+        '''
+        This function fills gaps in the canopy TIFF files. See
+        iter_fill_canopy_tif_gaps().
+
+        Parameters
+        ----------
+            max_gap_size : int
+                Maximum number of rows or columns of a gap to fill; larger
+                holes are left unfilled
+
+        Returns
+        -------
+            dict
+                Number of filled cells by physiographic region ID
+        '''
+        return {x.phyreg_id: x.value for x in self.__run_stage(
+                self.iter_fill_canopy_tif_gaps(max_gap_size))
+                if x.status == 'done'}
+
+    def iter_fill_canopy_tif_gaps(self, max_gap_size=16):
+        '''
+        This function fills gaps in the canopy TIFF files. Gaps are nodata
+        holes enclosed by canopy and noncanopy cells such as seams between
+        tiles, and they are filled with the majority value of their neighbors
+        from the edges inward until they are closed. The canopy TIFF files are
+        processed block by block in parallel, and the filled canopy TIFF files
+        are written with the filled_ prefix.
+
+        Parameters
+        ----------
+            max_gap_size : int
+                Maximum number of rows or columns of a gap to fill; larger
+                holes are left unfilled
+
+        Yields
+        ------
+            planner.Result
+                Result of each region with the number of filled cells as the
+                value
+        '''
+        stage = 'fill_canopy_tif_gaps'
+        phyregs_layer = self.phyregs_layer
+        analysis_year = self.analysis_year
+        results_path = self.results_path
+        snaprast_path = self.snaprast_path
+
+        arcpy.env.addOutputsToMap = False
+        arcpy.env.snapRaster = snaprast_path
+
+        arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                where_clause='PHYSIO_ID in (%s)' % ','.join(
+                    map(str, self.phyreg_ids)))
+        try:
+            with arcpy.da.SearchCursor(phyregs_layer,
+                                       ['NAME', 'PHYSIO_ID']) as cur:
+                rows = list(cur)
+            for row in rows:
+                name = row[0].replace(' ', '_').replace('-', '_')
+                phyreg_id = row[1]
+                outdir_path = '%s/%s/Outputs' % (results_path, name)
                 canopytif_path = '%s/canopy_%d_%s.tif' % (outdir_path,
                         analysis_year, name)
+                filled_path = '%s/filled_canopy_%d_%s.tif' % (outdir_path,
+                        analysis_year, name)
+                if not os.path.exists(canopytif_path):
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         filled_path, 'skipped',
+                                         reason='no canopy TIFF')
+                    continue
+                if os.path.exists(filled_path):
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         filled_path, 'skipped',
+                                         reason='exists')
+                    continue
+
+                start_time = time.time()
+                count = self.__filter_canopy_tif(canopytif_path, filled_path,
+                        filters.fill_gaps, (max_gap_size,), max_gap_size + 1)
+                seconds = time.time() - start_time
+                self.timings.record(stage, os.path.getsize(canopytif_path),
+                                    seconds)
+                self.timings.save()
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     filled_path, 'done', seconds,
+                                     value=count)
+        finally:
+            # clear selection
+            arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                    'CLEAR_SELECTION')
+
+    @__timed
+    def sieve_canopy_tif(self, min_area, connectivity=8):
+        '''
+        This function removes canopy and noncanopy patches smaller than a
+        minimum mapping unit from the canopy TIFF files. See
+        iter_sieve_canopy_tif().
+
+        Parameters
+        ----------
+            min_area : float
+                Minimum patch area in square map units, e.g., square meters
+            connectivity : int
+                4 or 8 neighbors for connecting cells into patches
+
+        Returns
+        -------
+            dict
+                Number of changed cells by physiographic region ID
+        '''
+        return {x.phyreg_id: x.value for x in self.__run_stage(
+                self.iter_sieve_canopy_tif(min_area, connectivity))
+                if x.status == 'done'}
+
+    def iter_sieve_canopy_tif(self, min_area, connectivity=8):
+        '''
+        This function removes canopy and noncanopy patches smaller than a
+        minimum mapping unit from the canopy TIFF files before they are
+        converted to shapefiles. Each small patch takes the most common value
+        of its neighbors, one class at a time, until no patch is small. The
+        canopy TIFF files are processed block by block in parallel with a halo
+        twice as wide as the largest small patch can be, so patches crossing
+        block edges are measured as a whole before and after the small
+        patches of the first class are merged. Filled canopy
+        TIFF files are used if they exist, and the sieved canopy TIFF files
+        are written with the sieved_ prefix.
+
+        Parameters
+        ----------
+            min_area : float
+                Minimum patch area in square map units, e.g., square meters
+            connectivity : int
+                4 or 8 neighbors for connecting cells into patches
+
+        Yields
+        ------
+            planner.Result
+                Result of each region with the number of changed cells as the
+                value
+        '''
+        stage = 'sieve_canopy_tif'
+        phyregs_layer = self.phyregs_layer
+        analysis_year = self.analysis_year
+        results_path = self.results_path
+        snaprast_path = self.snaprast_path
+
+        if connectivity not in (4, 8):
+            raise ValueError('Connectivity must be 4 or 8')
+
+        arcpy.env.addOutputsToMap = False
+        arcpy.env.snapRaster = snaprast_path
+
+        cellsize_x, cellsize_y = self.__get_cellsizes(snaprast_path)
+        min_size = int(np.ceil(min_area / (cellsize_x * cellsize_y)))
+
+        arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                where_clause='PHYSIO_ID in (%s)' % ','.join(
+                    map(str, self.phyreg_ids)))
+        try:
+            with arcpy.da.SearchCursor(phyregs_layer,
+                                       ['NAME', 'PHYSIO_ID']) as cur:
+                rows = list(cur)
+            for row in rows:
+                name = row[0].replace(' ', '_').replace('-', '_')
+                phyreg_id = row[1]
+                outdir_path = '%s/%s/Outputs' % (results_path, name)
+                canopytif_path = self.__get_canopy_tif_path(outdir_path, name,
+                                                            ('filled_',))
+                sieved_path = '%s/sieved_canopy_%d_%s.tif' % (outdir_path,
+                        analysis_year, name)
+                if not os.path.exists(canopytif_path):
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         sieved_path, 'skipped',
+                                         reason='no canopy TIFF')
+                    continue
+                if os.path.exists(sieved_path):
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         sieved_path, 'skipped',
+                                         reason='exists')
+                    continue
+
+                start_time = time.time()
+                count = self.__filter_canopy_tif(canopytif_path, sieved_path,
+                        filters.sieve, (min_size, connectivity), 2 * min_size)
+                seconds = time.time() - start_time
+                self.timings.record(stage, os.path.getsize(canopytif_path),
+                                    seconds)
+                self.timings.save()
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     sieved_path, 'done', seconds,
+                                     value=count)
+        finally:
+            # clear selection
+            arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                    'CLEAR_SELECTION')
+
+    def __filter_canopy_tif(self, canopytif_path, out_path, func, args, halo):
+        '''
+        This function applies a block filter from the filters module to a
+        canopy TIFF file. Blocks are read with a halo and filtered in parallel,
+        and only changed blocks are mosaicked into a copy of the canopy TIFF
+        file.
+
+        Parameters
+        ----------
+            canopytif_path : str
+                Path to the canopy TIFF file
+            out_path : str
+                Path to the filtered canopy TIFF file
+            func : function
+                Filter that takes an array and args, and returns the filtered
+                array and the number of changed cells
+            args : tuple
+                Additional arguments for func
+            halo : int
+                Number of cells to read around each block
+
+        Returns
+        -------
+            int
+                Number of changed cells
+        '''
+        # changed blocks are written to a temporary folder
+        out_dir, out_file = os.path.split(out_path)
+        tmp_path = '%s/tmp_%s' % (out_dir, os.path.splitext(out_file)[0])
+        if not os.path.exists(tmp_path):
+            os.mkdir(tmp_path)
+        ras = arcpy.Raster(canopytif_path)
+        tasks = []
+        memory = []
+        for block, window in blocks.iter_blocks((ras.height, ras.width),
+                                                self.block_size, halo):
+            block_path = '%s/block_%d_%d.tif' % (tmp_path, block[0], block[2])
+            tasks.append((canopytif_path, block, window, block_path,
+                          self.spatref_wkid, func, args,
+                          self.output_profiles['intermediate']))
+            memory.append(blocks.working_set(
+                (window[1] - window[0], window[3] - window[2]),
+                bytes_per_cell=_BYTES_PER_CELL[func.__name__]))
+        block_paths = []
+        count = 0
+        for block_path, block_count in blocks.map_parallel(_filter_block,
+                tasks, self.processes, memory=memory,
+                memory_budget=self.memory_budget):
+            if block_count > 0:
+                block_paths.append(block_path)
+                count += block_count
+
+        profiles.set_profile(self.output_profiles['final'])
+        arcpy.CopyRaster_management(canopytif_path, out_path,
+                                    nodata_value='3', pixel_type='2_BIT')
+        if block_paths:
+            arcpy.Mosaic_management(';'.join(block_paths), out_path, 'LAST')
+        shutil.rmtree(tmp_path)
+        return count
+
+    @__timed
+    def correct_inverted_canopy_tif(self, inverted_phyreg_ids):
+        '''
+        This function corrects the values of mosaikced and clipped regions that
+        have been inverted. See iter_correct_inverted_canopy_tif().
+
+        Parameters
+        ----------
+            inverted_phyreg_ids : list
+                list of physiographic region IDs to process
+
+        Returns
+        -------
+            list
+                List of planner.Result by region
+        '''
+        return self.__run_stage(self.iter_correct_inverted_canopy_tif(
+                inverted_phyreg_ids))
+
+    def iter_correct_inverted_canopy_tif(self, inverted_phyreg_ids):
+        '''
+        This function corrects the values of mosaikced and clipped regions that
+        have been inverted with values canopy 0 and noncanopy 1, and changes
+        them to canopy 1 and noncanopy 0. If gaps have been filled or small
+        patches have been sieved, the processed canopy TIFF is corrected.
+
+        Parameters
+        ----------
+            inverted_phyreg_ids : list
+                list of physiographic region IDs to process
+
+        Yields
+        ------
+            planner.Result
+                Result of each region
+        '''
+        stage = 'correct_inverted_canopy_tif'
+        phyregs_layer = self.phyregs_layer
+        analysis_year = self.analysis_year
+        results_path = self.results_path
+        snaprast_path = self.snaprast_path
+
+        arcpy.env.addOutputsToMap = False
+        arcpy.env.snapRaster = snaprast_path
+        profiles.set_profile(self.output_profiles['final'])
+
+        arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                where_clause='PHYSIO_ID in (%s)' % ','.join(
+                    map(str, inverted_phyreg_ids)))
+        try:
+            with arcpy.da.SearchCursor(phyregs_layer,
+                                       ['NAME', 'PHYSIO_ID']) as cur:
+                rows = list(cur)
+            for row in rows:
+                name = row[0].replace(' ', '_').replace('-', '_')
+                phyreg_id = row[1]
+                outdir_path = '%s/%s/Outputs' % (results_path, name)
+                canopytif_path = self.__get_canopy_tif_path(outdir_path, name)
                 # name of corrected regions just add corrected_ as prefix
                 corrected_path = '%s/corrected_canopy_%d_%s.tif' % (
                     outdir_path, analysis_year, name)
                 if not os.path.exists(canopytif_path):
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         corrected_path, 'skipped',
+                                         reason='no canopy TIFF')
                     continue
                 if os.path.exists(corrected_path):
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         corrected_path, 'skipped',
+                                         reason='exists')
                     continue
-                if not os.path.exists(corrected_path):
-                    # switch 1 and 0
-                    corrected = 1 - arcpy.Raster(canopytif_path)
-                    # copy raster is used as arcpy.save does not give bit
-                    # options.
-                    arcpy.CopyRaster_management(corrected, corrected_path,
-                                                nodata_value = '3',
-                                                pixel_type='2_BIT')
+                start_time = time.time()
+                # switch 1 and 0
+                corrected = 1 - arcpy.Raster(canopytif_path)
+                # copy raster is used as arcpy.save does not give bit
+                # options.
+                arcpy.CopyRaster_management(corrected, corrected_path,
+                                            nodata_value = '3',
+                                            pixel_type='2_BIT')
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     corrected_path, 'done',
+                                     time.time() - start_time)
+        finally:
+            # clear selection
+            arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                    'CLEAR_SELECTION')
 
-        # clear selection
-        arcpy.SelectLayerByAttribute_management(phyregs_layer,
-                                                'CLEAR_SELECTION')
+    @__timed
+    def convert_canopy_tif_to_shp(self, tolerances=None):
+        '''
+        This function converts the canopy TIFF files to shapefile. See
+        iter_convert_canopy_tif_to_shp().
 
-        print('Completed')
+        Parameters
+        ----------
+            tolerances : list
+                Simplification tolerances in meters of the levels of detail
+                to write to a GeoPackage, e.g., [1, 5, 30]; None for no
+                GeoPackage
 
-    @__timed
-    def convert_canopy_tif_to_shp(self):
+        Returns
+        -------
+            list
+                List of planner.Result by region
+        '''
+        return self.__run_stage(self.iter_convert_canopy_tif_to_shp(
+            tolerances))
+
+    def iter_convert_canopy_tif_to_shp(self, tolerances=None):
         '''
         This function converts the canopy TIFF files to shapefile. If a region
         has been corrected for inverted values the function will convert the
         corrected TIFF to shapefile instead of the original canopy TIFF. If no
         corrected TIFF exists for a region then the original canopy TIFF will be
-        converted.
+        converted. If tolerances are given, the polygons of the same
+        conversion are also written with simplified levels of detail to
+        gpkg_canopy_*.gpkg, which is also written for existing shapefiles.
+
+        Parameters
+        ----------
+            tolerances : list
+                Simplification tolerances in meters of the levels of detail,
+                e.g., [1, 5, 30]; None for no GeoPackage
+
+        Yields
+        ------
+            planner.Result
+                Result of each region
         '''
+        stage = 'convert_canopy_tif_to_shp'
         phyregs_layer = self.phyregs_layer
         analysis_year = self.analysis_year
         snaprast_path = self.snaprast_path
@@ -782,50 +2757,598 @@ class Canopy:
         arcpy.SelectLayerByAttribute_management(phyregs_layer,
                 where_clause='PHYSIO_ID in (%s)' % ','.join(
                     map(str, self.phyreg_ids)))
-        with arcpy.da.SearchCursor(phyregs_layer, ['NAME', 'PHYSIO_ID']) as cur:
-            for row in cur:
-                name = row[0]
-                print(name)
-                name = name.replace(' ', '_').replace('-', '_')
+        try:
+            with arcpy.da.SearchCursor(phyregs_layer,
+                                       ['NAME', 'PHYSIO_ID']) as cur:
+                rows = list(cur)
+            for row in rows:
+                name = row[0].replace(' ', '_').replace('-', '_')
                 phyreg_id = row[1]
                 outdir_path = '%s/%s/Outputs' % (results_path, name)
-                if not os.path.exists(outdir_path):
-                    continue
-                canopytif_path = '%s/canopy_%d_%s.tif' % (outdir_path,
-                                                          analysis_year, name)
+                canopytif_path = self.__get_canopy_tif_path(outdir_path, name)
                 corrected_path = '%s/corrected_canopy_%d_%s.tif' % (
                     outdir_path, analysis_year, name)
                 # Add shp_ as prefix to output shapefile
                 canopyshp_path = '%s/shp_canopy_%d_%s.shp' % (
                     outdir_path, analysis_year, name)
+                canopygpkg_path = '%s/gpkg_canopy_%d_%s.gpkg' % (
+                    outdir_path, analysis_year, name)
                 if os.path.exists(canopyshp_path):
+                    if tolerances and not os.path.exists(canopygpkg_path):
+                        start_time = time.time()
+                        self.__write_canopy_gpkg(canopyshp_path,
+                                                 canopygpkg_path, tolerances)
+                        yield planner.Result(stage, name, phyreg_id, name,
+                                             canopygpkg_path, 'done',
+                                             time.time() - start_time)
+                        continue
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         canopyshp_path, 'skipped',
+                                         reason='exists')
+                    continue
+                # Check for corrected inverted TIFF first. If no corrected
+                # inverted TIFF use orginial or processed canopy TIFF
+                if os.path.exists(corrected_path):
+                    canopytif_path = corrected_path
+                if not os.path.exists(canopytif_path):
+                    yield planner.Result(stage, name, phyreg_id, name,
+                                         canopyshp_path, 'skipped',
+                                         reason='no canopy TIFF')
                     continue
-                if not os.path.exists(canopyshp_path):
-                    # Check for corrected inverted TIFF first
-                    if os.path.exists(corrected_path):
-                        # Do not simplify polygons, keep cell extents
-                        arcpy.RasterToPolygon_conversion(corrected_path,
-                                canopyshp_path, 'NO_SIMPLIFY', 'Value')
-                    # If no corrected inverted TIFF use orginial canopy TIFF
-                    elif os.path.exists(canopytif_path):
-                        # Do not simplify polygons, keep cell extents
-                        arcpy.RasterToPolygon_conversion(canopytif_path,
-                                canopyshp_path, 'NO_SIMPLIFY', 'Value')
-                    # Add 'Canopy' field
-                    arcpy.AddField_management(canopyshp_path, 'Canopy', 'SHORT',
-                                              field_length='1')
-                    # Calculate 'Canopy' field
-                    arcpy.CalculateField_management(canopyshp_path, 'Canopy',
-                                                    '!gridcode!')
-                    # Remove Id and gridcode fields
-                    arcpy.DeleteField_management(canopyshp_path, ['Id',
-                                                                  'gridcode'])
+                start_time = time.time()
+                # Do not simplify polygons, keep cell extents
+                arcpy.RasterToPolygon_conversion(canopytif_path,
+                        canopyshp_path, 'NO_SIMPLIFY', 'Value')
+                # Add 'Canopy' field
+                arcpy.AddField_management(canopyshp_path, 'Canopy', 'SHORT',
+                                          field_length='1')
+                # Calculate 'Canopy' field
+                arcpy.CalculateField_management(canopyshp_path, 'Canopy',
+                                                '!gridcode!')
+                # Remove Id and gridcode fields
+                arcpy.DeleteField_management(canopyshp_path, ['Id',
+                                                              'gridcode'])
+                if tolerances:
+                    self.__write_canopy_gpkg(canopyshp_path, canopygpkg_path,
+                                             tolerances)
+                seconds = time.time() - start_time
+                self.timings.record(stage, os.path.getsize(canopytif_path),
+                                    seconds)
+                self.timings.save()
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     canopyshp_path, 'done', seconds)
+        finally:
+            # clear selection
+            arcpy.SelectLayerByAttribute_management(phyregs_layer,
+                                                    'CLEAR_SELECTION')
+
+    def __write_canopy_gpkg(self, canopyshp_path, gpkg_path, tolerances):
+        '''
+        This function writes canopy polygons and their simplified levels of
+        detail to layers of a GeoPackage, e.g., canopy_full, canopy_1m,
+        canopy_5m, and canopy_30m. Each level is simplified from canopy_full
+        with its own tolerance so that errors do not accumulate across levels.
+        SimplifySharedEdges simplifies edges shared by canopy and noncanopy
+        polygons once without gaps or overlaps. Layers are
+        spatially indexed, and the GeoPackage is written under a temporary
+        name until all levels are complete.
 
-        # clear selection
-        arcpy.SelectLayerByAttribute_management(phyregs_layer,
-                                                'CLEAR_SELECTION')
+        Parameters
+        ----------
+            canopyshp_path : str
+                Path to the canopy shapefile
+            gpkg_path : str
+                Path to the GeoPackage
+            tolerances : list
+                Simplification tolerances in meters of the levels of detail
+        '''
+        out_dir, out_file = os.path.split(gpkg_path)
+        tmp_path = '%s/tmp_%s' % (out_dir, out_file)
+        if os.path.exists(tmp_path):
+            arcpy.Delete_management(tmp_path)
+        arcpy.CreateSQLiteDatabase_management(tmp_path, 'GEOPACKAGE_1.3')
+        full_path = '%s/canopy_full' % tmp_path
+        arcpy.CopyFeatures_management(canopyshp_path, full_path)
+        arcpy.AddSpatialIndex_management(full_path)
+        for tolerance in sorted(tolerances):
+            layer_path = '%s/canopy_%sm' % (
+                tmp_path, ('%g' % tolerance).replace('.', '_'))
+            arcpy.CopyFeatures_management(full_path, layer_path)
+            arcpy.cartography.SimplifySharedEdges(layer_path, 'POINT_REMOVE',
+                                                  '%s Meters' % tolerance)
+            arcpy.AddSpatialIndex_management(layer_path)
+        # release the GeoPackage before it is renamed
+        arcpy.ClearWorkspaceCache_management()
+        os.replace(tmp_path, gpkg_path)
 
-        print('Completed')
+    @__timed
+    def aggregate_canopy_tif(self, factor=30, percent=True):
+        '''
+        This function aggregates the canopy TIFF files to canopy cover on a
+        coarse grid. See iter_aggregate_canopy_tif().
+
+        Parameters
+        ----------
+            factor : int
+                Number of canopy cells per coarse cell in each direction,
+                e.g., 30 for 30 m cells from 1 m canopy
+            percent : bool
+                True for percent cover, False for fractional cover
+
+        Returns
+        -------
+            list
+                List of planner.Result by region
+        '''
+        return self.__run_stage(self.iter_aggregate_canopy_tif(factor,
+                                                               percent))
+
+    def iter_aggregate_canopy_tif(self, factor=30, percent=True):
+        '''
+        This function aggregates the canopy TIFF files to canopy cover on a
+        coarse grid aligned to cover_origin. The canopy TIFF file of each
+        region is read in blocks aligned to the coarse grid, and the fraction
+        of valid cells that are canopy is computed for each coarse cell,
+        ignoring nodata cells. Corrected and processed canopy TIFF files are
+        used in the same order as convert_canopy_tif_to_shp(), and the counts
+        of regions that are inverted as a whole but not corrected are
+        inverted as in build_history_stack(). The cover raster is named by its
+        unit, e.g., cover_pct_30_2019_NAME.tif or cover_frac_30_2019_NAME.tif.
+        The canopy and valid cell counts, which do not depend on the unit, are
+        saved next to it in cover_30_2019_NAME.npz, so that
+        merge_canopy_cover() can merge coarse cells split by region borders.
+
+        Parameters
+        ----------
+            factor : int
+                Number of canopy cells per coarse cell in each direction,
+                e.g., 30 for 30 m cells from 1 m canopy
+            percent : bool
+                True for uint8 percent cover, False for float32 fractional
+                cover
+
+        Yields
+        ------
+            planner.Result
+                Result of each region
+        '''
+        stage = 'aggregate_canopy_tif'
+        analysis_year = self.analysis_year
+
+        names = self.__get_region_names()
+        origin = self.cover_origin or self.__get_snap_grid()[0]
+        for phyreg_id in self.phyreg_ids:
+            name = names[phyreg_id]
+            outdir_path = '%s/%s/Outputs' % (self.results_path, name)
+            canopytif_path = self.__get_canopy_tif_path(outdir_path, name)
+            corrected_path = '%s/corrected_canopy_%d_%s.tif' % (
+                outdir_path, analysis_year, name)
+            inverted = False
+            if os.path.exists(corrected_path):
+                canopytif_path = corrected_path
+            else:
+                inverted = self.__is_region_inverted(name, phyreg_id)
+            cover_path = '%s/cover_%s_%d_%d_%s.tif' % (
+                outdir_path, 'pct' if percent else 'frac', factor,
+                analysis_year, name)
+            counts_path = '%s/cover_%d_%d_%s.npz' % (outdir_path, factor,
+                                                     analysis_year, name)
+            if os.path.exists(cover_path) and os.path.exists(counts_path):
+                yield planner.Result(stage, name, phyreg_id, name, cover_path,
+                                     'skipped', reason='exists')
+                continue
+            if not os.path.exists(canopytif_path):
+                yield planner.Result(stage, name, phyreg_id, name, cover_path,
+                                     'skipped', reason='no canopy TIFF')
+                continue
+            start_time = time.time()
+            extent, canopy, valid = self.__aggregate_raster(canopytif_path,
+                                                            factor, origin)
+            if inverted:
+                canopy = valid - canopy
+            cover.save_counts(counts_path, extent, canopy, valid)
+            self.__save_cover(cover.cover(canopy, valid, percent), cover_path,
+                              extent, factor, percent)
+            yield planner.Result(stage, name, phyreg_id, name, cover_path,
+                                 'done', time.time() - start_time)
+
+    def __aggregate_raster(self, raster_path, factor, origin):
+        '''
+        This function counts the canopy and valid cells of a canopy raster in
+        each coarse cell. Blocks are multiples of the factor and aligned to
+        the coarse grid, and they are counted in parallel.
+
+        Parameters
+        ----------
+            raster_path : str
+                Path to the canopy raster
+            factor : int
+                Number of canopy cells per coarse cell in each direction
+            origin : tuple
+                (x, y) of any cell corner of the coarse grid
+
+        Returns
+        -------
+            extent, canopy, valid : tuple
+                (xmin, ymin, xmax, ymax) coarse extent and uint32 arrays of
+                canopy and valid cell counts
+        '''
+        ras = arcpy.Raster(raster_path)
+        extent = (ras.extent.XMin, ras.extent.YMin, ras.extent.XMax,
+                  ras.extent.YMax)
+        cellsize = (ras.meanCellWidth, ras.meanCellHeight)
+        del ras
+        coarse_extent, coarse_shape = cover.coarse_extent(extent, cellsize,
+                                                          factor, origin)
+        block_size = max(self.block_size // factor, 1) * factor
+        tasks = []
+        memory = []
+        for block, _ in blocks.iter_blocks((coarse_shape[0] * factor,
+                                            coarse_shape[1] * factor),
+                                           block_size):
+            r0, r1, c0, c1 = block
+            block_extent = (coarse_extent[0] + c0 * cellsize[0],
+                            coarse_extent[3] - r1 * cellsize[1],
+                            coarse_extent[0] + c1 * cellsize[0],
+                            coarse_extent[3] - r0 * cellsize[1])
+            windows = grid.overlap_windows(block_extent, extent, cellsize)
+            if windows is not None:
+                tasks.append((raster_path, block, windows, factor))
+                memory.append(blocks.working_set((r1 - r0, c1 - c0),
+                              bytes_per_cell=_BYTES_PER_CELL['aggregate']))
+        canopy = np.zeros(coarse_shape, dtype=np.uint32)
+        valid = np.zeros(coarse_shape, dtype=np.uint32)
+        for block, block_canopy, block_valid in blocks.map_parallel(
+                _aggregate_block, tasks, self.processes, memory=memory,
+                memory_budget=self.memory_budget):
+            r0, c0 = block[0] // factor, block[2] // factor
+            rows, cols = block_canopy.shape
+            canopy[r0:r0 + rows, c0:c0 + cols] = block_canopy
+            valid[r0:r0 + rows, c0:c0 + cols] = block_valid
+        return coarse_extent, canopy, valid
+
+    def __save_cover(self, arr, cover_path, extent, factor, percent):
+        # Writes a canopy cover array on the coarse grid
+        cellsize = self.__get_snap_grid()[1]
+        if percent:
+            nodata, pixel_type = cover.PERCENT_NODATA, '8_BIT_UNSIGNED'
+        else:
+            nodata, pixel_type = cover.FRACTION_NODATA, '32_BIT_FLOAT'
+        _save_array(arr, cover_path, (extent[0], extent[1]),
+                    (cellsize[0] * factor, cellsize[1] * factor),
+                    self.spatref_wkid, nodata, pixel_type,
+                    self.output_profiles['final'])
+
+    @__timed
+    def merge_canopy_cover(self, factor=30, percent=True):
+        '''
+        This function merges the canopy cover of all regions aggregated by
+        aggregate_canopy_tif() into one raster in results_path, e.g.,
+        cover_pct_30_2019.tif. Cell counts are added before canopy cover is
+        computed, so coarse cells split by region borders are weighted by
+        their valid cells in each region.
+
+        Parameters
+        ----------
+            factor : int
+                Number of canopy cells per coarse cell in each direction
+            percent : bool
+                True for percent cover, False for fractional cover
+
+        Returns
+        -------
+            str
+                Path to the merged canopy cover raster, or None if no regions
+                have been aggregated
+        '''
+        counts_paths = sorted(glob.glob('%s/*/Outputs/cover_%d_%d_*.npz' % (
+            self.results_path, factor, self.analysis_year)))
+        if not counts_paths:
+            return None
+        cellsize = self.__get_snap_grid()[1]
+        extent, canopy, valid = cover.merge_counts(counts_paths,
+                (cellsize[0] * factor, cellsize[1] * factor))
+        cover_path = '%s/cover_%s_%d_%d.tif' % (
+            self.results_path, 'pct' if percent else 'frac', factor,
+            self.analysis_year)
+        if os.path.exists(cover_path):
+            arcpy.Delete_management(cover_path)
+        self.__save_cover(cover.cover(canopy, valid, percent), cover_path,
+                          extent, factor, percent)
+        print('Merged %d regions' % len(counts_paths))
+        return cover_path
+
+    @__timed
+    def reclaim_intermediates(self, dry_run=False):
+        '''
+        This function deletes or archives intermediate files whose downstream
+        outputs are complete according to the retention policy and prints the
+        space reclaimed by region. See iter_reclaim_intermediates().
+
+        Parameters
+        ----------
+            dry_run : bool
+                True to only report the space that would be reclaimed
+
+        Returns
+        -------
+            list
+                List of planner.Result by region
+        '''
+        results = self.__run_stage(self.iter_reclaim_intermediates(dry_run))
+        print(retention.format_report(results))
+        return results
+
+    def iter_reclaim_intermediates(self, dry_run=False):
+        '''
+        This function deletes or archives the intermediate files of selected
+        physiographic regions according to the retention policy in the
+        [retention] section. An intermediate file is complete once a later
+        output is not older than it: final TIFF files for reprojected tiles
+        and AFE outputs, clipped final TIFF files for final TIFF files, and
+        the canopy TIFF files of all regions that contain a tile for clipped
+        final TIFF files. Mosaics are complete once the canopy TIFF file of
+        the region is, and temporary folders once the file they were
+        building is. Hard links to reprojected tiles in the Inputs folders of
+        regions are removed together with the tiles in the shared tile store.
+        In protected mode, reprojected tiles, final TIFF files, clipped final
+        TIFF files, and mosaics are kept, so that tiles can be reclassified by
+        classify_naip_tiles(), inverted tiles detected from final TIFF files,
+        and regions patched by patch_region_mosaics().
+
+        Parameters
+        ----------
+            dry_run : bool
+                True to only report the space that would be reclaimed
+
+        Yields
+        ------
+            planner.Result
+                Result of each region with the bytes reclaimed by kind as the
+                value
+        '''
+        stage = 'reclaim_intermediates'
+        analysis_year = self.analysis_year
+        results_path = self.results_path
+
+        names = self.__get_region_names()
+        region_tiles = self.__get_region_tiles()
+        tile_regions = {}
+        for phyreg_id, tiles in region_tiles.items():
+            for tile in tiles:
+                tile_regions.setdefault(tile, []).append(phyreg_id)
+
+        def get_canopytif_path(phyreg_id):
+            name = names[phyreg_id]
+            return '%s/%s/Outputs/canopy_%d_%s.tif' % (results_path, name,
+                                                       analysis_year, name)
+
+        # tiles in the shared tile store are reclaimed once
+        reclaimed_tiles = set()
+        for phyreg_id in self.phyreg_ids:
+            name = names[phyreg_id]
+            outdir_path = '%s/%s/Outputs' % (results_path, name)
+            inputs_path, tiledir_path = self.__get_tile_paths(name)
+            canopytif_path = get_canopytif_path(phyreg_id)
+            start_time = time.time()
+            reclaimed = {}
+            for tile in region_tiles.get(phyreg_id, []):
+                if (tiledir_path, tile) in reclaimed_tiles:
+                    continue
+                reclaimed_tiles.add((tiledir_path, tile))
+                phyreg_ids = tile_regions[tile] if self.tile_store_path \
+                    else [phyreg_id]
+                # later outputs of the tile in order
+                later_paths = [['%s/fr%s.tif' % (tiledir_path, tile)],
+                               ['%s/cfr%s.tif' % (tiledir_path, tile)],
+                               [get_canopytif_path(x) for x in phyreg_ids]]
+                rtif_paths = glob.glob('%s/r%s.*' % (inputs_path, tile))
+                if self.tile_store_path:
+                    rtif_paths.extend(x for x in [
+                        '%s/%s/Inputs/r%s.tif' % (results_path, names[y],
+                                                  tile) for y in phyreg_ids]
+                        if os.path.exists(x))
+                self.__reclaim(reclaimed, 'reprojected', rtif_paths,
+                               later_paths, dry_run)
+                self.__reclaim(reclaimed, 'afe', glob.glob('%s/r%s.*' % (
+                    tiledir_path, tile)), later_paths, dry_run)
+                self.__reclaim(reclaimed, 'final', glob.glob('%s/fr%s.*' % (
+                    tiledir_path, tile)), later_paths[1:], dry_run)
+                self.__reclaim(reclaimed, 'clipped', glob.glob(
+                    '%s/cfr%s.*' % (tiledir_path, tile)), later_paths[2:],
+                    dry_run)
+            self.__reclaim(reclaimed, 'mosaic', glob.glob(
+                '%s/mosaic_%d_%s.*' % (outdir_path, analysis_year, name)),
+                [[canopytif_path]], dry_run)
+            for tmp_path in glob.glob('%s/tmp_*' % outdir_path):
+                # temporary folders of rasters have no extension, while
+                # temporary files, e.g., GeoPackages, keep theirs
+                out_file = os.path.basename(tmp_path)[4:]
+                if not os.path.splitext(out_file)[1]:
+                    out_file += '.tif'
+                out_path = canopytif_path if out_file == 'patch.tif' else \
+                    '%s/%s' % (outdir_path, out_file)
+                self.__reclaim(reclaimed, 'temporary', [tmp_path],
+                               [[out_path]], dry_run)
+            yield planner.Result(stage, name, phyreg_id, name, outdir_path,
+                                 'done', time.time() - start_time,
+                                 'dry run' if dry_run else None, reclaimed)
+
+    def __reclaim(self, reclaimed, kind, paths, later_paths, dry_run):
+        # Deletes or archives the files of an intermediate if any of the later
+        # outputs is complete, and adds the bytes reclaimed by kind
+        action = retention.get_action(self.retention_policy, kind)
+        if action == 'keep' or not any(retention.is_complete(paths, x)
+                                       for x in later_paths):
+            return
+        reclaimed[kind] = reclaimed.get(kind, 0) + retention.reclaim(
+            paths, action, self.retention_policy.archive_path, dry_run)
+
+    @__timed
+    def build_history_stack(self):
+        '''
+        This function packs the canopy TIFF files of the analysis years of the
+        session into history stack rasters. See iter_build_history_stack().
+
+        Returns
+        -------
+            list
+                List of planner.Result by region
+        '''
+        return self.__run_stage(self.iter_build_history_stack())
+
+    def iter_build_history_stack(self):
+        '''
+        This function packs the canopy TIFF files of the analysis years of the
+        session up to this year, at most history.MAX_YEARS latest years, into
+        one history stack raster per physiographic region. Each uint16 cell
+        holds the canopy and validity bits of all years, which can be
+        unpacked and queried with the history module, and the years are
+        saved in a JSON file next to the raster. Canopy TIFF files are
+        preferred in the same order as aggregate_canopy_tif(), and those of
+        regions listed in inverted_phyreg_ids but not corrected are inverted
+        while they are read, unless their inverted tiles were detected before
+        mosaicking. The union of the canopy TIFF files on the snap grid is
+        stacked block by block in parallel.
+
+        Yields
+        ------
+            planner.Result
+                Result of each region with the stacked years as the value
+        '''
+        stage = 'build_history_stack'
+        analysis_year = self.analysis_year
+
+        canopies = [self]
+        if self.session:
+            canopies = [x for y, x in sorted(self.session.canopies.items())
+                        if y <= analysis_year][-history.MAX_YEARS:]
+        names = self.__get_region_names()
+        origin, cellsize = self.__get_snap_grid()
+        for phyreg_id in self.phyreg_ids:
+            name = names[phyreg_id]
+            outdir_path = '%s/%s/Outputs' % (self.results_path, name)
+            history_path = '%s/history_%d_%s.tif' % (outdir_path,
+                                                     analysis_year, name)
+            sources = []
+            years = []
+            for canopy in canopies:
+                source = canopy.__get_history_source(name, phyreg_id)
+                if source:
+                    sources.append(source)
+                    years.append(canopy.analysis_year)
+            if not sources:
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     history_path, 'skipped',
+                                     reason='no canopy TIFF')
+                continue
+            if (os.path.exists(history_path) and
+                    os.path.exists(history.get_years_path(history_path)) and
+                    history.read_years(history_path) == years and
+                    os.path.getmtime(history_path) >= max(
+                        os.path.getmtime(x[0]) for x in sources)):
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     history_path, 'skipped',
+                                     reason='exists', value=years)
+                continue
+            start_time = time.time()
+            if os.path.exists(history_path):
+                arcpy.Delete_management(history_path)
+            if not self.__stack_history(sources, origin, cellsize,
+                                        history_path):
+                yield planner.Result(stage, name, phyreg_id, name,
+                                     history_path, 'skipped',
+                                     reason='no valid cells')
+                continue
+            history.save_years(history_path, years)
+            yield planner.Result(stage, name, phyreg_id, name, history_path,
+                                 'done', time.time() - start_time,
+                                 value=years)
+
+    def __get_history_source(self, name, phyreg_id):
+        # Returns the path, extent, and inversion of the canopy TIFF file of a
+        # region to stack, or None if it does not exist
+        outdir_path = '%s/%s/Outputs' % (self.results_path, name)
+        corrected_path = '%s/corrected_canopy_%d_%s.tif' % (
+            outdir_path, self.analysis_year, name)
+        inverted = False
+        if os.path.exists(corrected_path):
+            canopytif_path = corrected_path
+        else:
+            canopytif_path = self.__get_canopy_tif_path(outdir_path, name)
+            inverted = self.__is_region_inverted(name, phyreg_id)
+        if not os.path.exists(canopytif_path):
+            return None
+        ras = arcpy.Raster(canopytif_path)
+        extent = (ras.extent.XMin, ras.extent.YMin, ras.extent.XMax,
+                  ras.extent.YMax)
+        return canopytif_path, extent, inverted
+
+    def __stack_history(self, sources, origin, cellsize, history_path):
+        '''
+        This function packs canopy TIFF files into a history stack raster
+        block by block. Blocks without valid cells in any year are skipped,
+        and the stacked blocks are mosaicked into a new raster.
+
+        Parameters
+        ----------
+            sources : list
+                (path, extent, inverted) of the canopy TIFF file of each year
+            origin : tuple
+                (x, y) upper left corner of the snap grid
+            cellsize : tuple
+                (width, height) cell size of the snap grid
+            history_path : str
+                Path to the history stack raster
+
+        Returns
+        -------
+            bool
+                True if the history stack raster is written; False if no
+                blocks have valid cells
+        '''
+        for raster_path, extent, _ in sources:
+            snapped = grid.snap_extent(extent, origin, cellsize)[0]
+            if not all(abs(x - y) < min(cellsize) / 1000 for x, y in
+                       zip(extent, snapped)):
+                raise ValueError('%s is not on the snap grid' % raster_path)
+        extent, shape = grid.snap_extent(
+                (min(x[1][0] for x in sources), min(x[1][1] for x in sources),
+                 max(x[1][2] for x in sources), max(x[1][3] for x in sources)),
+                origin, cellsize)
+
+        # stacked blocks are written to a temporary folder
+        out_dir, out_file = os.path.split(history_path)
+        tmp_path = '%s/tmp_%s' % (out_dir, os.path.splitext(out_file)[0])
+        if not os.path.exists(tmp_path):
+            os.mkdir(tmp_path)
+        tasks = []
+        memory = []
+        for block, _ in blocks.iter_blocks(shape, self.block_size):
+            r0, r1, c0, c1 = block
+            block_extent = (extent[0] + c0 * cellsize[0],
+                            extent[3] - r1 * cellsize[1],
+                            extent[0] + c1 * cellsize[0],
+                            extent[3] - r0 * cellsize[1])
+            if all(grid.overlap_windows(block_extent, x[1], cellsize) is None
+                   for x in sources):
+                continue
+            block_path = '%s/block_%d_%d.tif' % (tmp_path, r0, c0)
+            tasks.append((sources, block, block_extent, cellsize, block_path,
+                          self.spatref_wkid,
+                          self.output_profiles['intermediate']))
+            memory.append(blocks.working_set((r1 - r0, c1 - c0),
+                    len(sources), _BYTES_PER_CELL['stack_history']))
+        block_paths = [x for x in blocks.map_parallel(_stack_block, tasks,
+                       self.processes, memory=memory,
+                       memory_budget=self.memory_budget) if x]
+
+        if block_paths:
+            profiles.set_profile(self.output_profiles['final'])
+            arcpy.MosaicToNewRaster_management(';'.join(block_paths), out_dir,
+                    out_file, pixel_type='16_BIT_UNSIGNED', number_of_bands=1)
+        shutil.rmtree(tmp_path)
+        return bool(block_paths)
 
     def generate_gtpoints(self, phyreg_ids, min_area_sqkm, max_area_sqkm,
                           min_points, max_points):
@@ -868,12 +3391,6 @@ class Canopy:
         arcpy.env.addOutputsToMap = False
         arcpy.env.outputCoordinateSystem = arcpy.SpatialReference(spatref_wkid)
 
-        # use configparser converter to read list
-        conf = ConfigParser(converters={'list': lambda x: [int(i.strip())
-                                                    for i in x.split(',')]})
-        conf.read(self.config)
-        inverted_reg = conf.getlist('config', 'inverted_phyreg_ids')
-
         # make sure to clear selection because most geoprocessing tools use
         # selected features, if any
         arcpy.SelectLayerByAttribute_management(naipqq_layer, 'CLEAR_SELECTION')
@@ -895,10 +3412,7 @@ class Canopy:
                 area_sqkm = row[2]
 
                 # Check if region is inverted
-                if row[1] in inverted_reg:
-                    inverted = True
-                else:
-                    inverted = False
+                inverted = self.__is_region_inverted(name, phyreg_id)
 
                 # +1 to count partial points; e.g., 0.1 requires one point
                 point_count = int(min_points + (max_points - min_points) /
@@ -912,37 +3426,33 @@ class Canopy:
                 print('Final point count: %d' % point_count)
 
                 outdir_path = '%s/%s/Outputs' % (results_path, name)
+                tiledir_path = self.__get_tile_paths(name)[1]
                 shp_filename = 'gtpoints_%d_%s.shp' % (analysis_year, name)
-
-                tmp_shp_filename = 'tmp_%s' % shp_filename
-                tmp_shp_path = '%s/%s' % (outdir_path, tmp_shp_filename)
+                shp_path = '%s/%s' % (outdir_path, shp_filename)
 
                 # create random points
                 arcpy.SelectLayerByAttribute_management(phyregs_layer,
                         where_clause='PHYSIO_ID=%d' % phyreg_id)
                 arcpy.CreateRandomPoints_management(outdir_path,
-                        tmp_shp_filename, phyregs_layer, '', point_count)
+                        shp_filename, phyregs_layer, '', point_count)
 
                 # create a new field to store data for ground truthing
                 gt_field = 'GT'
-                arcpy.AddField_management(tmp_shp_path, gt_field, 'SHORT')
-
-                # spatially join the naip qq layer to random points to find
-                # output tile filenames
-                shp_path = '%s/%s' % (outdir_path, shp_filename)
-                arcpy.SpatialJoin_analysis(tmp_shp_path, naipqq_layer, shp_path)
+                arcpy.AddField_management(shp_path, gt_field, 'SHORT')
 
-                # delete temporary point shapefile
-                arcpy.Delete_management(tmp_shp_path)
+                # find output tile filenames from the QQ grid instead of
+                # spatially joining the naip qq layer to random points
+                point_tiles = self.__get_point_tiles(shp_path)
 
-                # get required fields from spatially joined point layer
                 with arcpy.da.UpdateCursor(shp_path, ['SHAPE@XY', gt_field,
-                    'FileName']) as cur2:
+                                                      'OID@']) as cur2:
                     for row2 in cur2:
-                        # read filename
-                        filename = row2[2][:-13]
+                        filename = point_tiles[row2[2]]
+                        if filename is None:
+                            print('No NAIP tile for point %d' % row2[2])
+                            continue
                         # construct the final output tile path
-                        cfrtiffile_path = '%s/cfr%s.tif' % (outdir_path,
+                        cfrtiffile_path = '%s/cfr%s.tif' % (tiledir_path,
                                                             filename)
                         # read the output tile as raster
                         ras = arcpy.sa.Raster(cfrtiffile_path)
@@ -961,7 +3471,7 @@ class Canopy:
                             cur2.updateRow(row2)
                         else:
                             row2[1] = ras_a[rc]
-                            cur.updateRow(row2)
+                            cur2.updateRow(row2)
 
                 # delete all fields except only those required
                 shp_desc = arcpy.Describe(shp_path)
@@ -1003,12 +3513,6 @@ class Canopy:
         arcpy.env.addOutputsToMap = False
         arcpy.env.outputCoordinateSystem = arcpy.SpatialReference(spatref_wkid)
 
-        # use configparser converter to read list
-        conf = ConfigParser(converters={'list': lambda x: [int(i.strip())
-                                                    for i in x.split(',')]})
-        conf.read(self.config)
-        inverted_reg = conf.getlist('config', 'inverted_phyreg_ids')
-
         # make sure to clear selection because most geoprocessing tools use
         # selected features, if any
         arcpy.SelectLayerByAttribute_management(naipqq_layer, 'CLEAR_SELECTION')
@@ -1027,16 +3531,12 @@ class Canopy:
                 name = name.replace(' ', '_').replace('-', '_')
                 phyreg_id = row[1]
                 # Check if region is inverted
-                if row[1] in inverted_reg:
-                    inverted = True
-                else:
-                    inverted = False
+                inverted = self.__is_region_inverted(name, phyreg_id)
 
                 outdir_path = '%s/%s/Outputs' % (results_path, name)
+                tiledir_path = self.__get_tile_paths(name)[1]
                 shp_filename = 'gtpoints_%d_%s.shp' % (analysis_year, name)
-
-                tmp_shp_filename = 'tmp_%s' % shp_filename
-                tmp_shp_path = '%s/%s' % (outdir_path, tmp_shp_filename)
+                shp_path = '%s/%s' % (outdir_path, shp_filename)
 
                 # create random points
                 arcpy.SelectLayerByAttribute_management(phyregs_layer,
@@ -1044,25 +3544,22 @@ class Canopy:
 
                 # create a new field to store data for ground truthing
                 gt_field = 'GT_%s' % analysis_year
-                arcpy.CopyFeatures_management(old_points, tmp_shp_path)
-                arcpy.AddField_management(tmp_shp_path, gt_field, 'SHORT')
-
-                # spatially join the naip qq layer to random points to find
-                # output tile filenames
-                shp_path = '%s/%s' % (outdir_path, shp_filename)
-                arcpy.SpatialJoin_analysis(tmp_shp_path, naipqq_layer, shp_path)
+                arcpy.CopyFeatures_management(old_points, shp_path)
+                arcpy.AddField_management(shp_path, gt_field, 'SHORT')
 
-                # delete temporary point shapefile
-                arcpy.Delete_management(tmp_shp_path)
+                # find output tile filenames from the QQ grid instead of
+                # spatially joining the naip qq layer to points
+                point_tiles = self.__get_point_tiles(shp_path)
 
-                # get required fields from spatially joined point layer
                 with arcpy.da.UpdateCursor(shp_path, ['SHAPE@XY', gt_field,
-                                                      'FileName']) as cur2:
+                                                      'OID@']) as cur2:
                     for row2 in cur2:
-                        # read filename
-                        filename = row2[2][:-13]
+                        filename = point_tiles[row2[2]]
+                        if filename is None:
+                            print('No NAIP tile for point %d' % row2[2])
+                            continue
                         # construct the final output tile path
-                        cfrtiffile_path = '%s/cfr%s.tif' % (outdir_path,
+                        cfrtiffile_path = '%s/cfr%s.tif' % (tiledir_path,
                                                             filename)
                         # read the output tile as raster
                         ras = arcpy.sa.Raster(cfrtiffile_path)
@@ -1111,25 +3608,257 @@ class Canopy:
         gtpoints : str
             name of ground truthing points shapefile to add NAIP based off
         '''
-        naipqq_layer = self.naipqq_layer
         naip_path = self.naip_path
 
-        arcpy.SelectLayerByAttribute_management(naipqq_layer,
-                                                'CLEAR_SELECTION')
-        arcpy.SelectLayerByLocation_management(naipqq_layer,
-                                               'INTERSECT', gtpoints)
+        # find tiles from the QQ grid instead of selecting the naip qq layer
+        # by location
+        filenames = set(self.__get_point_tiles(gtpoints).values())
+        filenames.discard(None)
+        for filename in sorted(filenames):
+            filename = '%s.tif' % filename
+            folder = filename[2:7]
+            infile_path = '%s/%s/%s' % (naip_path, folder, filename)
+            tmp = 'in_memory/%s' % filename
+            arcpy.MakeRasterLayer_management(infile_path, tmp)
 
-        with arcpy.da.SearchCursor(naipqq_layer, ['FileName']) as cur:
-            for row in sorted(cur):
-                filename = '%s.tif' % row[0][:-13]
-                folder = filename[2:7]
-                infile_path = '%s/%s/%s' % (naip_path, folder, filename)
-                tmp = 'in_memory/%s' % filename
-                arcpy.MakeRasterLayer_management(infile_path, tmp)
+        print('Completed')
 
-        arcpy.SelectLayerByAttribute_management(naipqq_layer, 'CLEAR_SELECTION')
 
-        print('Completed')
+# Estimated bytes per cell used by the arrays of worker tasks for the memory
+# budget
+_BYTES_PER_CELL = {
+    'rasterize_polygons': 16,
+    'fill_gaps': 24,
+    'sieve': 16,
+    # 4 bands, 5 float32 features, and tree traversal state
+    'classify': 48,
+    # canopy and validity of each year
+    'stack_history': 4,
+    # canopy, mask window, unpacked mask bits, and comparisons
+    'mask_region': 6,
+    # canopy, window read, and canopy and valid comparisons
+    'aggregate': 4,
+    # canopy block and its valid and canopy comparisons
+    'scan_tile': 4,
+}
+
+
+def _read_window(raster_path, window, nodata=3):
+    # Reads a (row_start, row_end, col_start, col_end) window of a raster
+    ras = arcpy.Raster(raster_path)
+    r0, r1, c0, c1 = window
+    lower_left = arcpy.Point(ras.extent.XMin + c0 * ras.meanCellWidth,
+                             ras.extent.YMax - r1 * ras.meanCellHeight)
+    return arcpy.RasterToNumPyArray(ras, lower_left, c1 - c0, r1 - r0,
+                                    nodata_to_value=nodata)
+
+
+def _window_lower_left(raster_path, window):
+    # Returns the lower left corner and cell size of a window of a raster
+    ras = arcpy.Raster(raster_path)
+    cellsize = (ras.meanCellWidth, ras.meanCellHeight)
+    return ((ras.extent.XMin + window[2] * cellsize[0],
+             ras.extent.YMax - window[1] * cellsize[1]), cellsize)
+
+
+def _save_array(arr, raster_path, lower_left, cellsize, spatref_wkid,
+                nodata=3, pixel_type='2_BIT', profile=None):
+    # Writes an array as a raster in the output spatial reference. Copy raster
+    # is used as arcpy.save does not give bit options. Worker processes do not
+    # inherit arcpy.env, so they pass their output profile.
+    profiles.set_profile(profile)
+    ras = arcpy.NumPyArrayToRaster(arr, arcpy.Point(*lower_left), cellsize[0],
+                                   cellsize[1], nodata)
+    arcpy.CopyRaster_management(ras, raster_path, nodata_value='%d' % nodata,
+                                pixel_type=pixel_type)
+    arcpy.DefineProjection_management(raster_path,
+                                      arcpy.SpatialReference(spatref_wkid))
+
+
+def _timed_task(args):
+    # Runs a task and returns its result and elapsed seconds
+    func, task = args
+    start_time = time.time()
+    result = func(task)
+    return result, time.time() - start_time
+
+
+def _polygon_rings(shape):
+    # Returns the exterior and interior rings of all parts of an arcpy polygon
+    # as (n, 2) arrays of x and y
+    geo = shape.__geo_interface__
+    parts = geo['coordinates']
+    if geo['type'] == 'Polygon':
+        parts = [parts]
+    return [np.asarray(ring, dtype=float)[:, :2] for part in parts
+            for ring in part]
+
+
+def _estimate_rasterize_memory(task):
+    # Estimates the working set of rasterizing an AFE shapefile output from
+    # the extent of the shapefile on the snap grid
+    rshpfile_path, cellsize = task[0], task[3]
+    ext = arcpy.Describe(rshpfile_path).extent
+    shape = (int(ext.height / cellsize[1]) + 1,
+             int(ext.width / cellsize[0]) + 1)
+    return blocks.working_set(shape, 1, _BYTES_PER_CELL['rasterize_polygons'])
+
+
+def _rasterize_afe_tile(task):
+    # Rasterizes the CLASS_ID polygons of an AFE shapefile output onto the
+    # snap grid and writes the final tile. The same mapping as for TIFF
+    # outputs ('1 0;2 1') is applied.
+    (rshpfile_path, frtiffile_path, origin, cellsize, spatref_wkid,
+     profile) = task
+    polygons = []
+    xmin = ymin = np.inf
+    xmax = ymax = -np.inf
+    with arcpy.da.SearchCursor(rshpfile_path, ['CLASS_ID', 'SHAPE@'],
+            spatial_reference=arcpy.SpatialReference(spatref_wkid)) as cur:
+        for class_id, shape in cur:
+            if shape is None:
+                continue
+            rings = _polygon_rings(shape)
+            for ring in rings:
+                xmin = min(xmin, ring[:, 0].min())
+                xmax = max(xmax, ring[:, 0].max())
+                ymin = min(ymin, ring[:, 1].min())
+                ymax = max(ymax, ring[:, 1].max())
+            # burn CLASS_ID + 1 so that 0 means no polygon
+            polygons.append((rings, class_id + 1))
+    if not polygons:
+        return False
+
+    extent, shape = grid.snap_extent((xmin, ymin, xmax, ymax), origin,
+                                     cellsize)
+    burned = grid.rasterize_polygons(polygons, extent, cellsize, shape,
+                                     np.int32)
+    # reclassify 1 to 0 and 2 to 1, and set cells outside polygons to nodata
+    classes = np.arange(burned.max() + 1) - 1
+    lut = np.select([classes == 1, classes == 2, classes < 0], [0, 1, 3],
+                    classes)
+    arr = lut[burned].astype(np.uint8)
+    _save_array(arr, frtiffile_path, (extent[0], extent[1]), cellsize,
+                spatref_wkid, profile=profile)
+    return True
+
+
+# Pixel classifiers loaded by worker processes by path
+_classifiers = {}
+
+
+def _classify_tile(task):
+    # Classifies a reprojected tile block by block with a pixel classifier
+    # and writes the final tile, or returns False if it does not have 4 bands
+    (rtiffile_path, frtiffile_path, classifier_path, block_size,
+     spatref_wkid, profile) = task
+    if classifier_path not in _classifiers:
+        _classifiers[classifier_path] = classifier.PixelClassifier.load(
+                classifier_path)
+    model = _classifiers[classifier_path]
+    ras = arcpy.Raster(rtiffile_path)
+    if ras.bandCount < 4:
+        return False
+    shape = (ras.height, ras.width)
+    arr = np.full(shape, 3, dtype=np.uint8)
+    for block, _ in blocks.iter_blocks(shape, block_size):
+        x, valid = classifier.features(_read_window(rtiffile_path, block, 0))
+        classes = np.full(len(valid), 3, dtype=np.uint8)
+        classes[valid] = model.predict(x[valid])
+        arr[block[0]:block[1], block[2]:block[3]] = classes.reshape(
+                block[1] - block[0], block[3] - block[2])
+    _save_array(arr, frtiffile_path, (ras.extent.XMin, ras.extent.YMin),
+                (ras.meanCellWidth, ras.meanCellHeight), spatref_wkid,
+                profile=profile)
+    return True
+
+
+def _mask_block(task):
+    # Masks one block of a canopy raster with a region mask, whose bits may be
+    # in shared memory, and writes the block, or returns None if no cells are
+    # left.
+    (raster_path, block, block_path, spatref_wkid, mask_spec, extent,
+     profile) = task
+    bits, mask_extent, cellsize, shape = mask_spec
+    mask = masks.RegionMask(sharedmem.attach(bits), mask_extent, cellsize,
+                            shape)
+    arr = _read_window(raster_path, block)
+    mask.apply(arr, extent)
+    if (arr == 3).all():
+        return None
+    lower_left, cellsize = _window_lower_left(raster_path, block)
+    _save_array(arr, block_path, lower_left, cellsize, spatref_wkid,
+                profile=profile)
+    return block_path
+
+
+def _aggregate_block(task):
+    # Counts the canopy and valid cells in the coarse cells of one block
+    # aligned to the coarse grid. Cells outside the raster are nodata.
+    raster_path, block, windows, factor = task
+    r0, r1, c0, c1 = block
+    arr = np.full((r1 - r0, c1 - c0), 3, dtype=np.uint8)
+    w0, w1, w2, w3 = windows[0]
+    arr[w0:w1, w2:w3] = _read_window(raster_path, windows[1])
+    return (block,) + cover.coarse_counts(arr, factor)
+
+
+def _stack_block(task):
+    # Packs the canopy of all years in one block of a history stack and writes
+    # the block, or returns None if no years have valid cells. Cells outside
+    # the canopy raster of a year are nodata.
+    (sources, block, block_extent, cellsize, block_path, spatref_wkid,
+     profile) = task
+    r0, r1, c0, c1 = block
+    arrays = []
+    for raster_path, extent, _ in sources:
+        arr = np.full((r1 - r0, c1 - c0), 3, dtype=np.uint8)
+        windows = grid.overlap_windows(block_extent, extent, cellsize)
+        if windows is not None:
+            w0, w1, w2, w3 = windows[0]
+            arr[w0:w1, w2:w3] = _read_window(raster_path, windows[1])
+        arrays.append(arr)
+    stack = history.encode(arrays, [x[2] for x in sources])
+    if not stack.any():
+        return None
+    _save_array(stack, block_path, (block_extent[0], block_extent[1]),
+                cellsize, spatref_wkid, history.NODATA, '16_BIT_UNSIGNED',
+                profile)
+    return block_path
+
+
+def _scan_tile(task):
+    # Counts the canopy, noncanopy, and nodata cells of a clipped final tile
+    # by row and column block by block, and returns its extent and statistics
+    raster_path, block_size = task
+    ras = arcpy.Raster(raster_path)
+    extent = (ras.extent.XMin, ras.extent.YMin, ras.extent.XMax,
+              ras.extent.YMax)
+    shape = (ras.height, ras.width)
+    del ras
+    stats = qa.new_stats(shape)
+    for block, _ in blocks.iter_blocks(shape, block_size):
+        qa.add_block(stats, _read_window(raster_path, block), block)
+    return extent, stats
+
+
+def _filter_block(task):
+    # Filters one block of a canopy raster read with its halo and writes the
+    # block only if any cells were changed.
+    (raster_path, block, window, block_path, spatref_wkid, func, args,
+     profile) = task
+    arr = _read_window(raster_path, window)
+    filtered, count = func(arr, *args)
+    if count == 0:
+        return block_path, 0
+    arr = blocks.crop(arr, block, window)
+    filtered = blocks.crop(filtered, block, window)
+    count = int((arr != filtered).sum())
+    if count > 0:
+        lower_left, cellsize = _window_lower_left(raster_path, block)
+        _save_array(filtered, block_path, lower_left, cellsize, spatref_wkid,
+                    profile=profile)
+    return block_path, count
 
 
 class Check_gaps:
@@ -0,0 +1,168 @@
+################################################################################
+# Name:    catalog.py
+# Purpose: This module provides functions for reading physiographic regions,
+#          the NAIP tiles of each region, and the snap grid, which can be
+#          cached and shared across analysis years by a session.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import arcpy
+
+
+def read_region_names(phyregs_layer):
+    '''
+    Reads the names of all physiographic regions with one cursor.
+
+    Parameters
+    ----------
+        phyregs_layer : str
+            Physiographic regions layer
+
+    Returns
+    -------
+        dict
+            Region names with underscores by physiographic region ID
+    '''
+    names = {}
+    with arcpy.da.SearchCursor(phyregs_layer, ['NAME', 'PHYSIO_ID']) as cur:
+        for row in cur:
+            # CreateRandomPoints cannot create a shapefile with - in its
+            # filename
+            names[row[1]] = row[0].replace(' ', '_').replace('-', '_')
+    return names
+
+
+def read_region_geometries(phyregs_layer, spatref_wkid):
+    '''
+    Reads the polygons of all physiographic regions with one cursor.
+
+    Parameters
+    ----------
+        phyregs_layer : str
+            Physiographic regions layer
+        spatref_wkid : int
+            WKID of the spatial reference of the polygons
+
+    Returns
+    -------
+        dict
+            arcpy.Polygon by physiographic region ID
+    '''
+    with arcpy.da.SearchCursor(phyregs_layer, ['PHYSIO_ID', 'SHAPE@'],
+            spatial_reference=arcpy.SpatialReference(spatref_wkid)) as cur:
+        return {row[0]: row[1] for row in cur}
+
+
+def read_region_tiles(naipqq_layer, naipqq_phyregs_field):
+    '''
+    Reads the NAIP tiles of all physiographic regions with one cursor.
+
+    Parameters
+    ----------
+        naipqq_layer : str
+            NAIP QQ layer
+        naipqq_phyregs_field : str
+            Field with comma-separated physiographic region IDs
+
+    Returns
+    -------
+        dict
+            Lists of tile filenames without the date and extension, e.g.,
+            m_3408301_ne_17_1, by physiographic region ID
+    '''
+    region_tiles = {}
+    with arcpy.da.SearchCursor(naipqq_layer,
+            ['FileName', naipqq_phyregs_field]) as cur:
+        for row in cur:
+            if not row[1]:
+                continue
+            for phyreg_id in row[1].strip(',').split(','):
+                if phyreg_id:
+                    region_tiles.setdefault(int(phyreg_id), []).append(
+                            row[0][:-13])
+    for tiles in region_tiles.values():
+        tiles.sort()
+    return region_tiles
+
+
+def read_tile_filenames(naipqq_layer):
+    '''
+    Reads the filenames of all NAIP tiles with one cursor.
+
+    Parameters
+    ----------
+        naipqq_layer : str
+            NAIP QQ layer
+
+    Returns
+    -------
+        list
+            Sorted tile filenames without the date and extension, e.g.,
+            m_3408301_ne_17_1
+    '''
+    with arcpy.da.SearchCursor(naipqq_layer, ['FileName']) as cur:
+        return sorted(row[0][:-13] for row in cur)
+
+
+def read_tile_areas(naipqq_layer, spatref_wkid):
+    '''
+    Reads the footprint areas of all NAIP tiles with one cursor.
+
+    Parameters
+    ----------
+        naipqq_layer : str
+            NAIP QQ layer
+        spatref_wkid : int
+            WKID of the spatial reference of the areas
+
+    Returns
+    -------
+        dict
+            Footprint areas by tile filename without the date and extension
+    '''
+    with arcpy.da.SearchCursor(naipqq_layer, ['FileName', 'SHAPE@AREA'],
+            spatial_reference=arcpy.SpatialReference(spatref_wkid)) as cur:
+        return {row[0][:-13]: row[1] for row in cur}
+
+
+def read_tile_centroids(naipqq_layer, spatref_wkid):
+    '''
+    Reads the centroids of all NAIP tiles with one cursor.
+
+    Parameters
+    ----------
+        naipqq_layer : str
+            NAIP QQ layer
+        spatref_wkid : int
+            WKID of the spatial reference of the centroids
+
+    Returns
+    -------
+        dict
+            (x, y) centroids by tile filename without the date and extension
+    '''
+    with arcpy.da.SearchCursor(naipqq_layer, ['FileName', 'SHAPE@XY'],
+            spatial_reference=arcpy.SpatialReference(spatref_wkid)) as cur:
+        return {row[0][:-13]: row[1] for row in cur}
+
+
+def read_snap_grid(snaprast_path):
+    '''
+    Reads the snap grid of a snap raster.
+
+    Parameters
+    ----------
+        snaprast_path : str
+            Path to the snap raster
+
+    Returns
+    -------
+        tuple
+            ((x, y) upper left corner, (width, height) cell size)
+    '''
+    ras = arcpy.Raster(snaprast_path)
+    return ((ras.extent.XMin, ras.extent.YMax),
+            (ras.meanCellWidth, ras.meanCellHeight))
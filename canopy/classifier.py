@@ -0,0 +1,281 @@
+################################################################################
+# Name:    classifier.py
+# Purpose: This module provides a pixel classifier for canopy, an ensemble of
+#          decision trees on the NAIP bands and NDVI, that is trained and run
+#          with NumPy as a batch alternative to Feature Analyst.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import numpy as np
+from . import ndvi
+
+# Names of the features of a pixel
+FEATURES = ('red', 'green', 'blue', 'nir', 'ndvi')
+
+
+def features(arr):
+    '''
+    Computes the features of the pixels of a NAIP array.
+
+    Parameters
+    ----------
+        arr : numpy.ndarray
+            (bands, rows, columns) NAIP array with 4 bands
+
+    Returns
+    -------
+        numpy.ndarray, numpy.ndarray
+            (rows * columns, 5) float32 features and boolean array of valid
+            pixels, which have any nonzero band
+    '''
+    values, _ = ndvi.ndvi(arr[ndvi.RED], arr[ndvi.NIR])
+    x = np.empty((arr[0].size, len(FEATURES)), dtype=np.float32)
+    for i in range(4):
+        x[:, i] = arr[i].ravel()
+    x[:, 4] = values.ravel()
+    valid = (arr[:4] > 0).any(axis=0).ravel()
+    return x, valid
+
+
+class PixelClassifier:
+    '''
+    Object to classify pixels into noncanopy (0) and canopy (1) with an
+    ensemble of decision trees. Each tree is grown on a bootstrap sample
+    with a random subset of features at each split, and splits are searched
+    over quantile bins of the features. Trees are stored as complete binary
+    trees in arrays, so all pixels descend one level at a time.
+
+    Attributes
+    ----------
+    n_trees : int
+        Number of trees.
+    max_depth : int
+        Maximum depth of a tree.
+    min_samples_leaf : int
+        Minimum number of samples in a leaf.
+    bins : int
+        Number of quantile bins of each feature.
+    feature : numpy.ndarray
+        (trees, nodes) split features; -1 for leaves.
+    threshold : numpy.ndarray
+        (trees, nodes) split thresholds; samples greater than them go right.
+    value : numpy.ndarray
+        (trees, nodes) canopy fractions of nodes.
+
+    Methods
+    -------
+    fit(x, y):
+        Trains the trees.
+    predict_proba(x):
+        Returns the canopy probabilities of samples.
+    predict(x):
+        Returns the classes of samples.
+    save(path):
+        Saves the trees.
+    load(path):
+        Loads trees saved by save().
+    '''
+
+    def __init__(self, n_trees=16, max_depth=10, min_samples_leaf=20, bins=64,
+                 seed=0):
+        '''
+        Parameters
+        ----------
+            n_trees : int
+                Number of trees
+            max_depth : int
+                Maximum depth of a tree
+            min_samples_leaf : int
+                Minimum number of samples in a leaf
+            bins : int
+                Number of quantile bins of each feature
+            seed : int
+                Seed for bootstrap samples and feature subsets
+        '''
+        self.n_trees = n_trees
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.bins = bins
+        self.seed = seed
+        self.feature = self.threshold = self.value = None
+
+    def fit(self, x, y):
+        '''
+        Trains the trees.
+
+        Parameters
+        ----------
+            x : numpy.ndarray
+                (samples, features) features
+            y : numpy.ndarray
+                Classes of samples, 0 or 1
+
+        Returns
+        -------
+            PixelClassifier
+                self
+        '''
+        x = np.asarray(x, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float64)
+        n, n_features = x.shape
+        # interior quantiles of each feature; bin b holds values greater than
+        # edges[b - 1] and less than or equal to edges[b]
+        quantiles = np.linspace(0, 1, self.bins + 1)[1:-1]
+        edges = [np.unique(np.quantile(x[:, f], quantiles)) for f in
+                 range(n_features)]
+        binned = np.empty(x.shape, dtype=np.uint8 if self.bins <= 256 else
+                          np.uint16)
+        for f in range(n_features):
+            binned[:, f] = np.searchsorted(edges[f], x[:, f], side='left')
+
+        nodes = 2**(self.max_depth + 1) - 1
+        self.feature = np.full((self.n_trees, nodes), -1, dtype=np.int16)
+        self.threshold = np.zeros((self.n_trees, nodes), dtype=np.float32)
+        self.value = np.zeros((self.n_trees, nodes), dtype=np.float32)
+        rng = np.random.default_rng(self.seed)
+        max_features = max(int(np.sqrt(n_features)), 1)
+        for t in range(self.n_trees):
+            stack = [(0, rng.integers(0, n, n), 0)]
+            while stack:
+                node, idx, depth = stack.pop()
+                self.value[t, node] = y[idx].mean() if len(idx) else 0
+                if (depth == self.max_depth or
+                        len(idx) < 2 * self.min_samples_leaf or
+                        self.value[t, node] in (0, 1)):
+                    continue
+                split = self.__best_split(binned[idx], y[idx], edges,
+                        rng.choice(n_features, max_features, replace=False))
+                if split is None:
+                    continue
+                f, b = split
+                self.feature[t, node] = f
+                self.threshold[t, node] = edges[f][b]
+                right = binned[idx, f] > b
+                stack.append((2 * node + 1, idx[~right], depth + 1))
+                stack.append((2 * node + 2, idx[right], depth + 1))
+        return self
+
+    def __best_split(self, binned, y, edges, candidates):
+        # Returns the (feature, bin) split with the lowest weighted Gini
+        # impurity whose sides have enough samples, or None
+        n = len(y)
+        best = None
+        best_score = np.inf
+        for f in candidates:
+            nbins = len(edges[f]) + 1
+            if nbins < 2:
+                continue
+            counts = np.bincount(binned[:, f], minlength=nbins)
+            positives = np.bincount(binned[:, f], weights=y, minlength=nbins)
+            # splits after each bin except the last
+            left_n = np.cumsum(counts)[:-1]
+            left_p = np.cumsum(positives)[:-1]
+            right_n = n - left_n
+            right_p = positives.sum() - left_p
+            ok = ((left_n >= self.min_samples_leaf) &
+                  (right_n >= self.min_samples_leaf))
+            if not ok.any():
+                continue
+            with np.errstate(divide='ignore', invalid='ignore'):
+                # n * Gini impurity = 2 * p * (n - p) / n for each side
+                score = (left_p * (left_n - left_p) / left_n +
+                         right_p * (right_n - right_p) / right_n)
+            score[~ok] = np.inf
+            b = int(np.argmin(score))
+            if score[b] < best_score:
+                best, best_score = (int(f), b), score[b]
+        return best
+
+    def predict_proba(self, x, chunk_size=1048576):
+        '''
+        Returns the canopy probabilities of samples averaged over the trees.
+
+        Parameters
+        ----------
+            x : numpy.ndarray
+                (samples, features) features
+            chunk_size : int
+                Number of samples classified at a time
+
+        Returns
+        -------
+            numpy.ndarray
+                float32 canopy probabilities
+        '''
+        x = np.asarray(x, dtype=np.float32)
+        proba = np.zeros(len(x), dtype=np.float32)
+        for start in range(0, len(x), chunk_size):
+            xc = x[start:start + chunk_size]
+            rows = np.arange(len(xc))
+            total = np.zeros(len(xc), dtype=np.float32)
+            for t in range(len(self.feature)):
+                feature, threshold = self.feature[t], self.threshold[t]
+                node = np.zeros(len(xc), dtype=np.int32)
+                for _ in range(self.max_depth):
+                    f = feature[node]
+                    inner = f >= 0
+                    if not inner.any():
+                        break
+                    right = xc[rows, np.maximum(f, 0)] > threshold[node]
+                    node = np.where(inner, 2 * node + 1 + right, node)
+                total += self.value[t, node]
+            proba[start:start + chunk_size] = total / len(self.feature)
+        return proba
+
+    def predict(self, x):
+        '''
+        Returns the classes of samples.
+
+        Parameters
+        ----------
+            x : numpy.ndarray
+                (samples, features) features
+
+        Returns
+        -------
+            numpy.ndarray
+                uint8 classes, 0 for noncanopy and 1 for canopy
+        '''
+        return (self.predict_proba(x) >= 0.5).astype(np.uint8)
+
+    def save(self, path):
+        '''
+        Saves the trees to a *.npz file.
+
+        Parameters
+        ----------
+            path : str
+                Path to the *.npz file
+        '''
+        tmp_path = '%s.tmp.npz' % path[:-4]
+        np.savez_compressed(tmp_path, feature=self.feature,
+                            threshold=self.threshold, value=self.value,
+                            params=[self.n_trees, self.max_depth,
+                                    self.min_samples_leaf, self.bins,
+                                    self.seed])
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Loads trees saved by save().
+
+        Parameters
+        ----------
+            path : str
+                Path to the *.npz file
+
+        Returns
+        -------
+            PixelClassifier
+        '''
+        with np.load(path) as f:
+            model = cls(*f['params'].tolist())
+            model.feature = f['feature']
+            model.threshold = f['threshold']
+            model.value = f['value']
+        return model
@@ -0,0 +1,156 @@
+################################################################################
+# Name:    cover.py
+# Purpose: This module provides functions for aggregating binary canopy
+#          rasters to fractional canopy cover on coarse grids, e.g., 30 m
+#          NLCD-aligned grids.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import numpy as np
+from . import grid
+
+# Nodata values of fractional and percent canopy cover
+FRACTION_NODATA = -1
+PERCENT_NODATA = 255
+
+
+def coarse_extent(extent, cellsize, factor, origin):
+    '''
+    Expands the extent of a fine raster to the cells of a coarse grid.
+
+    Parameters
+    ----------
+        extent : tuple
+            (xmin, ymin, xmax, ymax) extent of the fine raster
+        cellsize : tuple
+            (width, height) fine resolution
+        factor : int
+            Number of fine cells per coarse cell in each direction
+        origin : tuple
+            (x, y) of any cell corner of the coarse grid, which has to be on
+            the fine grid
+
+    Returns
+    -------
+        extent, shape : tuple
+            (xmin, ymin, xmax, ymax) coarse extent and (rows, columns) of
+            coarse cells
+    '''
+    return grid.snap_extent(extent, origin, (cellsize[0] * factor,
+                                             cellsize[1] * factor))
+
+
+def coarse_counts(arr, factor, nodata=3):
+    '''
+    Counts the canopy and valid fine cells in each coarse cell of an array
+    whose dimensions are multiples of the factor.
+
+    Parameters
+    ----------
+        arr : numpy.ndarray
+            Canopy array aligned to the coarse grid
+        factor : int
+            Number of fine cells per coarse cell in each direction
+        nodata : int
+            Nodata value
+
+    Returns
+    -------
+        numpy.ndarray, numpy.ndarray
+            uint32 arrays of canopy and valid cell counts
+    '''
+    rows, cols = arr.shape[0] // factor, arr.shape[1] // factor
+    shape = (rows, factor, cols, factor)
+    canopy = (arr == 1).reshape(shape).sum(axis=(1, 3), dtype=np.uint32)
+    valid = (arr != nodata).reshape(shape).sum(axis=(1, 3), dtype=np.uint32)
+    return canopy, valid
+
+
+def cover(canopy, valid, percent=True):
+    '''
+    Computes canopy cover from canopy and valid cell counts. Coarse cells
+    without valid cells are nodata.
+
+    Parameters
+    ----------
+        canopy : numpy.ndarray
+            Canopy cell counts
+        valid : numpy.ndarray
+            Valid cell counts
+        percent : bool
+            True for rounded uint8 percent, False for float32 fraction
+
+    Returns
+    -------
+        numpy.ndarray
+            Canopy cover with PERCENT_NODATA or FRACTION_NODATA as nodata
+    '''
+    has_data = valid > 0
+    fraction = np.full(canopy.shape, FRACTION_NODATA, dtype=np.float32)
+    np.divide(canopy, valid, out=fraction, where=has_data)
+    if not percent:
+        return fraction
+    arr = np.full(canopy.shape, PERCENT_NODATA, dtype=np.uint8)
+    arr[has_data] = np.rint(fraction[has_data] * 100)
+    return arr
+
+
+def save_counts(path, extent, canopy, valid):
+    '''
+    Saves the canopy and valid cell counts of a region for merging.
+
+    Parameters
+    ----------
+        path : str
+            Path to the *.npz file
+        extent : tuple
+            (xmin, ymin, xmax, ymax) coarse extent
+        canopy : numpy.ndarray
+            Canopy cell counts
+        valid : numpy.ndarray
+            Valid cell counts
+    '''
+    tmp_path = '%s.tmp.npz' % path[:-4]
+    np.savez_compressed(tmp_path, extent=extent, canopy=canopy, valid=valid)
+    os.replace(tmp_path, path)
+
+
+def merge_counts(paths, cellsize):
+    '''
+    Merges the cell counts of regions onto their union on the coarse grid.
+    Counts are added, so coarse cells split by region borders get the canopy
+    cover of all their valid fine cells.
+
+    Parameters
+    ----------
+        paths : list
+            Paths to *.npz files saved by save_counts()
+        cellsize : tuple
+            (width, height) coarse resolution
+
+    Returns
+    -------
+        extent, canopy, valid : tuple
+            (xmin, ymin, xmax, ymax) union extent and uint32 arrays of canopy
+            and valid cell counts
+    '''
+    parts = []
+    for path in paths:
+        with np.load(path) as f:
+            parts.append((tuple(f['extent']), f['canopy'], f['valid']))
+    extent = (min(x[0][0] for x in parts), min(x[0][1] for x in parts),
+              max(x[0][2] for x in parts), max(x[0][3] for x in parts))
+    shape = (int(round((extent[3] - extent[1]) / cellsize[1])),
+             int(round((extent[2] - extent[0]) / cellsize[0])))
+    canopy = np.zeros(shape, dtype=np.uint32)
+    valid = np.zeros(shape, dtype=np.uint32)
+    for part_extent, part_canopy, part_valid in parts:
+        r0, r1, c0, c1 = grid.overlap_windows(extent, part_extent,
+                                              cellsize)[0]
+        canopy[r0:r1, c0:c1] += part_canopy
+        valid[r0:r1, c0:c1] += part_valid
+    return extent, canopy, valid
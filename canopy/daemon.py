@@ -0,0 +1,313 @@
+################################################################################
+# Name:    daemon.py
+# Purpose: This module provides a long-lived daemon that keeps arcpy, the
+#          layers, the snap grid, and a pool of worker processes loaded, and
+#          runs stage jobs sent over a local socket, e.g.,
+#            python -m canopy.daemon serve canopy_2019.cfg
+#            python -m canopy.daemon run clip_final_tiles --regions 8
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+import multiprocessing
+from .session import Session
+from . import blocks
+from . import planner
+
+# Default socket path
+SOCKET_PATH = os.path.join(os.path.expanduser('~'), '.canopy.sock')
+
+# Stages that jobs can run; all of them have iterator forms. Other methods,
+# e.g., gen_cfg() and reclaim_intermediates(), which write or delete files
+# at any path, cannot be run from the socket.
+STAGES = tuple(planner.STAGES) + (
+    'classify_naip_tiles', 'scan_clipped_final_tiles', 'patch_region_mosaics',
+    'correct_inverted_canopy_tif', 'aggregate_canopy_tif',
+    'build_history_stack')
+
+
+def _init_worker():
+    # Imports arcpy and the canopy module once per worker process instead of
+    # once per task
+    from . import canopy
+
+
+def _to_json(obj):
+    # Converts NumPy scalars and other objects that json cannot serialize
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+
+class Daemon:
+    '''
+    Object to keep a session and a pool of warm worker processes loaded and to
+    run stage jobs. A job is a dict with the stage name from STAGES, the
+    physiographic region IDs, and optionally the analysis year and stage
+    arguments, e.g.,
+    {"stage": "clip_final_tiles", "year": 2019, "regions": [8]}.
+
+    Attributes
+    ----------
+    session : session.Session
+        Session of the analysis years.
+    processes : int
+        Number of warm worker processes.
+
+    Methods
+    -------
+    run_job(job):
+        Runs a job and yields messages for the client.
+    close():
+        Stops the worker processes and releases the session.
+    '''
+
+    def __init__(self, config_paths, processes=0):
+        '''
+        Parameters
+        ----------
+            config_paths : list
+                Paths to the *.cfg files of analysis years
+            processes : int
+                Number of worker processes; 0 for the largest processes of
+                the configurations, or all CPUs if that is also 0
+        '''
+        self.session = Session(config_paths)
+        canopies = list(self.session.canopies.values())
+        self.processes = processes or max(x.processes for x in canopies) or \
+            os.cpu_count()
+        # read layers and the snap grid once so that jobs find them cached
+        for canopy in canopies:
+            self.session.get_region_names(canopy.phyregs_layer)
+            self.session.get_region_tiles(canopy.naipqq_layer,
+                                          canopy.naipqq_phyregs_field)
+            self.session.get_snap_grid(canopy.snaprast_path)
+        self.pool = None
+        if self.processes > 1:
+            blocks._set_executable()
+            self.pool = multiprocessing.Pool(self.processes, _init_worker)
+            blocks.set_pool(self.pool, self.processes)
+
+    def run_job(self, job):
+        '''
+        Runs a job and yields messages for the client. The iterator form of
+        the stage is used, so results are streamed as soon as each tile or
+        region is processed. The regions of the job are used only for the
+        job.
+
+        Parameters
+        ----------
+            job : dict
+                Job with stage and regions, and optionally year and args
+
+        Yields
+        ------
+            dict
+                planner.Result fields of each result, and {"status":
+                "finished", "seconds": ...} at the end
+        '''
+        start_time = time.time()
+        year = job.get('year')
+        if year is None:
+            if len(self.session.canopies) > 1:
+                raise ValueError('Year required for multiple analysis years')
+            year = next(iter(self.session.canopies))
+        canopy = self.session.canopies[int(year)]
+        stage = job.get('stage')
+        if stage not in STAGES:
+            raise ValueError('Unknown stage %s' % stage)
+        if not job.get('regions'):
+            raise ValueError('Regions required')
+        args = job.get('args', [])
+        # restore the regions of the shared canopy object after the job
+        phyreg_ids = getattr(canopy, 'phyreg_ids', None)
+        try:
+            canopy.regions(job['regions'])
+            for result in getattr(canopy, 'iter_%s' % stage)(*args):
+                yield result._asdict()
+        finally:
+            canopy.phyreg_ids = phyreg_ids
+        yield {'status': 'finished', 'seconds': time.time() - start_time}
+
+    def close(self):
+        '''
+        Stops the worker processes and releases the session.
+        '''
+        blocks.set_pool(None)
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        self.session.close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # Reads one JSON job per connection and writes JSON messages line by line
+
+    def __send(self, message):
+        self.wfile.write(json.dumps(message, default=_to_json).encode() +
+                         b'\n')
+        self.wfile.flush()
+
+    def handle(self):
+        try:
+            job = json.loads(self.rfile.readline())
+            if not isinstance(job, dict):
+                raise ValueError('not an object')
+        except ValueError as e:
+            self.__send({'error': 'bad job: %s' % e})
+            return
+        daemon = self.server.canopy_daemon
+        command = job.get('command')
+        if command == 'ping':
+            self.__send({'status': 'ready', 'pid': os.getpid(),
+                         'years': sorted(daemon.session.canopies),
+                         'processes': daemon.processes})
+            return
+        if command == 'shutdown':
+            self.__send({'status': 'shutting down'})
+            threading.Thread(target=self.server.shutdown).start()
+            return
+        try:
+            for message in daemon.run_job(job):
+                self.__send(message)
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            self.__send({'error': '%s: %s' % (type(e).__name__, e)})
+
+
+def _make_server(address, port):
+    # Creates a server on a Unix socket, or on a local TCP port if a port is
+    # given or Unix sockets are not available
+    if port or not hasattr(socket, 'AF_UNIX'):
+        return socketserver.TCPServer(('127.0.0.1', port or 8765), _Handler)
+    if os.path.exists(address):
+        # remove the socket of a daemon that did not exit cleanly
+        try:
+            with socket.socket(socket.AF_UNIX) as sock:
+                sock.connect(address)
+        except ConnectionRefusedError:
+            os.remove(address)
+        else:
+            raise OSError('Daemon already running on %s' % address)
+    return socketserver.UnixStreamServer(address, _Handler)
+
+
+def serve(config_paths, address=SOCKET_PATH, port=None, processes=0):
+    '''
+    Runs the daemon until it receives a shutdown command or is interrupted.
+    Jobs are run one at a time in the order in which they arrive.
+
+    Parameters
+    ----------
+        config_paths : list
+            Paths to the *.cfg files of analysis years
+        address : str
+            Path to the Unix socket
+        port : int
+            Local TCP port to listen on instead of the Unix socket
+        processes : int
+            Number of warm worker processes; 0 for the configurations
+    '''
+    daemon = Daemon(config_paths, processes)
+    server = _make_server(address, port)
+    server.canopy_daemon = daemon
+    print('CanoPy daemon ready on %s with %d processes' % (
+        'port %d' % server.server_address[1] if port else address,
+        daemon.processes))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if not port and os.path.exists(address):
+            os.remove(address)
+        daemon.close()
+
+
+def submit(job, address=SOCKET_PATH, port=None):
+    '''
+    Sends a job to the daemon and yields its messages as they arrive.
+
+    Parameters
+    ----------
+        job : dict
+            Job or command, e.g., {"stage": "clip_final_tiles",
+            "regions": [8]} or {"command": "ping"}
+        address : str
+            Path to the Unix socket
+        port : int
+            Local TCP port of the daemon instead of the Unix socket
+
+    Yields
+    ------
+        dict
+            Messages of the daemon
+    '''
+    if port or not hasattr(socket, 'AF_UNIX'):
+        sock = socket.create_connection(('127.0.0.1', port or 8765))
+    else:
+        sock = socket.socket(socket.AF_UNIX)
+        sock.connect(address)
+    with sock, sock.makefile('rwb') as f:
+        f.write(json.dumps(job).encode() + b'\n')
+        f.flush()
+        for line in f:
+            message = json.loads(line)
+            if 'error' in message:
+                raise RuntimeError(message['error'])
+            yield message
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m canopy.daemon',
+            description='Runs CanoPy stages in a warm daemon.')
+    parser.add_argument('--socket', default=SOCKET_PATH,
+                        help='path to the Unix socket')
+    parser.add_argument('--port', type=int,
+                        help='local TCP port instead of the Unix socket')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='start the daemon')
+    serve_parser.add_argument('configs', nargs='+',
+                              help='paths to the *.cfg files')
+    serve_parser.add_argument('--processes', type=int, default=0,
+                              help='number of warm worker processes')
+    run_parser = commands.add_parser('run', help='run a stage')
+    run_parser.add_argument('stage', choices=STAGES, help='stage name')
+    run_parser.add_argument('--year', type=int, help='analysis year')
+    run_parser.add_argument('--regions', nargs='+', type=int, required=True,
+                            help='physiographic region IDs')
+    run_parser.add_argument('--args', help='stage arguments as a JSON list')
+    commands.add_parser('ping', help='check the daemon')
+    commands.add_parser('shutdown', help='stop the daemon')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        serve(args.configs, args.socket, args.port, args.processes)
+        return
+    if args.command == 'run':
+        job = {'stage': args.stage, 'regions': args.regions}
+        if args.year:
+            job['year'] = args.year
+        if args.args:
+            job['args'] = json.loads(args.args)
+    else:
+        job = {'command': args.command}
+    for message in submit(job, args.socket, args.port):
+        print(json.dumps(message))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
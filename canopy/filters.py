@@ -0,0 +1,170 @@
+################################################################################
+# Name:    filters.py
+# Purpose: This module provides array filters for cleaning up canopy rasters
+#          block by block.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+from scipy import ndimage
+
+
+def neighbor_counts(mask):
+    '''
+    Counts the cells that are True among the 8 neighbors of each cell.
+
+    Parameters
+    ----------
+        mask : numpy.ndarray
+            Boolean array
+
+    Returns
+    -------
+        numpy.ndarray
+            Array of counts
+    '''
+    m = np.pad(mask, 1).astype(np.uint8)
+    rows, cols = mask.shape
+    counts = np.zeros(mask.shape, dtype=np.uint8)
+    for i in range(3):
+        for j in range(3):
+            if i != 1 or j != 1:
+                counts += m[i:i + rows, j:j + cols]
+    return counts
+
+
+def fill_gaps(arr, max_gap_size, nodata=3):
+    '''
+    Fills gaps, which are nodata holes enclosed by valid cells, with the
+    majority value of their valid neighbors. Holes are filled from their edges
+    inward until they are closed. Nodata cells connected to the array edges
+    are not gaps because they can be outside the region boundary, and holes
+    whose rows or columns exceed max_gap_size are left unfilled. Therefore,
+    an array with a halo of max_gap_size + 1 cells around a block yields the
+    same result for the block as the entire raster does.
+
+    Parameters
+    ----------
+        arr : numpy.ndarray
+            Array with class values from 0 to nodata - 1
+        max_gap_size : int
+            Maximum number of rows or columns of a gap to fill
+        nodata : int
+            Nodata value
+
+    Returns
+    -------
+        numpy.ndarray, int
+            Filled array and number of filled cells
+    '''
+    arr = arr.copy()
+    labels, nlabels = ndimage.label(arr >= nodata)
+    if nlabels == 0:
+        return arr, 0
+
+    # labels of nodata cells touching the array edges are not gaps
+    edge = np.concatenate((labels[0], labels[-1], labels[:, 0],
+                           labels[:, -1]))
+    is_gap = np.ones(nlabels + 1, dtype=bool)
+    is_gap[0] = False
+    is_gap[edge] = False
+    for i, sl in enumerate(ndimage.find_objects(labels)):
+        if (sl[0].stop - sl[0].start > max_gap_size or
+                sl[1].stop - sl[1].start > max_gap_size):
+            is_gap[i + 1] = False
+    gaps = is_gap[labels]
+
+    count = 0
+    while gaps.any():
+        valid = arr < nodata
+        counts = np.stack([neighbor_counts(arr == k) for k in range(nodata)])
+        front = gaps & (neighbor_counts(valid) > 0)
+        if not front.any():
+            break
+        # ties go to the smaller class value
+        arr[front] = counts.argmax(axis=0)[front]
+        gaps &= ~front
+        count += int(front.sum())
+    return arr, count
+
+
+def sieve(arr, min_size, connectivity=8, nodata=3):
+    '''
+    Removes patches of connected cells with the same class value smaller than
+    min_size cells. Each small patch takes the most common value of the valid
+    cells adjacent to it, and patches surrounded by nodata only are kept.
+    Patches of the same class are never adjacent, so the small patches of one
+    class are replaced at once, and patches are labelled again before the
+    next class until no small patch is left. A small patch nested in another
+    small patch is therefore merged with it instead of swapping classes with
+    it. For canopy and noncanopy, small noncanopy patches join canopy
+    patches, and then small canopy patches, including those joined, join
+    noncanopy patches, none of which are small, so one pass over the classes
+    leaves no small patches. A small patch spans fewer than min_size rows and
+    columns, so whether a patch is small after the first class can be told
+    within 2 * min_size cells, and an array with a halo of 2 * min_size cells
+    around a block yields the same result for the block as the entire raster
+    does.
+
+    Parameters
+    ----------
+        arr : numpy.ndarray
+            Array with class values from 0 to nodata - 1
+        min_size : int
+            Minimum number of cells in a patch
+        connectivity : int
+            4 or 8 neighbors for connecting cells
+        nodata : int
+            Nodata value
+
+    Returns
+    -------
+        numpy.ndarray, int
+            Sieved array and number of changed cells
+    '''
+    out = arr.copy()
+    if min_size <= 1:
+        return out, 0
+    structure = ndimage.generate_binary_structure(2, 1 if connectivity == 4
+                                                  else 2)
+    rows, cols = arr.shape
+    shifts = [(i, j) for i in range(3) for j in range(3)
+              if (i != 1 or j != 1) and structure[i, j]]
+
+    changed = True
+    while changed:
+        changed = False
+        for k in range(nodata):
+            labels, nlabels = ndimage.label(out == k, structure)
+            if nlabels == 0:
+                continue
+            sizes = np.bincount(labels.ravel())
+            small = sizes < min_size
+            small[0] = False
+            if not small.any():
+                continue
+
+            # count the values of valid cells adjacent to small patches by
+            # label
+            padded = np.pad(out, 1, constant_values=nodata)
+            patch = small[labels]
+            patch_labels = labels[patch]
+            adjacent_counts = np.zeros((nlabels + 1) * nodata,
+                                       dtype=np.int64)
+            for i, j in shifts:
+                values = padded[i:i + rows, j:j + cols][patch]
+                adjacent = (values < nodata) & (values != k)
+                adjacent_counts += np.bincount(
+                    patch_labels[adjacent] * nodata + values[adjacent],
+                    minlength=len(adjacent_counts))
+            adjacent_counts = adjacent_counts.reshape(nlabels + 1, nodata)
+            replace = adjacent_counts.argmax(axis=1)
+            # keep patches without valid neighbors
+            replace[adjacent_counts.max(axis=1) == 0] = k
+
+            out[patch] = replace[patch_labels]
+            changed |= bool((out[patch] != k).any())
+    return out, int((out != arr).sum())
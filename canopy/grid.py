@@ -0,0 +1,387 @@
+################################################################################
+# Name:    grid.py
+# Purpose: This module provides snap grid arithmetic for computing the pixel
+#          windows and masks of polygon footprints without invoking
+#          geoprocessing tools.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import math
+import numpy as np
+
+
+def ring_bbox(ring):
+    '''
+    Returns the bounding box of a ring.
+
+    Parameters
+    ----------
+        ring : list
+            list of (x, y) vertices
+
+    Returns
+    -------
+        xmin, ymin, xmax, ymax
+    '''
+    xs = [p[0] for p in ring]
+    ys = [p[1] for p in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def is_convex(ring):
+    '''
+    Checks if a ring is a convex polygon. Collinear vertices and the closing
+    vertex are allowed.
+
+    Parameters
+    ----------
+        ring : list
+            list of (x, y) vertices
+
+    Returns
+    -------
+        bool
+    '''
+    pts = np.asarray(ring, dtype=float)
+    if len(pts) > 1 and np.allclose(pts[0], pts[-1]):
+        pts = pts[:-1]
+    if len(pts) < 3:
+        return False
+    d1 = np.roll(pts, -1, axis=0) - pts
+    d2 = np.roll(d1, -1, axis=0)
+    cross = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+    cross = cross[np.abs(cross) > 1e-12 * np.abs(d1).max() ** 2]
+    return len(cross) > 0 and (np.all(cross > 0) or np.all(cross < 0))
+
+
+def cell_window(extent, cellsize, shape, bbox):
+    '''
+    Calculates the row and column window of the cells in a raster whose
+    centers fall within a bounding box.
+
+    Parameters
+    ----------
+        extent : tuple
+            (xmin, ymin, xmax, ymax) raster extent
+        cellsize : tuple
+            (width, height) raster resolution
+        shape : tuple
+            (rows, columns) raster dimensions
+        bbox : tuple
+            (xmin, ymin, xmax, ymax) bounding box
+
+    Returns
+    -------
+        row_start, row_end, col_start, col_end (end exclusive)
+    '''
+    w, h = cellsize
+    rows, cols = shape
+    c0 = math.ceil((bbox[0] - extent[0]) / w - 0.5)
+    c1 = math.floor((bbox[2] - extent[0]) / w - 0.5) + 1
+    r0 = math.ceil((extent[3] - bbox[3]) / h - 0.5)
+    r1 = math.floor((extent[3] - bbox[1]) / h - 0.5) + 1
+    r0 = min(max(r0, 0), rows)
+    r1 = min(max(r1, r0), rows)
+    c0 = min(max(c0, 0), cols)
+    c1 = min(max(c1, c0), cols)
+    return r0, r1, c0, c1
+
+
+def convex_row_spans(ring, y):
+    '''
+    Calculates the x interval of a convex ring along horizontal lines.
+
+    Parameters
+    ----------
+        ring : list
+            list of (x, y) vertices of a convex ring
+        y : numpy.ndarray
+            y coordinates of horizontal lines
+
+    Returns
+    -------
+        xl, xr : numpy.ndarray
+            left and right ends of the intervals; xl > xr where a line misses
+            the ring
+    '''
+    pts = np.asarray(ring, dtype=float)
+    x0, y0 = pts[:, 0], pts[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    y = np.asarray(y, dtype=float)[:, None]
+    # half-open edges so that shared vertices are counted once
+    crosses = ((y0 <= y) & (y < y1)) | ((y1 <= y) & (y < y0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    xl = np.where(crosses, x, np.inf).min(axis=1)
+    xr = np.where(crosses, x, -np.inf).max(axis=1)
+    return xl, xr
+
+
+def convex_footprint_mask(extent, cellsize, window, ring):
+    '''
+    Creates a mask of the cells within a window whose centers fall inside a
+    convex ring, which is the same cell selection ExtractByMask makes. The
+    ring covers one span of cells per row, so only the two ends of each span
+    are computed from the ring edges and no per-cell test is needed.
+
+    Parameters
+    ----------
+        extent : tuple
+            (xmin, ymin, xmax, ymax) raster extent
+        cellsize : tuple
+            (width, height) raster resolution
+        window : tuple
+            (row_start, row_end, col_start, col_end) window from cell_window()
+        ring : list
+            list of (x, y) vertices of a convex ring
+
+    Returns
+    -------
+        numpy.ndarray
+            boolean mask of the window
+    '''
+    w, h = cellsize
+    r0, r1, c0, c1 = window
+    yc = extent[3] - (np.arange(r0, r1) + 0.5) * h
+    xl, xr = convex_row_spans(ring, yc)
+    with np.errstate(invalid='ignore'):
+        start = np.ceil((xl - extent[0]) / w - 0.5)
+        end = np.floor((xr - extent[0]) / w - 0.5) + 1
+    cols = np.arange(c0, c1)
+    return (cols >= start[:, None]) & (cols < end[:, None])
+
+
+def snap_extent(bbox, origin, cellsize):
+    '''
+    Expands a bounding box outward to the cell boundaries of a grid.
+
+    Parameters
+    ----------
+        bbox : tuple
+            (xmin, ymin, xmax, ymax) bounding box
+        origin : tuple
+            (x, y) of any cell corner of the grid
+        cellsize : tuple
+            (width, height) grid resolution
+
+    Returns
+    -------
+        extent, shape : tuple
+            (xmin, ymin, xmax, ymax) snapped extent and (rows, columns)
+    '''
+    w, h = cellsize
+    c0 = math.floor((bbox[0] - origin[0]) / w)
+    c1 = math.ceil((bbox[2] - origin[0]) / w)
+    r0 = math.floor((origin[1] - bbox[3]) / h)
+    r1 = math.ceil((origin[1] - bbox[1]) / h)
+    extent = (origin[0] + c0 * w, origin[1] - r1 * h, origin[0] + c1 * w,
+              origin[1] - r0 * h)
+    return extent, (r1 - r0, c1 - c0)
+
+
+def overlap_windows(extent1, extent2, cellsize):
+    '''
+    Computes the windows of the overlap of two rasters on the same grid.
+
+    Parameters
+    ----------
+        extent1 : tuple
+            (xmin, ymin, xmax, ymax) extent of the first raster
+        extent2 : tuple
+            (xmin, ymin, xmax, ymax) extent of the second raster
+        cellsize : tuple
+            (width, height) grid resolution
+
+    Returns
+    -------
+        tuple
+            (row_start, row_end, col_start, col_end) windows of the overlap
+            in the first and second rasters, or None if they do not overlap
+    '''
+    xmin = max(extent1[0], extent2[0])
+    ymin = max(extent1[1], extent2[1])
+    xmax = min(extent1[2], extent2[2])
+    ymax = min(extent1[3], extent2[3])
+
+    def window(extent):
+        return (int(round((extent[3] - ymax) / cellsize[1])),
+                int(round((extent[3] - ymin) / cellsize[1])),
+                int(round((xmin - extent[0]) / cellsize[0])),
+                int(round((xmax - extent[0]) / cellsize[0])))
+
+    window1 = window(extent1)
+    if window1[0] >= window1[1] or window1[2] >= window1[3]:
+        return None
+    return window1, window(extent2)
+
+
+def polygon_edges(polygons):
+    '''
+    Collects the edges of polygons.
+
+    Parameters
+    ----------
+        polygons : list
+            List of (rings, value) where rings is a list of rings of (x, y)
+            vertices including both exterior and interior rings
+
+    Returns
+    -------
+        edges, values : numpy.ndarray
+            (x0, y0, x1, y1, polygon index) of edges and polygon values
+    '''
+    edges = []
+    values = np.empty(len(polygons))
+    for i, (rings, value) in enumerate(polygons):
+        values[i] = value
+        for ring in rings:
+            pts = np.asarray(ring, dtype=float)
+            if len(pts) < 3:
+                continue
+            # rings are closed implicitly
+            nxt = np.roll(pts, -1, axis=0)
+            e = np.empty((len(pts), 5))
+            e[:, 0:2] = pts
+            e[:, 2:4] = nxt
+            e[:, 4] = i
+            edges.append(e)
+    if edges:
+        edges = np.concatenate(edges)
+    else:
+        edges = np.empty((0, 5))
+    return edges, values
+
+
+def polygon_spans(edges, extent, cellsize, shape):
+    '''
+    Calculates the spans of cells whose centers fall inside polygons using
+    the even-odd rule along the center line of each row. All polygons are
+    processed together with sorting instead of looping over polygons.
+
+    Parameters
+    ----------
+        edges : numpy.ndarray
+            Edges from polygon_edges()
+        extent : tuple
+            (xmin, ymin, xmax, ymax) raster extent
+        cellsize : tuple
+            (width, height) raster resolution
+        shape : tuple
+            (rows, columns) raster dimensions
+
+    Returns
+    -------
+        rows, col_starts, col_ends, polygon_indices : numpy.ndarray
+            Spans of cells with exclusive column ends
+    '''
+    w, h = cellsize
+    nrows, ncols = shape
+    x0, y0, x1, y1, poly = edges.T
+    ylo = np.minimum(y0, y1)
+    yhi = np.maximum(y0, y1)
+    # rows whose center line y satisfies ylo <= y < yhi
+    r_start = np.maximum(np.floor((extent[3] - yhi) / h - 0.5) + 1, 0)
+    r_end = np.minimum(np.floor((extent[3] - ylo) / h - 0.5), nrows - 1)
+    counts = np.maximum(r_end - r_start + 1, 0).astype(np.int64)
+    total = counts.sum()
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty
+
+    idx = np.repeat(np.arange(len(edges)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    rows = (r_start[idx] + offsets).astype(np.int64)
+    y = extent[3] - (rows + 0.5) * h
+    x = x0[idx] + (y - y0[idx]) * (x1[idx] - x0[idx]) / (y1[idx] - y0[idx])
+    poly = poly[idx].astype(np.int64)
+
+    # every polygon crosses each row an even number of times, so consecutive
+    # crossings sorted by polygon, row, and x form spans
+    order = np.lexsort((x, rows, poly))
+    rows = rows[order][0::2]
+    poly = poly[order][0::2]
+    x = x[order]
+    # half-open spans so that shared edges do not overlap
+    starts = np.ceil((x[0::2] - extent[0]) / w - 0.5)
+    ends = np.ceil((x[1::2] - extent[0]) / w - 0.5)
+    starts = np.clip(starts, 0, ncols).astype(np.int64)
+    ends = np.clip(ends, 0, ncols).astype(np.int64)
+    keep = starts < ends
+    return rows[keep], starts[keep], ends[keep], poly[keep]
+
+
+def iter_rasterized_bands(polygons, extent, cellsize, shape, band_rows=1024):
+    '''
+    Rasterizes non-overlapping polygons by cell centers in bands of rows.
+
+    Parameters
+    ----------
+        polygons : list
+            List of (rings, value) where rings is a list of rings of (x, y)
+            vertices and value is a positive integer
+        extent : tuple
+            (xmin, ymin, xmax, ymax) raster extent
+        cellsize : tuple
+            (width, height) raster resolution
+        shape : tuple
+            (rows, columns) raster dimensions
+        band_rows : int
+            Number of rows in a band
+
+    Yields
+    ------
+        row_start, band : int, numpy.ndarray
+            First row and values of each band where 0 is outside polygons
+    '''
+    nrows, ncols = shape
+    edges, values = polygon_edges(polygons)
+    rows, starts, ends, poly = polygon_spans(edges, extent, cellsize, shape)
+    order = np.argsort(rows, kind='stable')
+    rows, starts, ends = rows[order], starts[order], ends[order]
+    span_values = values[poly[order]] if len(poly) else values[:0]
+    bounds = np.searchsorted(rows, np.arange(0, nrows + band_rows, band_rows))
+    for b, r0 in enumerate(range(0, nrows, band_rows)):
+        r1 = min(r0 + band_rows, nrows)
+        i, j = bounds[b], bounds[b + 1]
+        # paint spans with a difference array along each row
+        base = (rows[i:j] - r0) * (ncols + 1)
+        diff = np.bincount(np.concatenate((base + starts[i:j],
+                                           base + ends[i:j])),
+                           np.concatenate((span_values[i:j],
+                                           -span_values[i:j])),
+                           minlength=(r1 - r0) * (ncols + 1))
+        band = np.cumsum(diff.reshape(r1 - r0, ncols + 1), axis=1)[:, :ncols]
+        yield r0, np.rint(band).astype(np.int64)
+
+
+def rasterize_polygons(polygons, extent, cellsize, shape, dtype=np.uint8):
+    '''
+    Rasterizes non-overlapping polygons by cell centers, which is the same
+    cell selection FeatureToRaster makes.
+
+    Parameters
+    ----------
+        polygons : list
+            List of (rings, value) where rings is a list of rings of (x, y)
+            vertices and value is a positive integer
+        extent : tuple
+            (xmin, ymin, xmax, ymax) raster extent
+        cellsize : tuple
+            (width, height) raster resolution
+        shape : tuple
+            (rows, columns) raster dimensions
+        dtype : numpy.dtype
+            Data type of the output array
+
+    Returns
+    -------
+        numpy.ndarray
+            Array of polygon values where 0 is outside polygons
+    '''
+    arr = np.zeros(shape, dtype=dtype)
+    for r0, band in iter_rasterized_bands(polygons, extent, cellsize, shape):
+        arr[r0:r0 + len(band)] = band
+    return arr
@@ -0,0 +1,181 @@
+################################################################################
+# Name:    history.py
+# Purpose: This module provides a compact multi-year canopy history stack that
+#          packs the canopy and validity of up to 8 analysis years into the
+#          bits of one uint16 per cell, and vectorized queries of it.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import json
+import numpy as np
+
+# Maximum number of years in a stack; bit i is canopy and bit VALID_SHIFT + i
+# is validity in year i
+MAX_YEARS = 8
+VALID_SHIFT = 8
+
+# Stack value of cells without any valid years
+NODATA = 0
+
+# Number of set bits in each byte
+_POPCOUNT = np.array([bin(x).count('1') for x in range(256)], dtype=np.uint8)
+
+
+def encode(arrays, inverted=None, nodata=3):
+    '''
+    Packs the canopy arrays of years into a history stack.
+
+    Parameters
+    ----------
+        arrays : list
+            Canopy arrays of the same shape in the order of years, with
+            noncanopy 0, canopy 1, and nodata
+        inverted : list
+            True for years whose arrays have canopy 0 and noncanopy 1
+        nodata : int
+            Nodata value of the canopy arrays
+
+    Returns
+    -------
+        numpy.ndarray
+            uint16 history stack
+    '''
+    if len(arrays) > MAX_YEARS:
+        raise ValueError('At most %d years can be stacked' % MAX_YEARS)
+    if inverted is None:
+        inverted = [False] * len(arrays)
+    stack = np.zeros(arrays[0].shape, dtype=np.uint16)
+    for i, arr in enumerate(arrays):
+        valid = arr != nodata
+        canopy = valid & (arr == (0 if inverted[i] else 1))
+        stack |= canopy.astype(np.uint16) << i
+        stack |= valid.astype(np.uint16) << (VALID_SHIFT + i)
+    return stack
+
+
+def decode(stack, nyears, nodata=3):
+    '''
+    Unpacks the per-cell history of a history stack.
+
+    Parameters
+    ----------
+        stack : numpy.ndarray
+            History stack
+        nyears : int
+            Number of years in the stack
+        nodata : int
+            Value of cells not valid in a year
+
+    Returns
+    -------
+        numpy.ndarray
+            (years, rows, columns) uint8 canopy with noncanopy 0, canopy 1,
+            and nodata
+    '''
+    history = np.empty((nyears,) + stack.shape, dtype=np.uint8)
+    for i in range(nyears):
+        history[i] = np.where((stack >> (VALID_SHIFT + i)) & 1,
+                              (stack >> i) & 1, nodata)
+    return history
+
+
+def persistence(stack):
+    '''
+    Counts the years in which cells are canopy and valid.
+
+    Parameters
+    ----------
+        stack : numpy.ndarray
+            History stack
+
+    Returns
+    -------
+        numpy.ndarray, numpy.ndarray
+            uint8 numbers of canopy years and valid years
+    '''
+    valid = (stack >> VALID_SHIFT).astype(np.uint8)
+    canopy = (stack & 0xff).astype(np.uint8) & valid
+    return _POPCOUNT[canopy], _POPCOUNT[valid]
+
+
+def first_loss(stack, years):
+    '''
+    Finds the first year in which cells that were canopy in their previous
+    valid year are noncanopy. Years in which cells are not valid are skipped.
+
+    Parameters
+    ----------
+        stack : numpy.ndarray
+            History stack
+        years : list
+            Years in the stack
+
+    Returns
+    -------
+        numpy.ndarray
+            int16 years of the first loss, or 0 for cells without loss
+    '''
+    loss = np.zeros(stack.shape, dtype=np.int16)
+    # canopy in the previous valid year
+    was_canopy = np.zeros(stack.shape, dtype=bool)
+    for i, year in enumerate(years):
+        valid = ((stack >> (VALID_SHIFT + i)) & 1).astype(bool)
+        canopy = ((stack >> i) & 1).astype(bool)
+        loss[(loss == 0) & valid & was_canopy & ~canopy] = year
+        was_canopy = np.where(valid, canopy, was_canopy)
+    return loss
+
+
+def get_years_path(history_path):
+    '''
+    Returns the path to the JSON file with the years of a history stack
+    raster.
+
+    Parameters
+    ----------
+        history_path : str
+            Path to the history stack raster
+
+    Returns
+    -------
+        str
+            Path to the JSON file
+    '''
+    return '%s.json' % os.path.splitext(history_path)[0]
+
+
+def save_years(history_path, years):
+    '''
+    Saves the years of a history stack raster next to it.
+
+    Parameters
+    ----------
+        history_path : str
+            Path to the history stack raster
+        years : list
+            Years in the stack in the order of bits
+    '''
+    with open(get_years_path(history_path), 'w') as f:
+        json.dump({'years': list(years), 'valid_shift': VALID_SHIFT}, f)
+
+
+def read_years(history_path):
+    '''
+    Reads the years of a history stack raster.
+
+    Parameters
+    ----------
+        history_path : str
+            Path to the history stack raster
+
+    Returns
+    -------
+        list
+            Years in the stack in the order of bits
+    '''
+    with open(get_years_path(history_path)) as f:
+        return json.load(f)['years']
@@ -0,0 +1,163 @@
+################################################################################
+# Name:    inversion.py
+# Purpose: This module provides functions for detecting final tiles whose
+#          canopy and noncanopy classes were inverted by Feature Analyst from
+#          their agreement with overlapping tiles and an NDVI proxy.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+
+
+def agreement(arr1, arr2, nodata=3):
+    '''
+    Counts the cells of two overlapping canopy arrays that agree.
+
+    Parameters
+    ----------
+        arr1 : numpy.ndarray
+            Canopy array of the overlap in the first tile
+        arr2 : numpy.ndarray
+            Canopy array of the overlap in the second tile
+        nodata : int
+            Nodata value
+
+    Returns
+    -------
+        int, int
+            Number of agreeing cells and number of cells valid in both arrays
+    '''
+    valid = (arr1 < nodata) & (arr2 < nodata)
+    return int((arr1[valid] == arr2[valid]).sum()), int(valid.sum())
+
+
+def ndvi_contrast(arr, values, valid, nodata=3):
+    '''
+    Sums the NDVI of canopy and noncanopy cells. Canopy cells are expected to
+    have a higher mean NDVI than noncanopy cells unless the tile is inverted.
+
+    Parameters
+    ----------
+        arr : numpy.ndarray
+            Canopy array
+        values : numpy.ndarray
+            NDVI array of the same shape
+        valid : numpy.ndarray
+            Boolean array of valid NDVI cells
+        nodata : int
+            Nodata value
+
+    Returns
+    -------
+        numpy.ndarray
+            [canopy NDVI sum, canopy count, noncanopy NDVI sum, noncanopy
+            count] to be accumulated block by block
+    '''
+    canopy = valid & (arr == 1)
+    noncanopy = valid & (arr == 0)
+    return np.array([values[canopy].sum(), canopy.sum(),
+                     values[noncanopy].sum(), noncanopy.sum()])
+
+
+def contrast_score(sums, min_cells=1000, scale=0.1):
+    '''
+    Scores the NDVI evidence of a tile from accumulated ndvi_contrast() sums.
+
+    Parameters
+    ----------
+        sums : numpy.ndarray
+            Accumulated ndvi_contrast() sums
+        min_cells : int
+            Minimum number of canopy and noncanopy cells for any evidence
+        scale : float
+            NDVI difference for full confidence
+
+    Returns
+    -------
+        float
+            Score from -1 (inverted) to 1 (correct); 0 for no evidence
+    '''
+    if min(sums[1], sums[3]) < min_cells:
+        return 0.0
+    diff = sums[0] / sums[1] - sums[2] / sums[3]
+    return float(np.clip(diff / scale, -1, 1))
+
+
+def _find(parent, parity, i):
+    # Returns the root of a tile in the union-find forest and the parity of
+    # the tile relative to the root, compressing the path
+    path = []
+    while parent[i] != i:
+        path.append(i)
+        i = parent[i]
+    root = i
+    p = 0
+    for j in reversed(path):
+        p ^= parity[j]
+        parity[j] = p
+        parent[j] = root
+    return root, parity[path[0]] if path else 0
+
+
+def detect_inverted(scores, pairs, agreements, iterations=50):
+    '''
+    Detects inverted tiles from their NDVI scores and the agreement of
+    overlapping tile pairs. Each tile is either correct (+1) or inverted (-1).
+    A pair with agreement above 0.5 favors the same state for both tiles and
+    one below 0.5 favors opposite states. Tiles are first linked by their
+    strongest pairs into trees whose relative states follow the pairs, and
+    each tree takes the orientation its NDVI scores favor. Then, the state of
+    every tile is updated to the sign of its NDVI score plus the agreement
+    terms of all its pairs until no state changes.
+
+    Parameters
+    ----------
+        scores : numpy.ndarray
+            contrast_score() of each tile
+        pairs : numpy.ndarray
+            (n, 2) array of overlapping tile indices
+        agreements : numpy.ndarray
+            Fraction of agreeing cells of each pair; nan for no evidence
+        iterations : int
+            Maximum number of updates
+
+    Returns
+    -------
+        numpy.ndarray
+            Boolean array of inverted tiles
+    '''
+    scores = np.asarray(scores, dtype=float)
+    n = len(scores)
+    pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+    weights = np.nan_to_num(2 * np.asarray(agreements, dtype=float) - 1)
+
+    # maximum spanning forest with relative parities
+    parent = list(range(n))
+    parity = [0] * n
+    for k in np.argsort(-np.abs(weights)):
+        if weights[k] == 0:
+            break
+        root1, parity1 = _find(parent, parity, pairs[k, 0])
+        root2, parity2 = _find(parent, parity, pairs[k, 1])
+        if root1 != root2:
+            parent[root2] = root1
+            parity[root2] = parity1 ^ parity2 ^ int(weights[k] < 0)
+    roots, parities = np.array([_find(parent, parity, i) for i in
+                                range(n)], dtype=int).reshape(-1, 2).T
+    relative = 1 - 2 * parities
+    orientation = np.bincount(roots, scores * relative, n)
+    state = np.where(orientation[roots] < 0, -relative, relative)
+
+    for _ in range(iterations):
+        field = scores.copy()
+        field += np.bincount(pairs[:, 0], weights * state[pairs[:, 1]], n)
+        field += np.bincount(pairs[:, 1], weights * state[pairs[:, 0]], n)
+        # ties keep their states
+        new_state = np.where(field > 0, 1, np.where(field < 0, -1, state))
+        if (new_state == state).all():
+            break
+        state = new_state
+    return state < 0
@@ -0,0 +1,281 @@
+################################################################################
+# Name:    masks.py
+# Purpose: This module provides region masks rasterized once onto the snap
+#          grid, stored bit-packed with their pixel windows, and cached on
+#          disk by region geometry and grid.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import hashlib
+import numpy as np
+from . import grid
+
+
+def grid_spec(origin, cellsize):
+    '''
+    Normalizes a snap grid so that any cell corner of the same grid gives the
+    same specification.
+
+    Parameters
+    ----------
+        origin : tuple
+            (x, y) of any cell corner of the grid
+        cellsize : tuple
+            (width, height) grid resolution
+
+    Returns
+    -------
+        tuple
+            (x, y, width, height) with x and y in [0, width) and [0, height)
+    '''
+    return (round(origin[0] % cellsize[0], 6), round(origin[1] % cellsize[1],
+            6), round(cellsize[0], 9), round(cellsize[1], 9))
+
+
+def mask_key(rings, origin, cellsize):
+    '''
+    Computes the cache key of a region mask from the region geometry and the
+    grid.
+
+    Parameters
+    ----------
+        rings : list
+            List of (n, 2) arrays of ring vertices
+        origin : tuple
+            (x, y) of any cell corner of the grid
+        cellsize : tuple
+            (width, height) grid resolution
+
+    Returns
+    -------
+        str
+            Hexadecimal SHA-1 digest
+    '''
+    sha1 = hashlib.sha1(repr(grid_spec(origin, cellsize)).encode())
+    for ring in rings:
+        sha1.update(np.ascontiguousarray(ring, dtype=np.float64).tobytes())
+    return sha1.hexdigest()
+
+
+class RegionMask:
+    '''
+    Object to hold a bit-packed region mask with its window on the snap grid.
+
+    Attributes
+    ----------
+    bits : numpy.ndarray
+        uint8 array of packed rows where bit 1 is inside the region.
+    extent : tuple
+        (xmin, ymin, xmax, ymax) extent of the mask.
+    cellsize : tuple
+        (width, height) grid resolution.
+    shape : tuple
+        (rows, columns) dimensions of the mask.
+    key : str
+        Cache key from mask_key(), or None.
+
+    Methods
+    -------
+    window(extent):
+        Returns the mask for an extent on the same grid.
+    apply(arr, extent, nodata):
+        Sets cells outside the region to nodata.
+    '''
+
+    def __init__(self, bits, extent, cellsize, shape, key=None):
+        '''
+        Parameters
+        ----------
+            bits : numpy.ndarray
+                uint8 array of rows packed by numpy.packbits()
+            extent : tuple
+                (xmin, ymin, xmax, ymax) extent of the mask
+            cellsize : tuple
+                (width, height) grid resolution
+            shape : tuple
+                (rows, columns) dimensions of the mask
+            key : str
+                Cache key from mask_key()
+        '''
+        self.bits = bits
+        self.extent = tuple(extent)
+        self.cellsize = tuple(cellsize)
+        self.shape = tuple(shape)
+        self.key = key
+
+    @classmethod
+    def rasterize(cls, rings, origin, cellsize, band_rows=1024):
+        '''
+        Rasterizes a region by cell centers onto the grid within the snapped
+        bounding box of the region.
+
+        Parameters
+        ----------
+            rings : list
+                List of (n, 2) arrays of ring vertices
+            origin : tuple
+                (x, y) of any cell corner of the grid
+            cellsize : tuple
+                (width, height) grid resolution
+            band_rows : int
+                Number of rows rasterized at a time
+
+        Returns
+        -------
+            RegionMask
+        '''
+        xy = np.concatenate(rings)
+        bbox = (xy[:, 0].min(), xy[:, 1].min(), xy[:, 0].max(),
+                xy[:, 1].max())
+        extent, shape = grid.snap_extent(bbox, origin, cellsize)
+        bits = np.zeros((shape[0], (shape[1] + 7) // 8), dtype=np.uint8)
+        for r0, band in grid.iter_rasterized_bands([(rings, 1)], extent,
+                                                   cellsize, shape,
+                                                   band_rows):
+            bits[r0:r0 + len(band)] = np.packbits(band > 0, axis=1)
+        return cls(bits, extent, cellsize, shape)
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Loads a mask saved by save().
+
+        Parameters
+        ----------
+            path : str
+                Path to the *.npz file
+
+        Returns
+        -------
+            RegionMask
+        '''
+        with np.load(path) as f:
+            return cls(f['bits'], f['extent'], f['cellsize'], f['shape'])
+
+    def save(self, path):
+        '''
+        Saves the mask to a compressed *.npz file.
+
+        Parameters
+        ----------
+            path : str
+                Path to the *.npz file
+        '''
+        # write to a temporary file first so that readers never see a partial
+        # mask
+        tmp_path = '%s.tmp.npz' % path[:-4]
+        np.savez_compressed(tmp_path, bits=self.bits, extent=self.extent,
+                            cellsize=self.cellsize, shape=self.shape)
+        os.replace(tmp_path, path)
+
+    def window(self, extent):
+        '''
+        Returns the mask for an extent on the same grid. Cells outside the
+        mask window are outside the region.
+
+        Parameters
+        ----------
+            extent : tuple
+                (xmin, ymin, xmax, ymax) extent snapped to the grid
+
+        Returns
+        -------
+            numpy.ndarray
+                Boolean array where True is inside the region
+        '''
+        w, h = self.cellsize
+        shape = (int(round((extent[3] - extent[1]) / h)),
+                 int(round((extent[2] - extent[0]) / w)))
+        mask = np.zeros(shape, dtype=bool)
+        windows = grid.overlap_windows(extent, self.extent, self.cellsize)
+        if windows is None:
+            return mask
+        (r0, r1, c0, c1), (mr0, mr1, mc0, mc1) = windows
+        bits = self.bits[mr0:mr1, mc0 // 8:(mc1 + 7) // 8]
+        cells = np.unpackbits(bits, axis=1)
+        mask[r0:r1, c0:c1] = cells[:, mc0 % 8:mc0 % 8 + mc1 - mc0]
+        return mask
+
+    def apply(self, arr, extent, nodata=3):
+        '''
+        Sets the cells of an array outside the region to nodata in place.
+
+        Parameters
+        ----------
+            arr : numpy.ndarray
+                Array on the same grid
+            extent : tuple
+                (xmin, ymin, xmax, ymax) extent of the array
+            nodata : int
+                Nodata value
+
+        Returns
+        -------
+            numpy.ndarray
+                The array
+        '''
+        arr[~self.window(extent)] = nodata
+        return arr
+
+
+class MaskCache:
+    '''
+    Object to cache region masks on disk keyed by region geometry and grid so
+    that each region is rasterized only once.
+
+    Attributes
+    ----------
+    path : str
+        Folder where masks are stored as *.npz files.
+
+    Methods
+    -------
+    get(rings, origin, cellsize):
+        Returns the mask of a region, rasterizing it if not cached.
+    '''
+
+    def __init__(self, path):
+        '''
+        Parameters
+        ----------
+            path : str
+                Folder where masks are stored as *.npz files
+        '''
+        self.path = path
+        self.__masks = {}
+
+    def get(self, rings, origin, cellsize):
+        '''
+        Returns the mask of a region, rasterizing it if not cached.
+
+        Parameters
+        ----------
+            rings : list
+                List of (n, 2) arrays of ring vertices
+            origin : tuple
+                (x, y) of any cell corner of the grid
+            cellsize : tuple
+                (width, height) grid resolution
+
+        Returns
+        -------
+            RegionMask
+        '''
+        key = mask_key(rings, origin, cellsize)
+        if key in self.__masks:
+            return self.__masks[key]
+        mask_path = '%s/%s.npz' % (self.path, key)
+        if os.path.exists(mask_path):
+            mask = RegionMask.load(mask_path)
+        else:
+            mask = RegionMask.rasterize(rings, origin, cellsize)
+            if not os.path.exists(self.path):
+                os.makedirs(self.path)
+            mask.save(mask_path)
+        mask.key = key
+        self.__masks[key] = mask
+        return mask
@@ -0,0 +1,148 @@
+################################################################################
+# Name:    naipqq.py
+# Purpose: This module provides vectorized addressing of NAIP quarter quads
+#          (QQs), whose names, e.g., m_3408301_ne, are determined by the
+#          7.5-minute USGS quadrangle grid in geographic coordinates.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+
+# WKID of NAD83 geographic coordinates in which the QQ grid is defined
+SPATREF_WKID = 4269
+
+# Sizes of quadrangles and quarter quads in degrees
+QUAD = 0.125
+QUARTER = QUAD / 2
+
+# Quarter quads by (north, east) halves of a quadrangle
+QUARTERS = {(1, 1): 'ne', (1, 0): 'nw', (0, 1): 'se', (0, 0): 'sw'}
+
+
+def qq_index(lon, lat):
+    '''
+    Computes the QQ indices of points in the western hemisphere. A QQ name
+    m_DDDOOQQ_xx consists of the latitude (DD) and west longitude (OOO) of
+    the southeast corner of a 1-degree block, the number (QQ) of the
+    quadrangle in the block from 01 at the northwest corner, west to east
+    and then north to south, to 64 at the southeast corner, and the quarter
+    (xx) in the quadrangle.
+
+    Parameters
+    ----------
+        lon : numpy.ndarray
+            Longitudes in degrees, negative in the western hemisphere
+        lat : numpy.ndarray
+            Latitudes in degrees
+
+    Returns
+    -------
+        numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray,
+        numpy.ndarray
+            Integer arrays of block latitudes, block west longitudes,
+            quadrangle numbers, and north and east halves (1 or 0)
+    '''
+    west = -np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    block_lat = np.floor(lat).astype(int)
+    block_lon = np.floor(west).astype(int)
+    # quadrangles are counted from the north and west edges of the block
+    north_offset = block_lat + 1 - lat
+    west_offset = block_lon + 1 - west
+    row = np.minimum((north_offset // QUAD).astype(int), 7)
+    col = np.minimum((west_offset // QUAD).astype(int), 7)
+    quad = row * 8 + col + 1
+    north = (north_offset - row * QUAD < QUARTER).astype(int)
+    east = (west_offset - col * QUAD >= QUARTER).astype(int)
+    return block_lat, block_lon, quad, north, east
+
+
+def qq_ids(lon, lat):
+    '''
+    Returns the QQ names of points in the western hemisphere.
+
+    Parameters
+    ----------
+        lon : numpy.ndarray
+            Longitudes in degrees, negative in the western hemisphere
+        lat : numpy.ndarray
+            Latitudes in degrees
+
+    Returns
+    -------
+        list
+            QQ names, e.g., m_3408301_ne
+    '''
+    return ['m_%02d%03d%02d_%s' % (a, o, q, QUARTERS[(n, e)]) for a, o, q, n, e
+            in zip(*(x.tolist() for x in qq_index(lon, lat)))]
+
+
+def qq_bbox(qq_id):
+    '''
+    Returns the bounding box of a QQ.
+
+    Parameters
+    ----------
+        qq_id : str
+            QQ name, e.g., m_3408301_ne; a NAIP filename starting with it also
+            works
+
+    Returns
+    -------
+        tuple
+            (west, south, east, north) in degrees with negative longitudes
+    '''
+    block_lat = int(qq_id[2:4])
+    block_lon = int(qq_id[4:7])
+    quad = int(qq_id[7:9]) - 1
+    north, east = {v: k for k, v in QUARTERS.items()}[qq_id[10:12]]
+    row, col = divmod(quad, 8)
+    top = block_lat + 1 - row * QUAD - (1 - north) * QUARTER
+    left = -(block_lon + 1) + col * QUAD + east * QUARTER
+    return (left, top - QUARTER, left + QUARTER, top)
+
+
+class QQLookup:
+    '''
+    Object to resolve QQ names to the NAIP tile filenames of an analysis year.
+
+    Attributes
+    ----------
+    filenames : dict
+        Tile filenames by QQ name.
+
+    Methods
+    -------
+    resolve(lon, lat):
+        Returns the tile filenames of points.
+    '''
+
+    def __init__(self, filenames):
+        '''
+        Parameters
+        ----------
+            filenames : list
+                Tile filenames of the year, e.g., m_3408301_ne_17_1
+        '''
+        self.filenames = {x[:12]: x for x in filenames}
+
+    def resolve(self, lon, lat):
+        '''
+        Returns the tile filenames of points.
+
+        Parameters
+        ----------
+            lon : numpy.ndarray
+                Longitudes in degrees, negative in the western hemisphere
+            lat : numpy.ndarray
+                Latitudes in degrees
+
+        Returns
+        -------
+            list
+                Tile filenames, or None for points without tiles
+        '''
+        return [self.filenames.get(x) for x in qq_ids(lon, lat)]
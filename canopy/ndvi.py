@@ -0,0 +1,110 @@
+################################################################################
+# Name:    ndvi.py
+# Purpose: This module provides NDVI histograms for scoring the vegetation of
+#          NAIP tiles before they are classified.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+
+# NAIP band indices
+RED = 0
+NIR = 3
+
+
+def ndvi(red, nir):
+    '''
+    Computes NDVI from red and near-infrared bands. Cells where both bands are
+    zero are nodata.
+
+    Parameters
+    ----------
+        red : numpy.ndarray
+            Red band
+        nir : numpy.ndarray
+            Near-infrared band
+
+    Returns
+    -------
+        numpy.ndarray, numpy.ndarray
+            float32 NDVI array and boolean array of valid cells
+    '''
+    red = red.astype(np.float32)
+    nir = nir.astype(np.float32)
+    total = red + nir
+    valid = total > 0
+    arr = np.zeros(red.shape, dtype=np.float32)
+    np.divide(nir - red, total, out=arr, where=valid)
+    return arr, valid
+
+
+class NDVIHistogram:
+    '''
+    Object to accumulate the NDVI histogram of a tile block by block.
+
+    Attributes
+    ----------
+    edges : numpy.ndarray
+        Bin edges from -1 to 1.
+    counts : numpy.ndarray
+        Number of valid cells in each bin.
+
+    Methods
+    -------
+    add(arr):
+        Adds the cells of a NAIP block.
+    score(ndvi_vegetation):
+        Returns the fraction of valid cells that are vegetated.
+    '''
+
+    def __init__(self, bins=40):
+        '''
+        Parameters
+        ----------
+            bins : int
+                Number of bins
+        '''
+        self.edges = np.linspace(-1, 1, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def add(self, arr):
+        '''
+        Adds the cells of a NAIP block.
+
+        Parameters
+        ----------
+            arr : numpy.ndarray
+                (bands, rows, columns) NAIP array
+
+        Returns
+        -------
+            numpy.ndarray
+                Boolean array of valid cells
+        '''
+        values, valid = ndvi(arr[RED], arr[NIR])
+        self.counts += np.histogram(values[valid], self.edges)[0]
+        return valid
+
+    def score(self, ndvi_vegetation):
+        '''
+        Returns the fraction of valid cells whose NDVI is greater than or equal
+        to a threshold. Bins are counted if their lower edges are.
+
+        Parameters
+        ----------
+            ndvi_vegetation : float
+                Minimum NDVI of vegetated cells
+
+        Returns
+        -------
+            float
+                Vegetation score from 0 to 1; 0 if there are no valid cells
+        '''
+        total = self.counts.sum()
+        if total == 0:
+            return 0.0
+        vegetated = self.counts[self.edges[:-1] >= ndvi_vegetation - 1e-9]
+        return float(vegetated.sum() / total)
@@ -0,0 +1,305 @@
+################################################################################
+# Name:    planner.py
+# Purpose: This module provides a work planner that lists the pending work of
+#          each stage from one scan of the region folders and estimates its
+#          cost from file sizes and recorded timings.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import json
+from collections import namedtuple
+
+# Stages in the order in which they are run
+STAGES = ['reproject_naip_tiles', 'convert_afe_to_final_tiles',
+          'clip_final_tiles', 'mosaic_clipped_final_tiles',
+          'fill_canopy_tif_gaps', 'sieve_canopy_tif',
+          'convert_canopy_tif_to_shp']
+
+# Seconds per task used until timings are recorded
+DEFAULT_SECONDS = {
+    'reproject_naip_tiles': 60,
+    'convert_afe_to_final_tiles': 20,
+    'clip_final_tiles': 5,
+    'mosaic_clipped_final_tiles': 600,
+    'fill_canopy_tif_gaps': 300,
+    'sieve_canopy_tif': 300,
+    'convert_canopy_tif_to_shp': 1800,
+}
+
+# A task is ready if its inputs exist, or waiting for an earlier stage
+Task = namedtuple('Task', ['stage', 'region', 'item', 'path', 'status',
+                           'size', 'seconds'])
+
+# A result of a stage for a tile or region. The status is 'done' or 'skipped'
+# with a reason, and the value is stage-specific, e.g., the number of changed
+# cells
+Result = namedtuple('Result', ['stage', 'region', 'phyreg_id', 'item', 'path',
+                               'status', 'seconds', 'reason', 'value'],
+                    defaults=(0.0, None, None))
+
+
+def scan_dir(path):
+    '''
+    Lists the files in a folder with their sizes using a single scan.
+
+    Parameters
+    ----------
+        path : str
+            Folder path
+
+    Returns
+    -------
+        dict
+            File sizes in bytes by filename; empty if the folder does not exist
+    '''
+    files = {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file():
+                    files[entry.name] = entry.stat().st_size
+    except OSError:
+        pass
+    return files
+
+
+class TimingLog:
+    '''
+    Object to record the timings of tasks by stage and estimate the seconds a
+    task will take from its input size.
+
+    Attributes
+    ----------
+    path : str
+        Path to the JSON file where timings are stored.
+
+    Methods
+    -------
+    record(stage, size, seconds):
+        Records the timing of a task.
+    estimate(stage, size):
+        Estimates the seconds for a task.
+    save():
+        Writes the timings to the JSON file.
+    '''
+
+    def __init__(self, path):
+        '''
+        Parameters
+        ----------
+            path : str
+                Path to the JSON file where timings are stored
+        '''
+        self.path = path
+        self.__timings = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.__timings = json.load(f)
+
+    def record(self, stage, size, seconds):
+        '''
+        Records the timing of a task.
+
+        Parameters
+        ----------
+            stage : str
+                Stage name
+            size : int
+                Input size of the task in bytes
+            seconds : float
+                Elapsed seconds
+        '''
+        timing = self.__timings.setdefault(stage,
+                {'count': 0, 'bytes': 0, 'seconds': 0.0})
+        timing['count'] += 1
+        timing['bytes'] += size or 0
+        timing['seconds'] += seconds
+
+    def estimate(self, stage, size=None):
+        '''
+        Estimates the seconds for a task in proportion to its input size if
+        both its size and recorded sizes are known, or as the average of the
+        recorded timings otherwise.
+
+        Parameters
+        ----------
+            stage : str
+                Stage name
+            size : int
+                Input size of the task in bytes
+
+        Returns
+        -------
+            float
+                Estimated seconds
+        '''
+        timing = self.__timings.get(stage)
+        if not timing or timing['count'] == 0:
+            return float(DEFAULT_SECONDS.get(stage, 60))
+        if size and timing['bytes'] > 0:
+            return size * timing['seconds'] / timing['bytes']
+        return timing['seconds'] / timing['count']
+
+    def save(self):
+        '''
+        Writes the timings to the JSON file.
+        '''
+        path_dir = os.path.dirname(self.path)
+        if path_dir and not os.path.exists(path_dir):
+            return
+        with open(self.path, 'w') as f:
+            json.dump(self.__timings, f, indent=1, sort_keys=True)
+
+
+def longest_first(tasks):
+    '''
+    Sorts tasks by their estimated seconds in descending order so that the
+    longest tasks do not start last when tasks run in parallel.
+
+    Parameters
+    ----------
+        tasks : list
+            List of Task
+
+    Returns
+    -------
+        list
+            Sorted tasks
+    '''
+    return sorted(tasks, key=lambda x: -x.seconds)
+
+
+def summarize(tasks, processes=1):
+    '''
+    Formats a plan as text with the number of tasks and estimated hours by
+    stage and region.
+
+    Parameters
+    ----------
+        tasks : list
+            List of Task
+        processes : int
+            Number of worker processes for the estimated wall time
+
+    Returns
+    -------
+        str
+            Plan summary
+    '''
+    lines = []
+    total = 0.0
+    for stage in STAGES:
+        stage_tasks = [x for x in tasks if x.stage == stage]
+        if not stage_tasks:
+            continue
+        seconds = sum(x.seconds for x in stage_tasks)
+        total += seconds
+        ready = sum(1 for x in stage_tasks if x.status == 'ready')
+        lines.append('%s: %d tasks (%d ready, %d waiting), %.2f hours' % (
+            stage, len(stage_tasks), ready, len(stage_tasks) - ready,
+            seconds / 3600))
+        regions = {}
+        for x in stage_tasks:
+            count, secs = regions.get(x.region, (0, 0.0))
+            regions[x.region] = (count + 1, secs + x.seconds)
+        for region, (count, secs) in sorted(regions.items(),
+                                            key=lambda x: -x[1][1]):
+            lines.append('    %s: %d tasks, %.2f hours' % (region, count,
+                                                          secs / 3600))
+    lines.append('Total: %d tasks, %.2f hours, %.2f hours with %d processes' %
+                 (len(tasks), total / 3600, total / 3600 / max(processes, 1),
+                  max(processes, 1)))
+    return '\n'.join(lines)
+
+
+def plan_region(region, tiles, inputs, outputs, region_outputs, naip_files,
+                analysis_year, timings, paths):
+    '''
+    Lists the pending tasks of all stages for a physiographic region from the
+    scanned contents of its folders.
+
+    Parameters
+    ----------
+        region : str
+            Physiographic region name with underscores
+        tiles : list
+            Tile filenames without the date and extension, e.g.,
+            m_3408301_ne_17_1
+        inputs : dict
+            scan_dir() of the reprojected tile folder
+        outputs : dict
+            scan_dir() of the output tile folder
+        region_outputs : dict
+            scan_dir() of the Outputs folder of the region
+        naip_files : dict
+            scan_dir() results of NAIP folders by folder name
+        analysis_year : int
+            Analysis year
+        timings : TimingLog
+            Recorded timings
+        paths : tuple
+            (inputs_path, outputs_path, region_outputs_path)
+
+    Returns
+    -------
+        list
+            List of Task
+    '''
+    inputs_path, outputs_path, region_outputs_path = paths
+    tasks = []
+
+    def add(stage, item, path, ready, size):
+        tasks.append(Task(stage, region, item, path,
+                          'ready' if ready else 'waiting', size,
+                          timings.estimate(stage, size)))
+
+    def region_file(prefix, ext='tif'):
+        return '%scanopy_%d_%s.%s' % (prefix, analysis_year, region, ext)
+
+    canopytif = region_file('')
+    # intermediate tiles of mosaicked regions may have been reclaimed
+    mosaicked = canopytif in region_outputs
+    cfr_size = 0
+    for tile in [] if mosaicked else tiles:
+        rtif = 'r%s.tif' % tile
+        frtif = 'fr%s.tif' % tile
+        cfrtif = 'cfr%s.tif' % tile
+        if (rtif not in inputs and frtif not in outputs and
+                cfrtif not in outputs):
+            # NAIP filenames are the tile filename + capture date
+            folder = naip_files.get(tile[2:7], {})
+            naip = [x for x in folder if x.startswith(tile) and
+                    x.endswith('.tif')]
+            add('reproject_naip_tiles', tile, '%s/%s' % (inputs_path, rtif),
+                bool(naip), folder.get(naip[0]) if naip else None)
+        if frtif not in outputs and cfrtif not in outputs:
+            afe = outputs.get('r%s.shp' % tile, outputs.get(rtif))
+            add('convert_afe_to_final_tiles', tile,
+                '%s/%s' % (outputs_path, frtif), afe is not None, afe)
+        if cfrtif not in outputs:
+            add('clip_final_tiles', tile, '%s/%s' % (outputs_path, cfrtif),
+                frtif in outputs, outputs.get(frtif))
+        else:
+            cfr_size += outputs[cfrtif]
+
+    canopy_size = region_outputs.get(canopytif, cfr_size or None)
+    if not mosaicked:
+        add('mosaic_clipped_final_tiles', region,
+            '%s/%s' % (region_outputs_path, canopytif),
+            cfr_size > 0 and len(tiles) > 0, cfr_size or None)
+    ready = mosaicked
+    for stage, prefix in (('fill_canopy_tif_gaps', 'filled_'),
+                          ('sieve_canopy_tif', 'sieved_')):
+        if region_file(prefix) not in region_outputs:
+            add(stage, region, '%s/%s' % (region_outputs_path,
+                                          region_file(prefix)),
+                ready, canopy_size)
+    if region_file('shp_', 'shp') not in region_outputs:
+        add('convert_canopy_tif_to_shp', region,
+            '%s/%s' % (region_outputs_path, region_file('shp_', 'shp')),
+            ready, canopy_size)
+    return tasks
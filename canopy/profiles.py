@@ -0,0 +1,90 @@
+################################################################################
+# Name:    profiles.py
+# Purpose: This module provides compression and block size profiles for the
+#          intermediate and final rasters written by CanoPy.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import arcpy
+
+# Compression names in the configuration and their arcpy.env.compression
+# keywords
+COMPRESSIONS = {
+    'NONE': 'NONE',
+    'LZW': 'LZW',
+    'DEFLATE': 'LZ77',
+    'ZSTD': 'ZSTD',
+    'PACKBITS': 'PackBits',
+}
+
+# Raster kinds with their own profiles
+KINDS = ('intermediate', 'final')
+
+
+def make_profile(compression, block_size=256):
+    '''
+    Creates an output profile. arcpy always writes tiled GeoTIFF files, so
+    only the size of their tiles can be set.
+
+    Parameters
+    ----------
+        compression : str
+            One of COMPRESSIONS
+        block_size : int
+            Number of rows and columns of a tile
+
+    Returns
+    -------
+        dict
+            Output profile
+    '''
+    compression = compression.strip().upper()
+    if compression not in COMPRESSIONS:
+        raise ValueError('Invalid compression %s: must be one of %s' % (
+            compression, ', '.join(COMPRESSIONS)))
+    return {'compression': compression, 'block_size': int(block_size)}
+
+
+def read_profile(conf, kind):
+    '''
+    Reads the output profile of intermediate or final rasters from the
+    [output] section of a configuration.
+
+    Parameters
+    ----------
+        conf : configparser.ConfigParser
+            Configuration
+        kind : str
+            intermediate or final
+
+    Returns
+    -------
+        dict
+            Output profile, or None if the configuration has no profile for
+            the kind so that arcpy defaults are used
+    '''
+    compression = conf.get('output', '%s_compression' % kind, fallback=None)
+    if compression is None:
+        return None
+    block_size = conf.getint('output', '%s_block_size' % kind, fallback=256)
+    return make_profile(compression, block_size)
+
+
+def set_profile(profile):
+    '''
+    Applies an output profile to the arcpy environment so that geoprocessing
+    tools and CopyRaster write rasters with it.
+
+    Parameters
+    ----------
+        profile : dict
+            Output profile; None leaves the environment unchanged
+    '''
+    if profile is None:
+        return
+    arcpy.env.compression = COMPRESSIONS[profile['compression']]
+    arcpy.env.tileSize = '%d %d' % (profile['block_size'],
+                                    profile['block_size'])
@@ -0,0 +1,239 @@
+################################################################################
+# Name:    qa.py
+# Purpose: This module provides functions for scanning clipped final tiles for
+#          anomalies, e.g., all canopy, all noncanopy, striped, or mostly
+#          nodata tiles, from block statistics before they are mosaicked.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import csv
+import numpy as np
+
+# Thresholds at which anomalies are flagged: canopy fraction of valid cells
+# for all canopy and all noncanopy tiles, nodata fraction of the footprint,
+# banding score, canopy fraction difference from the median of neighbors, and
+# robust z-score of canopy fraction in the region
+THRESHOLDS = {
+    'all_canopy': 0.99,
+    'all_noncanopy': 0.01,
+    'nodata': 0.5,
+    'banding': 0.1,
+    'neighbor': 0.4,
+    'region': 3.5,
+}
+
+# Columns of the anomaly report
+COLUMNS = ('tile', 'score', 'flags', 'canopy', 'nodata', 'banding',
+           'neighbor_diff', 'region_z')
+
+
+def new_stats(shape):
+    '''
+    Creates empty statistics of a tile.
+
+    Parameters
+    ----------
+        shape : tuple
+            (rows, columns) tile dimensions
+
+    Returns
+    -------
+        dict
+            Cell counts of noncanopy, canopy, and nodata, and canopy and
+            valid cell counts by row and column
+    '''
+    return {'counts': np.zeros(3, dtype=np.int64),
+            'row_canopy': np.zeros(shape[0], dtype=np.int64),
+            'row_valid': np.zeros(shape[0], dtype=np.int64),
+            'col_canopy': np.zeros(shape[1], dtype=np.int64),
+            'col_valid': np.zeros(shape[1], dtype=np.int64)}
+
+
+def add_block(stats, arr, block, nodata=3):
+    '''
+    Adds the cells of a block to the statistics of a tile.
+
+    Parameters
+    ----------
+        stats : dict
+            Statistics from new_stats()
+        arr : numpy.ndarray
+            Canopy array of the block
+        block : tuple
+            (row_start, row_end, col_start, col_end) block in the tile
+        nodata : int
+            Nodata value
+    '''
+    r0, r1, c0, c1 = block
+    valid = arr != nodata
+    canopy = valid & (arr == 1)
+    ncanopy = int(canopy.sum())
+    nvalid = int(valid.sum())
+    stats['counts'] += (nvalid - ncanopy, ncanopy, arr.size - nvalid)
+    stats['row_canopy'][r0:r1] += canopy.sum(axis=1)
+    stats['row_valid'][r0:r1] += valid.sum(axis=1)
+    stats['col_canopy'][c0:c1] += canopy.sum(axis=0)
+    stats['col_valid'][c0:c1] += valid.sum(axis=0)
+
+
+def banding_score(canopy, valid, min_cells=100):
+    '''
+    Scores striping along rows or columns as the mean absolute deviation of
+    the canopy fraction of each line from the mean of its two neighboring
+    lines. Natural canopy changes gradually from line to line, while striped
+    tiles alternate.
+
+    Parameters
+    ----------
+        canopy : numpy.ndarray
+            Canopy cell counts by line
+        valid : numpy.ndarray
+            Valid cell counts by line
+        min_cells : int
+            Minimum valid cells of a line to be scored
+
+    Returns
+    -------
+        float
+            Banding score from 0 to 1
+    '''
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(valid >= min_cells, canopy / valid, np.nan)
+    deviation = np.abs(fraction[1:-1] - (fraction[:-2] + fraction[2:]) / 2)
+    deviation = deviation[~np.isnan(deviation)]
+    return float(deviation.mean()) if len(deviation) else 0.
+
+
+def summarize(stats, footprint_cells=None):
+    '''
+    Summarizes the statistics of a tile.
+
+    Parameters
+    ----------
+        stats : dict
+            Statistics from new_stats()
+        footprint_cells : float
+            Expected number of cells in the footprint of the tile; None for
+            all cells of the tile
+
+    Returns
+    -------
+        dict
+            Canopy fraction of valid cells (nan without valid cells), nodata
+            fraction of the footprint, and banding score
+    '''
+    noncanopy, canopy, nodata = stats['counts'].tolist()
+    nvalid = noncanopy + canopy
+    if not footprint_cells:
+        footprint_cells = nvalid + nodata
+    return {'canopy': canopy / nvalid if nvalid else np.nan,
+            'nodata': min(max(1 - nvalid / footprint_cells, 0), 1)
+                      if footprint_cells else 1.,
+            'banding': max(banding_score(stats['row_canopy'],
+                                         stats['row_valid']),
+                           banding_score(stats['col_canopy'],
+                                         stats['col_valid']))}
+
+
+def find_neighbors(extents, tolerance=0):
+    '''
+    Finds the tiles whose extents intersect or touch each tile.
+
+    Parameters
+    ----------
+        extents : list
+            (xmin, ymin, xmax, ymax) extents of tiles
+        tolerance : float
+            Distance within which extents touch, e.g., one cell
+
+    Returns
+    -------
+        list
+            Lists of the indices of neighbors of each tile
+    '''
+    if not extents:
+        return []
+    ext = np.array(extents, dtype=float)
+    touch = ((ext[:, None, 0] <= ext[None, :, 2] + tolerance) &
+             (ext[:, None, 2] + tolerance >= ext[None, :, 0]) &
+             (ext[:, None, 1] <= ext[None, :, 3] + tolerance) &
+             (ext[:, None, 3] + tolerance >= ext[None, :, 1]))
+    np.fill_diagonal(touch, False)
+    return [np.nonzero(x)[0].tolist() for x in touch]
+
+
+def scan(tiles, summaries, neighbors, thresholds=THRESHOLDS):
+    '''
+    Compares each tile with its neighbors and the distribution of the region,
+    and ranks tiles by their anomaly scores. The severity of each anomaly is
+    its statistic divided by its threshold, and the score of a tile is its
+    largest severity, so tiles scoring 1 or more have flags.
+
+    Parameters
+    ----------
+        tiles : list
+            Tile filenames
+        summaries : list
+            summarize() of each tile
+        neighbors : list
+            find_neighbors() of the tiles
+        thresholds : dict
+            Thresholds by anomaly from THRESHOLDS
+
+    Returns
+    -------
+        list
+            Rows of the report as dicts with COLUMNS in descending order of
+            score
+    '''
+    canopy = np.array([x['canopy'] for x in summaries], dtype=float)
+    known = canopy[~np.isnan(canopy)]
+    median = np.median(known) if len(known) else np.nan
+    mad = np.median(np.abs(known - median)) if len(known) else np.nan
+    rows = []
+    for i, (tile, summary) in enumerate(zip(tiles, summaries)):
+        frac = summary['canopy']
+        others = canopy[neighbors[i]]
+        others = others[~np.isnan(others)]
+        neighbor_diff = frac - np.median(others) if len(others) else np.nan
+        region_z = 0.6745 * (frac - median) / mad if mad > 0 else np.nan
+        severity = {
+            'all_canopy': frac / thresholds['all_canopy'],
+            'all_noncanopy': (1 - frac) / (1 - thresholds['all_noncanopy']),
+            'nodata': summary['nodata'] / thresholds['nodata'],
+            'banding': summary['banding'] / thresholds['banding'],
+            'neighbor': abs(neighbor_diff) / thresholds['neighbor'],
+            'region': abs(region_z) / thresholds['region'],
+        }
+        severity = {k: v for k, v in severity.items() if not np.isnan(v)}
+        score = max(severity.values()) if severity else 0.
+        rows.append({'tile': tile, 'score': score,
+                     'flags': ' '.join(k for k, v in severity.items()
+                                       if v >= 1),
+                     'canopy': frac, 'nodata': summary['nodata'],
+                     'banding': summary['banding'],
+                     'neighbor_diff': neighbor_diff, 'region_z': region_z})
+    rows.sort(key=lambda x: -x['score'])
+    return rows
+
+
+def write_report(report_path, rows):
+    '''
+    Writes the ranked anomaly report of a region as a CSV file.
+
+    Parameters
+    ----------
+        report_path : str
+            Path to the CSV file
+        rows : list
+            Rows from scan()
+    '''
+    with open(report_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in rows:
+            writer.writerow(['%.4f' % row[x] if isinstance(row[x], float)
+                             else row[x] for x in COLUMNS])
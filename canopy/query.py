@@ -0,0 +1,484 @@
+################################################################################
+# Name:    query.py
+# Purpose: This module provides point and bounding box queries of canopy
+#          rasters by analysis year backed by an LRU cache of raster blocks,
+#          and an optional local HTTP server, e.g.,
+#            python -m canopy.query canopy_2009.cfg canopy_2019.cfg
+#            curl 'localhost:8000/point?x=1000000&y=1200000'
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import sys
+import glob
+import json
+import argparse
+import threading
+from collections import OrderedDict, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+# Canopy raster of a region; extent is (xmin, ymin, xmax, ymax), cellsize is
+# (width, height), shape is (rows, columns), and inverted is True if canopy
+# and noncanopy values are swapped
+RegionRaster = namedtuple('RegionRaster', ['year', 'region', 'path', 'extent',
+                                           'cellsize', 'shape', 'inverted'],
+                          defaults=(False,))
+
+# Prefixes of canopy TIFF files in order of preference
+PREFIXES = ('corrected_', 'sieved_', 'filled_', '')
+
+
+def _describe(path):
+    # Returns the extent, cell size, and shape of a raster. arcpy is imported
+    # here so that queries can be run with other readers without ArcGIS.
+    import arcpy
+    ras = arcpy.Raster(path)
+    return ((ras.extent.XMin, ras.extent.YMin, ras.extent.XMax,
+             ras.extent.YMax), (ras.meanCellWidth, ras.meanCellHeight),
+            (ras.height, ras.width))
+
+
+def _read_window(path, window, nodata=3):
+    # Reads a (row_start, row_end, col_start, col_end) window of a raster
+    import arcpy
+    ras = arcpy.Raster(path)
+    r0, r1, c0, c1 = window
+    lower_left = arcpy.Point(ras.extent.XMin + c0 * ras.meanCellWidth,
+                             ras.extent.YMax - r1 * ras.meanCellHeight)
+    return arcpy.RasterToNumPyArray(ras, lower_left, c1 - c0, r1 - r0,
+                                    nodata_to_value=nodata)
+
+
+def find_region_rasters(canopy, describe=_describe):
+    '''
+    Finds the canopy TIFF files of all regions of an analysis year. For each
+    region, corrected, sieved, and filled canopy TIFF files are preferred
+    over the original in this order. Uncorrected files of regions that are
+    inverted as a whole are marked as inverted.
+
+    Parameters
+    ----------
+        canopy : Canopy
+            Canopy object of the analysis year
+        describe : function
+            Function that takes a raster path and returns its extent, cell
+            size, and shape
+
+    Returns
+    -------
+        list
+            List of RegionRaster
+    '''
+    rasters = []
+    year = canopy.analysis_year
+    for outdir_path in sorted(glob.glob('%s/*/Outputs' %
+                                        canopy.results_path)):
+        name = os.path.basename(os.path.dirname(outdir_path))
+        for prefix in PREFIXES:
+            path = '%s/%scanopy_%d_%s.tif' % (outdir_path, prefix, year, name)
+            if os.path.exists(path):
+                rasters.append(RegionRaster(
+                    year, name, path, *describe(path),
+                    prefix != 'corrected_' and canopy.is_region_inverted(
+                        name)))
+                break
+    return rasters
+
+
+class BlockCache:
+    '''
+    Object to hold decoded raster blocks up to a total size, evicting the
+    least recently used blocks first. It can be shared by threads.
+
+    Attributes
+    ----------
+    max_bytes : int
+        Maximum bytes of cached blocks.
+    nbytes : int
+        Bytes of cached blocks.
+    hits : int
+        Number of blocks found in the cache.
+    misses : int
+        Number of blocks read.
+
+    Methods
+    -------
+    get(key, read):
+        Returns a cached block or reads and caches it.
+    '''
+
+    def __init__(self, max_bytes=256 * 1024**2):
+        '''
+        Parameters
+        ----------
+            max_bytes : int
+                Maximum bytes of cached blocks
+        '''
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.__blocks = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, read):
+        '''
+        Returns a cached block or reads and caches it.
+
+        Parameters
+        ----------
+            key : hashable
+                Key of the block
+            read : function
+                Function that takes no arguments and returns the block
+
+        Returns
+        -------
+            numpy.ndarray
+                Block
+        '''
+        with self.__lock:
+            if key in self.__blocks:
+                self.__blocks.move_to_end(key)
+                self.hits += 1
+                return self.__blocks[key]
+        # read outside the lock so that other threads are not blocked;
+        # concurrent misses of the same block read it twice at worst
+        arr = read()
+        with self.__lock:
+            self.misses += 1
+            if key not in self.__blocks:
+                self.__blocks[key] = arr
+                self.nbytes += arr.nbytes
+            while self.nbytes > self.max_bytes and len(self.__blocks) > 1:
+                self.nbytes -= self.__blocks.popitem(last=False)[1].nbytes
+        return arr
+
+
+class CanopyQuery:
+    '''
+    Object to query canopy rasters of regions by analysis year. Points and
+    bounding boxes are resolved to regions by their raster extents, and only
+    the raster blocks they touch are read and cached.
+
+    Attributes
+    ----------
+    rasters : list
+        List of RegionRaster.
+    years : list
+        Sorted analysis years.
+    block_size : int
+        Number of rows and columns of a cached block.
+    cache : BlockCache
+        Cache of decoded blocks.
+
+    Methods
+    -------
+    from_canopies(canopies, block_size, cache_bytes):
+        Creates a query object for the canopy TIFF files of Canopy objects.
+    points(xy, year):
+        Returns the canopy values of points.
+    point(x, y):
+        Returns the canopy values of a point by analysis year.
+    bbox(bbox, year):
+        Returns canopy statistics of a bounding box.
+    '''
+
+    def __init__(self, rasters, block_size=512, cache_bytes=256 * 1024**2,
+                 read_window=_read_window):
+        '''
+        Parameters
+        ----------
+            rasters : list
+                List of RegionRaster
+            block_size : int
+                Number of rows and columns of a cached block
+            cache_bytes : int
+                Maximum bytes of cached blocks
+            read_window : function
+                Function that takes a raster path and a (row_start, row_end,
+                col_start, col_end) window, and returns the window with
+                nodata as 3
+        '''
+        self.rasters = list(rasters)
+        self.years = sorted(set(x.year for x in self.rasters))
+        self.block_size = block_size
+        self.cache = BlockCache(cache_bytes)
+        self.__read_window = read_window
+
+    @classmethod
+    def from_canopies(cls, canopies, block_size=512,
+                      cache_bytes=256 * 1024**2):
+        '''
+        Creates a query object for the canopy TIFF files of Canopy objects.
+
+        Parameters
+        ----------
+            canopies : list
+                Canopy objects of analysis years
+            block_size : int
+                Number of rows and columns of a cached block
+            cache_bytes : int
+                Maximum bytes of cached blocks
+
+        Returns
+        -------
+            CanopyQuery
+        '''
+        rasters = []
+        for canopy in canopies:
+            rasters.extend(find_region_rasters(canopy))
+        return cls(rasters, block_size, cache_bytes)
+
+    def __block(self, raster, br, bc):
+        # Returns a cached block of a raster by block row and column with the
+        # values of inverted rasters corrected
+        bs = self.block_size
+        window = (br * bs, min((br + 1) * bs, raster.shape[0]), bc * bs,
+                  min((bc + 1) * bs, raster.shape[1]))
+
+        def read():
+            arr = self.__read_window(raster.path, window)
+            if raster.inverted:
+                valid = arr < 2
+                arr[valid] = 1 - arr[valid]
+            return arr
+
+        return self.cache.get((raster.path, br, bc), read)
+
+    def __cells(self, raster, xy):
+        # Returns the rows and columns of points and whether they are inside
+        # a raster
+        rows = np.floor((raster.extent[3] - xy[:, 1]) /
+                        raster.cellsize[1]).astype(np.int64)
+        cols = np.floor((xy[:, 0] - raster.extent[0]) /
+                        raster.cellsize[0]).astype(np.int64)
+        inside = ((rows >= 0) & (rows < raster.shape[0]) & (cols >= 0) &
+                  (cols < raster.shape[1]))
+        return rows, cols, inside
+
+    def points(self, xy, year):
+        '''
+        Returns the canopy values of points in one analysis year. Points are
+        grouped by block, so each block is looked up once per call.
+
+        Parameters
+        ----------
+            xy : numpy.ndarray
+                (n, 2) array of x and y in the output spatial reference
+            year : int
+                Analysis year
+
+        Returns
+        -------
+            numpy.ndarray, list
+                uint8 array of canopy values with 3 for nodata, and region
+                names of the points with None for nodata
+        '''
+        xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        values = np.full(len(xy), 3, dtype=np.uint8)
+        regions = [None] * len(xy)
+        bs = self.block_size
+        for raster in self.rasters:
+            if raster.year != year:
+                continue
+            rows, cols, inside = self.__cells(raster, xy)
+            # points in overlapping region extents take the first valid value
+            todo = np.nonzero(inside & (values == 3))[0]
+            if not len(todo):
+                continue
+            keys = (rows[todo] // bs) * ((raster.shape[1] + bs - 1) // bs) + \
+                cols[todo] // bs
+            order = np.argsort(keys, kind='stable')
+            todo, keys = todo[order], keys[order]
+            starts = np.r_[0, np.nonzero(np.diff(keys))[0] + 1, len(keys)]
+            for s0, s1 in zip(starts[:-1], starts[1:]):
+                idx = todo[s0:s1]
+                br, bc = rows[idx[0]] // bs, cols[idx[0]] // bs
+                block = self.__block(raster, br, bc)
+                values[idx] = block[rows[idx] - br * bs, cols[idx] - bc * bs]
+            for i in todo[values[todo] < 3]:
+                regions[i] = raster.region
+        return values, regions
+
+    def point(self, x, y):
+        '''
+        Returns the canopy values of a point in all analysis years.
+
+        Parameters
+        ----------
+            x : float
+                x in the output spatial reference
+            y : float
+                y in the output spatial reference
+
+        Returns
+        -------
+            dict
+                (canopy value or None, region name or None) by analysis year
+        '''
+        result = {}
+        for year in self.years:
+            values, regions = self.points([(x, y)], year)
+            result[year] = (None if values[0] == 3 else int(values[0]),
+                            regions[0])
+        return result
+
+    def bbox(self, bbox, year):
+        '''
+        Returns canopy statistics of the cells whose centers are in a bounding
+        box in one analysis year. Region rasters are masked to their regions,
+        so cells are valid in only one region.
+
+        Parameters
+        ----------
+            bbox : tuple
+                (xmin, ymin, xmax, ymax) in the output spatial reference
+            year : int
+                Analysis year
+
+        Returns
+        -------
+            dict
+                Numbers of canopy and valid cells, percent canopy cover (None
+                if no valid cells), and region names
+        '''
+        bs = self.block_size
+        canopy = valid = 0
+        regions = []
+        for raster in self.rasters:
+            if raster.year != year:
+                continue
+            w, h = raster.cellsize
+            # first and last cells whose centers are in the bounding box
+            r0 = max(int(np.ceil((raster.extent[3] - bbox[3]) / h - 0.5)), 0)
+            r1 = min(int(np.floor((raster.extent[3] - bbox[1]) / h - 0.5)) +
+                     1, raster.shape[0])
+            c0 = max(int(np.ceil((bbox[0] - raster.extent[0]) / w - 0.5)), 0)
+            c1 = min(int(np.floor((bbox[2] - raster.extent[0]) / w - 0.5)) +
+                     1, raster.shape[1])
+            if r0 >= r1 or c0 >= c1:
+                continue
+            region_valid = 0
+            for br in range(r0 // bs, (r1 - 1) // bs + 1):
+                for bc in range(c0 // bs, (c1 - 1) // bs + 1):
+                    block = self.__block(raster, br, bc)
+                    arr = block[max(r0 - br * bs, 0):r1 - br * bs,
+                                max(c0 - bc * bs, 0):c1 - bc * bs]
+                    canopy += int((arr == 1).sum())
+                    region_valid += int((arr < 3).sum())
+            if region_valid:
+                valid += region_valid
+                regions.append(raster.region)
+        return {'canopy': canopy, 'valid': valid,
+                'percent': 100 * canopy / valid if valid else None,
+                'regions': regions}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Answers GET /point?x=&y=, GET /bbox?xmin=&ymin=&xmax=&ymax=[&year=],
+    # and POST /points with {"year": year, "points": [[x, y], ...]} in JSON
+
+    query = None
+
+    def __send(self, status, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            if url.path == '/point':
+                result = self.query.point(float(params['x']),
+                                          float(params['y']))
+                self.__send(200, {str(year): {'value': value,
+                                              'region': region}
+                                  for year, (value, region) in
+                                  result.items()})
+            elif url.path == '/bbox':
+                bbox = tuple(float(params[k]) for k in ('xmin', 'ymin',
+                                                       'xmax', 'ymax'))
+                years = [int(params['year'])] if 'year' in params else \
+                    self.query.years
+                self.__send(200, {str(year): self.query.bbox(bbox, year)
+                                  for year in years})
+            else:
+                self.__send(404, {'error': 'unknown path %s' % url.path})
+        except (KeyError, ValueError) as e:
+            self.__send(400, {'error': 'bad request: %s' % e})
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/points':
+            self.__send(404, {'error': 'unknown path %s' % self.path})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            values, regions = self.query.points(request['points'],
+                                                int(request['year']))
+        except (KeyError, ValueError, TypeError) as e:
+            self.__send(400, {'error': 'bad request: %s' % e})
+            return
+        self.__send(200, {'values': [None if x == 3 else int(x) for x in
+                                     values], 'regions': regions})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(query, host='127.0.0.1', port=8000):
+    '''
+    Serves queries over HTTP on a local address until interrupted.
+
+    Parameters
+    ----------
+        query : CanopyQuery
+            Query object
+        host : str
+            Address to listen on
+        port : int
+            Port to listen on
+    '''
+    handler = type('Handler', (_Handler,), {'query': query})
+    with ThreadingHTTPServer((host, port), handler) as server:
+        print('Serving canopy queries on http://%s:%d' % (host, port))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m canopy.query',
+            description='Serves canopy queries over HTTP.')
+    parser.add_argument('configs', nargs='+',
+                        help='paths to the *.cfg files of analysis years')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on')
+    parser.add_argument('--port', type=int, default=8000,
+                        help='port to listen on')
+    parser.add_argument('--block-size', type=int, default=512,
+                        help='number of rows and columns of a cached block')
+    parser.add_argument('--cache-mb', type=float, default=256,
+                        help='maximum megabytes of cached blocks')
+    args = parser.parse_args(argv)
+
+    from .canopy import Canopy
+    query = CanopyQuery.from_canopies([Canopy(x) for x in args.configs],
+                                      args.block_size,
+                                      int(args.cache_mb * 1024**2))
+    serve(query, args.host, args.port)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
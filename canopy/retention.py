@@ -0,0 +1,224 @@
+################################################################################
+# Name:    retention.py
+# Purpose: This module provides a retention policy for intermediate files that
+#          deletes or archives them once their downstream outputs are complete
+#          to reclaim disk space.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import shutil
+from collections import namedtuple
+
+# Kinds of intermediate files: reprojected tiles (r*.tif in Inputs), AFE
+# outputs (r*.shp and r*.tif in Outputs), final tiles (fr*.tif), clipped
+# final tiles (cfr*.tif), mosaics (mosaic_*.tif), and temporary folders
+# (tmp_*) left by interrupted runs
+KINDS = ('reprojected', 'afe', 'final', 'clipped', 'mosaic', 'temporary')
+
+# Actions on complete intermediate files
+ACTIONS = ('keep', 'delete', 'archive')
+
+# Kinds kept in protected mode because tiles are reclassified from reprojected
+# tiles, inverted tiles are detected from final tiles, and region mosaics are
+# patched from clipped final tiles and mosaics
+PROTECTED_KINDS = ('reprojected', 'final', 'clipped', 'mosaic')
+
+# Retention policy
+Policy = namedtuple('Policy', ['actions', 'archive_path', 'protected'])
+
+
+def read_policy(conf):
+    '''
+    Reads the retention policy from the [retention] section of a
+    configuration. Each kind takes one of ACTIONS and is kept by default
+    except temporary folders, which are deleted.
+
+    Parameters
+    ----------
+        conf : configparser.ConfigParser
+            Configuration
+
+    Returns
+    -------
+        Policy
+            Retention policy
+    '''
+    actions = {}
+    for kind in KINDS:
+        action = conf.get('retention', kind, fallback='delete' if kind ==
+                          'temporary' else 'keep').strip().lower()
+        if action not in ACTIONS:
+            raise ValueError('Invalid retention action %s for %s: must be '
+                             'one of %s' % (action, kind, ', '.join(ACTIONS)))
+        actions[kind] = action
+    archive_path = conf.get('retention', 'archive_path', fallback='').strip()
+    if 'archive' in actions.values() and not archive_path:
+        raise ValueError('archive_path required to archive intermediate '
+                         'files')
+    protected = conf.getboolean('retention', 'protected', fallback=True)
+    return Policy(actions, archive_path, protected)
+
+
+def get_action(policy, kind):
+    '''
+    Returns the action of a policy on a kind of intermediate files.
+
+    Parameters
+    ----------
+        policy : Policy
+            Retention policy
+        kind : str
+            One of KINDS
+
+    Returns
+    -------
+        str
+            One of ACTIONS
+    '''
+    if policy.protected and kind in PROTECTED_KINDS:
+        return 'keep'
+    return policy.actions[kind]
+
+
+def is_complete(paths, downstream_paths):
+    '''
+    Checks if the downstream outputs of intermediate files are complete, that
+    is, they all exist and are not older than any of the intermediate files.
+
+    Parameters
+    ----------
+        paths : list
+            Paths to the files or folders of an intermediate
+        downstream_paths : list
+            Paths to its downstream outputs
+
+    Returns
+    -------
+        bool
+            True if complete
+    '''
+    if not paths or not downstream_paths or not all(
+            os.path.exists(x) for x in downstream_paths):
+        return False
+    return (min(os.path.getmtime(x) for x in downstream_paths) >=
+            max(os.path.getmtime(x) for x in paths))
+
+
+def get_size(paths):
+    '''
+    Returns the bytes freed by removing files or folders. A file with hard
+    links outside the paths frees nothing.
+
+    Parameters
+    ----------
+        paths : list
+            Paths to files or folders
+
+    Returns
+    -------
+        int
+            Bytes
+    '''
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, filenames in os.walk(path):
+                files.extend(os.path.join(root, x) for x in filenames)
+        elif os.path.exists(path):
+            files.append(path)
+    stats = {}
+    counts = {}
+    for path in files:
+        stat = os.stat(path)
+        inode = (stat.st_dev, stat.st_ino)
+        stats[inode] = stat
+        counts[inode] = counts.get(inode, 0) + 1
+    return sum(stat.st_size for inode, stat in stats.items()
+               if stat.st_nlink <= counts[inode])
+
+
+def reclaim(paths, action, archive_path=None, dry_run=False):
+    '''
+    Deletes or archives the files or folders of an intermediate. Archived
+    files are moved under archive_path with their absolute paths, e.g.,
+    D:/Results/Outputs/frm_3408301_ne_17_1.tif to
+    archive_path/Results/Outputs/frm_3408301_ne_17_1.tif.
+
+    Parameters
+    ----------
+        paths : list
+            Paths to files or folders
+        action : str
+            One of ACTIONS
+        archive_path : str
+            Folder for archived files
+        dry_run : bool
+            True to only return the bytes that would be reclaimed
+
+    Returns
+    -------
+        int
+            Bytes reclaimed
+    '''
+    if action == 'keep':
+        return 0
+    paths = [x for x in paths if os.path.exists(x)]
+    size = get_size(paths)
+    if dry_run:
+        return size
+    for path in paths:
+        if action == 'archive':
+            archived_path = os.path.join(archive_path, os.path.splitdrive(
+                os.path.abspath(path))[1].lstrip('/\\'))
+            os.makedirs(os.path.dirname(archived_path), exist_ok=True)
+            shutil.move(path, archived_path)
+        elif os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    return size
+
+
+def format_report(results):
+    '''
+    Formats the space reclaimed by region and kind.
+
+    Parameters
+    ----------
+        results : list
+            planner.Result of each region with bytes reclaimed by kind as the
+            value
+
+    Returns
+    -------
+        str
+            Report
+    '''
+    kinds = [x for x in KINDS if any(x in r.value for r in results)]
+    header = '%-32s' % 'Region' + ''.join('%12s' % x for x in kinds) + \
+        '%12s' % 'total'
+    lines = [header, '-' * len(header)]
+    totals = dict.fromkeys(kinds, 0)
+    for result in results:
+        for kind in kinds:
+            totals[kind] += result.value.get(kind, 0)
+        lines.append('%-32s' % result.region[:32] + ''.join(
+            '%12s' % _format_size(result.value.get(kind, 0))
+            for kind in kinds) + '%12s' % _format_size(
+                sum(result.value.values())))
+    lines.append('-' * len(header))
+    lines.append('%-32s' % 'Total' + ''.join(
+        '%12s' % _format_size(totals[kind]) for kind in kinds) +
+        '%12s' % _format_size(sum(totals.values())))
+    return '\n'.join(lines)
+
+
+def _format_size(size):
+    # Formats bytes in MB or GB
+    if size >= 1024**3:
+        return '%.1f GB' % (size / 1024**3)
+    return '%.1f MB' % (size / 1024**2)
@@ -0,0 +1,367 @@
+################################################################################
+# Name:    session.py
+# Purpose: This module provides a multi-year session that runs CanoPy for
+#          several analysis years while sharing physiographic regions, their
+#          geometries, snap grids, and tile catalogs across them.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+from .canopy import Canopy
+from . import catalog
+from . import masks
+from . import sharedmem
+from . import query
+from . import planner
+
+
+class Session:
+    '''
+    Object to run CanoPy for several analysis years in one pass. Each year has
+    its own Canopy object and configuration file, so NAIP paths, NAIP QQ
+    layers, and inverted region lists stay separate by year. Physiographic
+    regions, their geometries and masks, snap grids, and tile catalogs are
+    read once and shared by all years that use the same layers and rasters.
+
+    Attributes
+    ----------
+    canopies : dict
+        Canopy objects by analysis year.
+    shared_arrays : sharedmem.SharedArrays
+        Read-only arrays, e.g., region masks, published in shared memory for
+        the worker processes of all years.
+
+    Methods
+    -------
+    regions(phyregs):
+        Sets the physiographic regions to process for all years.
+    get_region_names(phyregs_layer):
+        Returns the names of all physiographic regions by ID.
+    get_region_geometries(phyregs_layer, spatref_wkid):
+        Returns the polygons of all physiographic regions by ID.
+    get_region_tiles(naipqq_layer, naipqq_phyregs_field):
+        Returns the NAIP tiles of all physiographic regions by ID.
+    get_tile_filenames(naipqq_layer):
+        Returns the filenames of all NAIP tiles.
+    get_tile_areas(naipqq_layer, spatref_wkid):
+        Returns the footprint areas of all NAIP tiles.
+    get_snap_grid(snaprast_path):
+        Returns the snap grid of a snap raster.
+    get_mask_cache(mask_path):
+        Returns the region mask cache of a folder.
+    scan(path):
+        Returns the file sizes in a folder.
+    plan(stages, dry_run):
+        Lists the pending work of stages for all years.
+    run(stages, stage_args):
+        Runs stages for all years.
+    query(block_size, cache_bytes):
+        Returns a query object for the canopy TIFF files of all years.
+    close():
+        Releases the shared memory of the session.
+    '''
+
+    def __init__(self, config_paths):
+        '''
+        Parameters
+        ----------
+            config_paths : list
+                Paths to the *.cfg files of analysis years
+        '''
+        self.canopies = {}
+        for config_path in config_paths:
+            canopy = Canopy(config_path)
+            if canopy.analysis_year in self.canopies:
+                raise ValueError('Duplicate analysis year %d in %s' % (
+                    canopy.analysis_year, config_path))
+            canopy.session = self
+            self.canopies[canopy.analysis_year] = canopy
+        self.__region_names = {}
+        self.__region_geometries = {}
+        self.__region_tiles = {}
+        self.__tile_filenames = {}
+        self.__tile_areas = {}
+        self.__snap_grids = {}
+        self.__mask_caches = {}
+        self.__scans = {}
+        # the manifest lets a later session remove the shared memory of a
+        # crashed one
+        first = self.canopies[min(self.canopies)] if self.canopies else None
+        self.shared_arrays = sharedmem.SharedArrays(
+                '%s/shared_memory.txt' % first.results_path if first else None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def regions(self, phyregs):
+        '''
+        Sets the physiographic regions to process for all years.
+
+        Parameters
+        ----------
+            phyregs : list
+                List of physiographic region IDs
+        '''
+        for canopy in self.canopies.values():
+            canopy.regions(phyregs)
+
+    def get_region_names(self, phyregs_layer):
+        '''
+        Returns the names of all physiographic regions by ID.
+
+        Parameters
+        ----------
+            phyregs_layer : str
+                Physiographic regions layer
+
+        Returns
+        -------
+            dict
+                Region names with underscores by physiographic region ID
+        '''
+        if phyregs_layer not in self.__region_names:
+            self.__region_names[phyregs_layer] = catalog.read_region_names(
+                    phyregs_layer)
+        return self.__region_names[phyregs_layer]
+
+    def get_region_geometries(self, phyregs_layer, spatref_wkid):
+        '''
+        Returns the polygons of all physiographic regions by ID.
+
+        Parameters
+        ----------
+            phyregs_layer : str
+                Physiographic regions layer
+            spatref_wkid : int
+                WKID of the spatial reference of the polygons
+
+        Returns
+        -------
+            dict
+                arcpy.Polygon by physiographic region ID
+        '''
+        key = (phyregs_layer, spatref_wkid)
+        if key not in self.__region_geometries:
+            self.__region_geometries[key] = catalog.read_region_geometries(
+                    phyregs_layer, spatref_wkid)
+        return self.__region_geometries[key]
+
+    def get_region_tiles(self, naipqq_layer, naipqq_phyregs_field):
+        '''
+        Returns the NAIP tiles of all physiographic regions by ID.
+
+        Parameters
+        ----------
+            naipqq_layer : str
+                NAIP QQ layer
+            naipqq_phyregs_field : str
+                Field with comma-separated physiographic region IDs
+
+        Returns
+        -------
+            dict
+                Lists of tile filenames by physiographic region ID
+        '''
+        key = (naipqq_layer, naipqq_phyregs_field)
+        if key not in self.__region_tiles:
+            self.__region_tiles[key] = catalog.read_region_tiles(
+                    naipqq_layer, naipqq_phyregs_field)
+        return self.__region_tiles[key]
+
+    def get_tile_filenames(self, naipqq_layer):
+        '''
+        Returns the filenames of all NAIP tiles for addressing QQs.
+
+        Parameters
+        ----------
+            naipqq_layer : str
+                NAIP QQ layer
+
+        Returns
+        -------
+            list
+                Sorted tile filenames without the date and extension, e.g.,
+                m_3408301_ne_17_1
+        '''
+        if naipqq_layer not in self.__tile_filenames:
+            self.__tile_filenames[naipqq_layer] = \
+                    catalog.read_tile_filenames(naipqq_layer)
+        return self.__tile_filenames[naipqq_layer]
+
+    def get_tile_areas(self, naipqq_layer, spatref_wkid):
+        '''
+        Returns the footprint areas of all NAIP tiles.
+
+        Parameters
+        ----------
+            naipqq_layer : str
+                NAIP QQ layer
+            spatref_wkid : int
+                WKID of the spatial reference of the areas
+
+        Returns
+        -------
+            dict
+                Footprint areas by tile filename without the date and
+                extension
+        '''
+        key = (naipqq_layer, spatref_wkid)
+        if key not in self.__tile_areas:
+            self.__tile_areas[key] = catalog.read_tile_areas(naipqq_layer,
+                                                             spatref_wkid)
+        return self.__tile_areas[key]
+
+    def get_snap_grid(self, snaprast_path):
+        '''
+        Returns the snap grid of a snap raster.
+
+        Parameters
+        ----------
+            snaprast_path : str
+                Path to the snap raster
+
+        Returns
+        -------
+            tuple
+                ((x, y) upper left corner, (width, height) cell size)
+        '''
+        key = os.path.abspath(snaprast_path)
+        if key not in self.__snap_grids:
+            self.__snap_grids[key] = catalog.read_snap_grid(snaprast_path)
+        return self.__snap_grids[key]
+
+    def get_mask_cache(self, mask_path):
+        '''
+        Returns the region mask cache of a folder, which keeps loaded masks in
+        memory for all years.
+
+        Parameters
+        ----------
+            mask_path : str
+                Folder of cached region masks
+
+        Returns
+        -------
+            masks.MaskCache
+        '''
+        key = os.path.abspath(mask_path)
+        if key not in self.__mask_caches:
+            self.__mask_caches[key] = masks.MaskCache(mask_path)
+        return self.__mask_caches[key]
+
+    def scan(self, path):
+        '''
+        Returns the file sizes in a folder scanned once per plan.
+
+        Parameters
+        ----------
+            path : str
+                Folder path
+
+        Returns
+        -------
+            dict
+                File sizes in bytes by filename
+        '''
+        key = os.path.abspath(path)
+        if key not in self.__scans:
+            self.__scans[key] = planner.scan_dir(path)
+        return self.__scans[key]
+
+    def plan(self, stages=None, dry_run=True):
+        '''
+        Lists the pending work of stages for all years. Folders shared by
+        years, e.g., NAIP folders, are scanned once.
+
+        Parameters
+        ----------
+            stages : list
+                Stage names from planner.STAGES; all stages by default
+            dry_run : bool
+                True to print the plan of each year
+
+        Returns
+        -------
+            dict
+                Lists of planner.Task by analysis year
+        '''
+        self.__scans = {}
+        plans = {}
+        for year, canopy in sorted(self.canopies.items()):
+            if dry_run:
+                print('Analysis year %d' % year)
+            plans[year] = canopy.plan(stages, dry_run)
+        return plans
+
+    def run(self, stages=None, stage_args=None):
+        '''
+        Runs stages for all years in one pass. Stages are run in the order of
+        planner.STAGES, and for each stage, years with more estimated work
+        run first. Each year runs its regions longest first with Canopy.run().
+        Years without pending tasks for a stage are skipped.
+
+        Parameters
+        ----------
+            stages : list
+                Stage names from planner.STAGES; all stages by default
+            stage_args : dict
+                Tuples of arguments by stage name, e.g.,
+                {'sieve_canopy_tif': (4,)}
+
+        Returns
+        -------
+            dict
+                Lists of planner.Result by analysis year by stage name
+        '''
+        if stages is None:
+            stages = planner.STAGES
+        if stage_args is None:
+            stage_args = {}
+        plans = self.plan(stages, dry_run=False)
+        results = {}
+        for stage in planner.STAGES:
+            if stage not in stages:
+                continue
+            seconds = {}
+            for year, tasks in plans.items():
+                stage_tasks = [x for x in tasks if x.stage == stage]
+                if stage_tasks:
+                    seconds[year] = sum(x.seconds for x in stage_tasks)
+            for year in sorted(seconds, key=lambda x: -seconds[x]):
+                print('Analysis year %d: %s' % (year, stage))
+                results.setdefault(stage, {})[year] = self.canopies[year].run(
+                        [stage], stage_args, plans[year])[stage]
+        return results
+
+    def query(self, block_size=512, cache_bytes=256 * 1024**2):
+        '''
+        Returns a query object for the canopy TIFF files of all years, e.g.,
+        to compare canopy at points or in bounding boxes between years.
+
+        Parameters
+        ----------
+            block_size : int
+                Number of rows and columns of a cached block
+            cache_bytes : int
+                Maximum bytes of cached blocks
+
+        Returns
+        -------
+            query.CanopyQuery
+        '''
+        return query.CanopyQuery.from_canopies(
+                [self.canopies[x] for x in sorted(self.canopies)], block_size,
+                cache_bytes)
+
+    def close(self):
+        '''
+        Releases the shared memory of the session. It is also released at
+        interpreter exit, or by a later session after a crash.
+        '''
+        self.shared_arrays.close()
@@ -0,0 +1,220 @@
+################################################################################
+# Name:    sharedmem.py
+# Purpose: This module provides read-only NumPy arrays in shared memory that
+#          are published once by the main process and attached zero-copy by
+#          worker processes.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import atexit
+import itertools
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+
+# Picklable handle of a published array that is passed to worker tasks
+SharedArray = namedtuple('SharedArray', ['name', 'shape', 'dtype'])
+
+# Shared memory blocks attached by this process by name
+_attached = {}
+
+
+def _open(name):
+    # Opens an existing shared memory block without registering it with the
+    # resource tracker, which would otherwise unlink the block when a worker
+    # process exits on POSIX. Python 3.13 added the track argument; older
+    # versions register unconditionally.
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        pass
+    if os.name == 'nt':
+        return shared_memory.SharedMemory(name)
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name)
+    finally:
+        resource_tracker.register = register
+
+
+def attach(arr):
+    '''
+    Returns the array of a handle without copying it. Shared memory blocks
+    stay attached for the life of the process, so tasks run by the same
+    worker attach each block only once.
+
+    Parameters
+    ----------
+        arr : SharedArray or numpy.ndarray
+            Handle of a published array; an array is returned as is
+
+    Returns
+    -------
+        numpy.ndarray
+            Read-only array
+    '''
+    if not isinstance(arr, SharedArray):
+        return arr
+    if arr.name not in _attached:
+        _attached[arr.name] = _open(arr.name)
+    out = np.ndarray(arr.shape, dtype=arr.dtype,
+                     buffer=_attached[arr.name].buf)
+    out.flags.writeable = False
+    return out
+
+
+def _pid_alive(pid):
+    # Returns True if a process is running
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def cleanup(manifest_path):
+    '''
+    Unlinks the shared memory blocks left by crashed processes. Blocks are
+    listed in a manifest file with the IDs of the processes that published
+    them, and the blocks of processes that are no longer running are removed.
+    On Windows, blocks are freed by the OS when the last process using them
+    exits, so nothing is left to remove.
+
+    Parameters
+    ----------
+        manifest_path : str
+            Path to the manifest file
+
+    Returns
+    -------
+        list
+            Names of unlinked blocks
+    '''
+    if os.name == 'nt' or not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path) as f:
+        entries = [line.split() for line in f if line.strip()]
+    live = []
+    unlinked = []
+    for pid, name in entries:
+        if _pid_alive(int(pid)):
+            live.append((pid, name))
+            continue
+        try:
+            shm = shared_memory.SharedMemory(name)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
+        unlinked.append(name)
+    with open(manifest_path, 'w') as f:
+        for pid, name in live:
+            f.write('%s %s\n' % (pid, name))
+    return unlinked
+
+
+class SharedArrays:
+    '''
+    Object to publish read-only arrays in shared memory and to manage their
+    names and lifetimes. Blocks are unlinked by close(), at interpreter exit,
+    or by cleanup() of a later process after a crash.
+
+    Attributes
+    ----------
+    manifest_path : str
+        Manifest file listing the published blocks, or None.
+
+    Methods
+    -------
+    publish(key, arr):
+        Copies an array into shared memory once and returns its handle.
+    close():
+        Unlinks all published blocks.
+    '''
+
+    __counter = itertools.count()
+
+    def __init__(self, manifest_path=None):
+        '''
+        Parameters
+        ----------
+            manifest_path : str
+                Manifest file for cleaning up after crashes; None for no
+                manifest
+        '''
+        self.manifest_path = manifest_path
+        if manifest_path:
+            manifest_dir = os.path.dirname(manifest_path)
+            if manifest_dir and not os.path.exists(manifest_dir):
+                os.makedirs(manifest_dir)
+            cleanup(manifest_path)
+        self.__blocks = {}
+        self.__handles = {}
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def publish(self, key, arr):
+        '''
+        Copies an array into shared memory once and returns its handle.
+        Arrays published again with the same key are not copied again.
+
+        Parameters
+        ----------
+            key : hashable
+                Key of the array, e.g., ('mask', hash)
+            arr : numpy.ndarray
+                Array to publish
+
+        Returns
+        -------
+            SharedArray
+                Handle to pass to worker tasks
+        '''
+        if key in self.__handles:
+            return self.__handles[key]
+        name = 'canopy_%d_%d' % (os.getpid(), next(SharedArrays.__counter))
+        if self.manifest_path:
+            with open(self.manifest_path, 'a') as f:
+                f.write('%d %s\n' % (os.getpid(), name))
+        shm = shared_memory.SharedMemory(name, create=True,
+                                         size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        self.__blocks[name] = shm
+        handle = SharedArray(name, arr.shape, arr.dtype.str)
+        self.__handles[key] = handle
+        return handle
+
+    def close(self):
+        '''
+        Unlinks all published blocks. Workers that are still attached keep
+        their memory until they exit.
+        '''
+        for name, shm in self.__blocks.items():
+            _attached.pop(name, None)
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        if self.manifest_path and self.__blocks and \
+                os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                entries = [line for line in f if line.split() and
+                           line.split()[1] not in self.__blocks]
+            with open(self.manifest_path, 'w') as f:
+                f.writelines(entries)
+        self.__blocks = {}
+        self.__handles = {}
@@ -19,6 +19,29 @@ config_template = """
 
 verbosity = 1
 
+# Number of worker processes for parallelized functions. 0 uses all CPUs and 1
+# runs everything in the current process.
+processes = 0
+
+# Number of rows and columns of the blocks in which large rasters are read and
+# processed.
+block_size = 4096
+
+# Maximum memory in MB for the working sets of concurrent worker tasks. The
+# working set of each task is estimated from the dimensions and band count of
+# its raster, and tasks wait until enough memory is released by running tasks.
+# 0 means no limit.
+memory_budget = 0
+
+# NDVI pre-screen in reproject_naip_tiles(). The vegetation score of a tile is
+# the fraction of its cells with an NDVI of at least ndvi_vegetation. Tiles
+# whose scores are less than min_vegetation_score, e.g., open water and dense
+# urban cores, get all-noncanopy fr*.tif files and need not be classified by
+# Feature Analyst. Scores are written to vegetation.txt in each region folder.
+# 0 disables the pre-screen.
+ndvi_vegetation = 0.2
+min_vegetation_score = 0
+
 # This input layer contains the polygon features for all physiographic regions.
 # Data source: Physiographic_Districts_GA.zip
 #              Michael Torbett, GFC, October 3, 2019 at 10:48am
@@ -123,6 +146,46 @@ snaprast_path = %(analysis_path)s/Data/rm_3408504_nw_16_1_20090824.tif
 # This folder will contain all result files.
 results_path = %(analysis_path)s/Results 
 
+# This optional folder will contain the reprojected NAIP tiles (Inputs) and
+# intermediate output tiles (Outputs) of all physiographic regions, so tiles
+# intersecting multiple regions are processed and stored only once. Each
+# region folder then lists its tiles in tiles.txt and the tiles to batch
+# classify in batch.txt, which are hard linked into its Inputs folder where
+# possible. A tile intersecting multiple regions is batched only by the first
+# region listing it. Only mosaicked files are written to its Outputs folder.
+# Leave it empty to store tiles by region.
+#   C:/.../Results/ (results_path)
+#                  Tiles/ (tile_store_path)
+#                        Inputs/
+#                               reprojected NAIP tiles
+#                        Outputs/
+#                                intermediate output tiles
+#                  Winder_Slope/
+#                               tiles.txt
+#                               batch.txt
+#                               Inputs/
+#                                      links to batched NAIP tiles
+#                               Outputs/
+#                                       canopy_2009_Winder_Slope.tif
+tile_store_path =
+
+# Physiographic regions are rasterized once onto the snap grid and cached in
+# this folder as bit-packed masks, which are used for clipping mosaics to
+# regions instead of ExtractByMask. Masks are keyed by region geometry and
+# snap grid, so they are shared by analysis years and rebuilt if either
+# changes. Leave it empty to use results_path/Masks.
+mask_path =
+
+# Pixel classifier trained by train_pixel_classifier() and used by
+# classify_naip_tiles() as a batch alternative to Feature Analyst. Leave it
+# empty to use results_path/classifier.npz.
+classifier_path =
+
+# Corner of any cell of the coarse grid for aggregate_canopy_tif() as x, y in
+# the output spatial reference, e.g., a corner of the NLCD 30 m grid. It has to
+# be on the snap grid. Leave it empty to align coarse cells to the snap grid.
+cover_origin =
+
 # This list contains all physiographic region IDs, but it is not used at all.
 # reproject_input_tiles(), convert_afe_to_final_tiles(), clip_final_tiles(),
 # and mosaic_clipped_final_tiles() take a list of physiographic region IDs (a
@@ -130,7 +193,59 @@ results_path = %(analysis_path)s/Results
 # defined here as a reference only.
 phyreg_ids = [8,7,2,14,22,5,4,12,9,11,20,3,6,26,13,17,24,25,15,23,21,16,18,19]
 
+# Predicate parameter where 1 = True and 0 = False. Determines whether or not
+# to detect tiles inverted by Feature Analyst from their agreement with
+# overlapping tiles and NDVI, and flip them before mosaicking. Flipped tiles
+# are listed in inverted_tiles.txt in the tile folder. If enabled, regions need
+# not be listed in inverted_phyreg_ids, and listed regions are not inverted
+# again for GT points or history stacks.
+detect_inverted_tiles = 0
+
 # This list contains physiographic region IDs whose trained model produces an
 # inverted result.
 inverted_phyreg_ids = 5, 21, 12, 4, 11, 17, 2, 26, 20, 16
+
+[output]
+
+# Compression and block size of the rasters written by CanoPy. Intermediate rasters
+# are reprojected NAIP tiles, final tiles (fr*.tif and cfr*.tif), mosaics, and
+# temporary blocks, which are written once and read a few times, so a fast
+# compression is preferred. Final rasters are canopy_*.tif, filled_*.tif,
+# sieved_*.tif, and corrected_*.tif, which are delivered, so a stronger
+# compression is preferred. Compression is one of NONE, LZW, DEFLATE, ZSTD, and
+# PACKBITS. If a compression is not given, arcpy defaults are used. Run
+#   python -m canopy.benchmark OUTPUT_FOLDER
+# to compare the sizes and write speeds of compressions on this machine. arcpy
+# always writes tiled GeoTIFF files, so only the block size of their tiles can
+# be set.
+intermediate_compression = LZW
+intermediate_block_size = 256
+
+final_compression = DEFLATE
+final_block_size = 512
+
+[retention]
+
+# Actions on intermediate files once their downstream outputs are complete by
+# reclaim_intermediates(): keep, delete, or archive. Kinds are reprojected
+# tiles (r*.tif in Inputs), AFE outputs (r*.shp and r*.tif in Outputs), final
+# tiles (fr*.tif), clipped final tiles (cfr*.tif), mosaics (mosaic_*.tif), and
+# temporary folders (tmp_*) left by interrupted runs.
+reprojected = keep
+afe = keep
+final = keep
+clipped = keep
+mosaic = keep
+temporary = delete
+
+# Folder to which archived files are moved with their absolute paths, e.g., on
+# a slower or cheaper drive. It is required if any kind is archived.
+archive_path =
+
+# Predicate parameter where 1 = True and 0 = False. Determines whether or not
+# to keep reprojected tiles, final tiles, clipped final tiles, and mosaics
+# regardless of their actions, so that tiles can be reclassified, inverted
+# tiles detected, and region mosaics patched by patch_region_mosaics() in
+# incremental re-runs.
+protected = 1
 """
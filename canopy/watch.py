@@ -0,0 +1,188 @@
+################################################################################
+# Name:    watch.py
+# Purpose: This module provides a folder watcher that reports new and modified
+#          files using inotify on Linux and polling elsewhere.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# inotify event masks from sys/inotify.h
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+_EVENT_FORMAT = 'iIII'
+_EVENT_SIZE = struct.calcsize(_EVENT_FORMAT)
+
+
+def _load_inotify():
+    # Returns libc if it provides inotify, or None
+    if not hasattr(os, 'uname') or os.uname().sysname != 'Linux':
+        return None
+    libc_path = ctypes.util.find_library('c')
+    if libc_path is None:
+        return None
+    libc = ctypes.CDLL(libc_path, use_errno=True)
+    if not hasattr(libc, 'inotify_init'):
+        return None
+    return libc
+
+
+def is_stable(paths, stable_time):
+    '''
+    Checks if files exist and have not been modified for a period of time.
+
+    Parameters
+    ----------
+        paths : list
+            File paths
+        stable_time : float
+            Seconds since the last modification
+
+    Returns
+    -------
+        bool
+    '''
+    now = time.time()
+    for path in paths:
+        try:
+            if now - os.stat(path).st_mtime < stable_time:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+class FolderWatcher:
+    '''
+    Object to watch folders for new and modified files. It uses inotify where
+    available and falls back to polling the folders.
+
+    Attributes
+    ----------
+    paths : list
+        Folders to watch.
+    interval : float
+        Polling interval in seconds.
+    use_inotify : bool
+        True if inotify is used.
+
+    Methods
+    -------
+    wait(timeout):
+        Waits for changes and returns the paths of changed files.
+    close():
+        Stops watching the folders.
+    '''
+
+    def __init__(self, paths, interval=10, use_inotify=True):
+        '''
+        Parameters
+        ----------
+            paths : list
+                Folders to watch
+            interval : float
+                Polling interval in seconds when inotify is not available
+            use_inotify : bool
+                False to always poll the folders
+        '''
+        self.paths = sorted(set(os.path.abspath(x) for x in paths))
+        self.interval = interval
+        self.__fd = None
+        self.__wds = {}
+        self.__snapshot = {}
+
+        libc = _load_inotify() if use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init()
+            if fd >= 0:
+                self.__fd = fd
+                mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+                for path in self.paths:
+                    wd = libc.inotify_add_watch(fd, path.encode(), mask)
+                    if wd >= 0:
+                        self.__wds[wd] = path
+        self.use_inotify = self.__fd is not None
+        if not self.use_inotify:
+            for path in self.paths:
+                self.__snapshot.update(self.__scan(path))
+
+    def __scan(self, path):
+        # Returns the size and modification time of the files in a folder
+        snapshot = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_file():
+                        st = entry.stat()
+                        snapshot[entry.path] = (st.st_size, st.st_mtime)
+        except OSError:
+            pass
+        return snapshot
+
+    def wait(self, timeout=None):
+        '''
+        Waits for files to be created or modified.
+
+        Parameters
+        ----------
+            timeout : float
+                Maximum seconds to wait; None waits for one polling interval
+
+        Returns
+        -------
+            set
+                Paths of created or modified files, which may be empty
+        '''
+        if timeout is None:
+            timeout = self.interval
+        if self.use_inotify:
+            return self.__read_events(timeout)
+
+        time.sleep(timeout)
+        changed = set()
+        snapshot = {}
+        for path in self.paths:
+            snapshot.update(self.__scan(path))
+        for path, stat in snapshot.items():
+            if self.__snapshot.get(path) != stat:
+                changed.add(path)
+        self.__snapshot = snapshot
+        return changed
+
+    def __read_events(self, timeout):
+        # Reads pending inotify events
+        changed = set()
+        ready = select.select([self.__fd], [], [], timeout)[0]
+        while ready:
+            buf = os.read(self.__fd, 64 * 1024)
+            i = 0
+            while i + _EVENT_SIZE <= len(buf):
+                wd, mask, cookie, length = struct.unpack_from(_EVENT_FORMAT,
+                                                              buf, i)
+                name = buf[i + _EVENT_SIZE:i + _EVENT_SIZE + length]
+                name = name.rstrip(b'\0').decode()
+                if wd in self.__wds and name:
+                    changed.add(os.path.join(self.__wds[wd], name))
+                i += _EVENT_SIZE + length
+            ready = select.select([self.__fd], [], [], 0)[0]
+        return changed
+
+    def close(self):
+        '''
+        Stops watching the folders.
+        '''
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+            self.__wds = {}
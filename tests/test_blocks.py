@@ -0,0 +1,102 @@
+################################################################################
+# Name:    test_blocks.py
+# Purpose: This module tests that parallel tasks are admitted under a memory
+#          budget and their results are yielded in order.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import time
+import multiprocessing
+import pytest
+from canopy import blocks
+
+
+def _sleep(task):
+    # Sleeps for a task and returns its index and running interval, or raises
+    # if it fails
+    index, seconds, fail = task
+    start_time = time.time()
+    time.sleep(seconds)
+    if fail:
+        raise ValueError('Task %d failed' % index)
+    return index, start_time, time.time()
+
+
+def _max_running(intervals, memory):
+    # Returns the maximum number and memory of tasks running at once. A task
+    # is started only after another has returned, so intervals that touch do
+    # not overlap.
+    max_count = max_memory = 0
+    for start_time, _ in intervals:
+        running = [i for i, (x, y) in enumerate(intervals)
+                   if x <= start_time < y]
+        max_count = max(max_count, len(running))
+        max_memory = max(max_memory, sum(memory[i] for i in running))
+    return max_count, max_memory
+
+
+def test_map_parallel_yields_in_order():
+    # later tasks finish first
+    tasks = [(i, 0.2 - 0.04 * i, False) for i in range(5)]
+    results = list(blocks.map_parallel(_sleep, tasks, 3, memory=[1] * 5,
+                                       memory_budget=10))
+    assert [x[0] for x in results] == list(range(5))
+    assert results[2][2] < results[0][2]
+
+
+def test_map_parallel_stays_within_budget():
+    tasks = [(i, 0.05, False) for i in range(8)]
+    memory = [4, 3, 4, 2, 5, 1, 4, 3]
+    results = list(blocks.map_parallel(_sleep, tasks, 3, memory=memory,
+                                       memory_budget=8))
+    assert [x[0] for x in results] == list(range(8))
+    max_count, max_memory = _max_running([x[1:] for x in results], memory)
+    assert max_count <= 3 and max_memory <= 8
+    # the budget admits more than one task at a time
+    assert max_count > 1
+
+
+def test_map_parallel_runs_oversized_task_alone():
+    tasks = [(i, 0.1, False) for i in range(4)]
+    memory = [2, 20, 2, 2]
+    intervals = [x[1:] for x in blocks.map_parallel(
+        _sleep, tasks, 3, memory=memory, memory_budget=10)]
+    for i in (0, 2, 3):
+        assert (intervals[i][1] <= intervals[1][0] or
+                intervals[1][1] <= intervals[i][0])
+    # tasks are started in order, so the small task after the oversized one
+    # waits for it
+    assert intervals[2][0] >= intervals[1][1]
+
+
+def test_map_parallel_propagates_errors():
+    # the failed task frees its memory for the next one, and the results
+    # before it are yielded first
+    tasks = [(0, 0.05, False), (1, 0.05, True), (2, 0.05, False)]
+    results = blocks.map_parallel(_sleep, tasks, 3, memory=[5] * 3,
+                                  memory_budget=5)
+    assert next(results)[0] == 0
+    with pytest.raises(ValueError, match='Task 1 failed'):
+        next(results)
+    results.close()
+
+
+def test_map_parallel_with_warm_pool():
+    with multiprocessing.Pool(3) as pool:
+        blocks.set_pool(pool, 3)
+        try:
+            tasks = [(i, 0.05, False) for i in range(6)]
+            memory = [4, 3, 4, 2, 5, 1]
+            results = list(blocks.map_parallel(
+                _sleep, tasks, 0, costs=[1, 6, 2, 5, 3, 4], memory=memory,
+                memory_budget=8))
+        finally:
+            blocks.set_pool(None)
+    # tasks are started longest first
+    assert [x[0] for x in results] == [1, 3, 5, 4, 2, 0]
+    max_count, max_memory = _max_running([x[1:] for x in results],
+                                         [memory[x[0]] for x in results])
+    assert max_count <= 3 and max_memory <= 8
@@ -0,0 +1,54 @@
+################################################################################
+# Name:    test_classifier.py
+# Purpose: This module tests the features and trees of the classifier module.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+from canopy import classifier
+
+
+def _naip(seed=0, shape=(60, 80)):
+    # Returns a synthetic NAIP array whose canopy pixels are dark in red and
+    # bright in near infrared, and the canopy array
+    rng = np.random.default_rng(seed)
+    canopy = (rng.random(shape) < 0.4).astype(np.uint8)
+    arr = rng.integers(60, 120, (4,) + shape).astype(np.uint8)
+    arr[0] = np.where(canopy, rng.integers(20, 70, shape),
+                      rng.integers(90, 160, shape))
+    arr[3] = np.where(canopy, rng.integers(140, 220, shape),
+                      rng.integers(60, 130, shape))
+    return arr, canopy
+
+
+def test_features():
+    arr, _ = _naip()
+    arr[:, 0, :5] = 0
+    x, valid = classifier.features(arr)
+    assert x.shape == (60 * 80, len(classifier.FEATURES))
+    assert (x[:, 3] == arr[3].ravel()).all()
+    assert valid.sum() == 60 * 80 - 5 and not valid[:5].any()
+
+
+def test_fit_predict(tmp_path):
+    arr, canopy = _naip()
+    x, _ = classifier.features(arr)
+    model = classifier.PixelClassifier(n_trees=4, max_depth=6)
+    model.fit(x, canopy.ravel())
+
+    arr, canopy = _naip(1)
+    x, _ = classifier.features(arr)
+    predicted = model.predict(x)
+    assert (predicted == canopy.ravel()).mean() > 0.95
+    proba = model.predict_proba(x, chunk_size=1000)
+    assert ((proba >= 0) & (proba <= 1)).all()
+    assert (proba == model.predict_proba(x)).all()
+
+    model_path = str(tmp_path / 'classifier.npz')
+    model.save(model_path)
+    loaded = classifier.PixelClassifier.load(model_path)
+    assert loaded.max_depth == 6
+    assert (loaded.predict(x) == predicted).all()
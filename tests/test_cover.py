@@ -0,0 +1,57 @@
+################################################################################
+# Name:    test_cover.py
+# Purpose: This module tests the aggregation and merging of canopy cover in
+#          the cover module.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+from canopy import cover
+
+
+def test_coarse_counts():
+    arr = np.array([[1, 0, 3, 3],
+                    [1, 1, 3, 3],
+                    [0, 0, 1, 3],
+                    [0, 3, 0, 0]], dtype=np.uint8)
+    canopy, valid = cover.coarse_counts(arr, 2)
+    assert canopy.tolist() == [[3, 0], [0, 1]]
+    assert valid.tolist() == [[4, 0], [3, 3]]
+
+
+def test_cover():
+    canopy = np.array([[3, 0], [1, 2]], dtype=np.uint32)
+    valid = np.array([[4, 0], [3, 3]], dtype=np.uint32)
+    assert cover.cover(canopy, valid).tolist() == [[75, 255], [33, 67]]
+    fraction = cover.cover(canopy, valid, percent=False)
+    assert fraction.dtype == np.float32
+    assert np.allclose(fraction, [[0.75, -1], [1 / 3, 2 / 3]])
+
+
+def test_coarse_extent():
+    extent, shape = cover.coarse_extent((12, 7, 75, 61), (1, 1), 30, (0, 0))
+    assert extent == (0, 0, 90, 90)
+    assert shape == (3, 3)
+
+
+def test_merge_counts(tmp_path):
+    # a coarse cell split by a region border gets the cover of all its valid
+    # cells in both regions
+    rng = np.random.default_rng(0)
+    arr = rng.choice(np.array([0, 1, 3], dtype=np.uint8), (40, 60))
+    region = np.zeros(arr.shape, dtype=bool)
+    region[:, :25] = True
+    paths = []
+    for i, inside in enumerate((region, ~region)):
+        part = np.where(inside, arr, 3)
+        canopy, valid = cover.coarse_counts(part, 10)
+        path = str(tmp_path / ('cover_10_2019_%d.npz' % i))
+        cover.save_counts(path, (0, 0, 60, 40), canopy, valid)
+        paths.append(path)
+    extent, canopy, valid = cover.merge_counts(paths, (10, 10))
+    assert extent == (0, 0, 60, 40)
+    assert (cover.cover(canopy, valid) ==
+            cover.cover(*cover.coarse_counts(arr, 10))).all()
@@ -0,0 +1,111 @@
+################################################################################
+# Name:    test_filters.py
+# Purpose: This module tests that block filters with halos give the same
+#          results as filtering entire arrays.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+import pytest
+from scipy import ndimage
+from canopy import blocks
+from canopy import filters
+
+
+def _canopy(shape, seed):
+    # Returns a random canopy array with patches, holes, and nodata edges
+    rng = np.random.default_rng(seed)
+    arr = (rng.random(shape) < 0.5).astype(np.uint8)
+    arr[rng.random(shape) < 0.1] = 3
+    arr[:, :3] = 3
+    arr[20:35, 40:60] = 3
+    return arr
+
+
+def _filter_by_blocks(arr, func, args, block_size, halo):
+    # Filters an array block by block as the Canopy class does
+    out = np.empty_like(arr)
+    for block, window in blocks.iter_blocks(arr.shape, block_size, halo):
+        filtered = func(arr[window[0]:window[1], window[2]:window[3]],
+                        *args)[0]
+        r0, r1, c0, c1 = block
+        out[r0:r1, c0:c1] = blocks.crop(filtered, block, window)
+    return out
+
+
+def test_iter_blocks_covers_raster_once():
+    count = np.zeros((37, 53), dtype=int)
+    for block, window in blocks.iter_blocks(count.shape, 16, 3):
+        r0, r1, c0, c1 = block
+        count[r0:r1, c0:c1] += 1
+        assert window == (max(r0 - 3, 0), min(r1 + 3, 37), max(c0 - 3, 0),
+                          min(c1 + 3, 53))
+    assert (count == 1).all()
+
+
+def test_crop_returns_block_of_window():
+    arr = np.arange(37 * 53).reshape(37, 53)
+    for block, window in blocks.iter_blocks(arr.shape, 16, 3):
+        cropped = blocks.crop(arr[window[0]:window[1], window[2]:window[3]],
+                              block, window)
+        assert (cropped == arr[block[0]:block[1], block[2]:block[3]]).all()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_fill_gaps_by_blocks_matches_entire_array(seed):
+    arr = _canopy((90, 110), seed)
+    max_gap_size = 4
+    expected, count = filters.fill_gaps(arr, max_gap_size)
+    assert count > 0
+    assert (arr[20:35, 40:60] == 3).all() and (expected[20:35, 40:60] ==
+                                               3).all()
+    assert (_filter_by_blocks(arr, filters.fill_gaps, (max_gap_size,), 32,
+                              max_gap_size + 1) == expected).all()
+
+
+@pytest.mark.parametrize('connectivity', (4, 8))
+def test_sieve_by_blocks_matches_entire_array(connectivity):
+    arr = _canopy((90, 110), connectivity)
+    min_size = 5
+    expected, count = filters.sieve(arr, min_size, connectivity)
+    assert count > 0
+    assert (_filter_by_blocks(arr, filters.sieve, (min_size, connectivity),
+                              32, 2 * min_size) == expected).all()
+
+
+def test_sieve_keeps_large_patches():
+    arr = np.zeros((10, 10), dtype=np.uint8)
+    arr[2:5, 2:5] = 1
+    arr[7, 7] = 1
+    sieved, count = filters.sieve(arr, 4)
+    assert count == 1 and sieved[7, 7] == 0 and (sieved[2:5, 2:5] == 1).all()
+
+
+def test_sieve_merges_nested_patches():
+    # a small canopy patch with a one-cell hole is removed with its hole
+    arr = np.zeros((9, 9), dtype=np.uint8)
+    arr[3:6, 3:6] = 1
+    arr[4, 4] = 0
+    sieved, count = filters.sieve(arr, 10)
+    assert count == 8 and (sieved == 0).all()
+
+
+@pytest.mark.parametrize('connectivity', (4, 8))
+def test_sieve_leaves_no_small_patches(connectivity):
+    arr = _canopy((90, 110), connectivity)
+    min_size = 7
+    sieved = filters.sieve(arr, min_size, connectivity)[0]
+    structure = ndimage.generate_binary_structure(2, 1 if connectivity == 4
+                                                  else 2)
+    for k in range(2):
+        labels, nlabels = ndimage.label(sieved == k, structure)
+        sizes = np.bincount(labels.ravel())
+        for label in range(1, nlabels + 1):
+            if sizes[label] < min_size:
+                patch = labels == label
+                edge = ndimage.binary_dilation(patch, structure) & ~patch
+                # only patches surrounded by nodata are kept
+                assert (sieved[edge] == 3).all()
@@ -0,0 +1,107 @@
+################################################################################
+# Name:    test_grid.py
+# Purpose: This module tests the window and rasterization math of the grid
+#          module.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+from canopy import grid
+
+
+def _cell_centers(extent, cellsize, shape):
+    # Returns the x and y coordinates of cell centers
+    rows, cols = shape
+    x = extent[0] + (np.arange(cols) + 0.5) * cellsize[0]
+    y = extent[3] - (np.arange(rows) + 0.5) * cellsize[1]
+    return np.meshgrid(x, y)
+
+
+def _inside(rings, x, y):
+    # Even-odd point in polygon test of each point
+    inside = np.zeros(x.shape, dtype=bool)
+    for ring in rings:
+        for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+            crosses = (y0 <= y) != (y1 <= y)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                xc = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+            inside ^= crosses & (x < xc)
+    return inside
+
+
+def test_cell_window_selects_cell_centers():
+    window = grid.cell_window((0, 0, 10, 10), (1, 1), (10, 10),
+                              (2.4, 3.6, 5.5, 7.2))
+    assert window == (3, 6, 2, 6)
+
+
+def test_cell_window_clips_to_raster():
+    window = grid.cell_window((0, 0, 10, 10), (1, 1), (10, 10),
+                              (-5, -5, 3, 20))
+    assert window == (0, 10, 0, 3)
+
+
+def test_convex_footprint_mask_matches_point_in_polygon():
+    extent, cellsize, shape = (0, 0, 12, 10), (0.5, 0.5), (20, 24)
+    ring = [(5.3, 0.7), (10.1, 5.2), (5.2, 9.6), (0.9, 4.9)]
+    assert grid.is_convex(ring)
+    window = grid.cell_window(extent, cellsize, shape, grid.ring_bbox(ring))
+    mask = grid.convex_footprint_mask(extent, cellsize, window, ring)
+    x, y = _cell_centers(extent, cellsize, shape)
+    r0, r1, c0, c1 = window
+    expected = _inside([ring], x, y)
+    assert (mask == expected[r0:r1, c0:c1]).all()
+    assert not expected[:r0].any() and not expected[r1:].any()
+
+
+def test_is_convex():
+    assert grid.is_convex([(0, 0), (2, 0), (2, 2), (1, 2), (0, 2), (0, 0)])
+    assert not grid.is_convex([(0, 0), (2, 0), (1, 1), (2, 2), (0, 2)])
+
+
+def test_rasterize_polygons_matches_even_odd_rule():
+    extent, cellsize, shape = (0, 0, 20, 16), (1, 1), (16, 20)
+    outer = [(1.2, 1.3), (12.7, 2.1), (14.2, 13.6), (2.3, 12.4)]
+    hole = [(5.1, 5.2), (8.8, 5.3), (8.6, 8.9), (5.3, 8.7)]
+    other = [(14.6, 1.2), (19.4, 1.4), (18.7, 9.3)]
+    polygons = [([outer, hole], 1), ([other], 2)]
+    arr = grid.rasterize_polygons(polygons, extent, cellsize, shape)
+    x, y = _cell_centers(extent, cellsize, shape)
+    expected = np.zeros(shape, dtype=np.uint8)
+    expected[_inside([outer, hole], x, y)] = 1
+    expected[_inside([other], x, y)] = 2
+    assert (arr == expected).all()
+
+    # bands of rows give the same raster
+    banded = np.zeros(shape, dtype=np.int64)
+    for r0, band in grid.iter_rasterized_bands(polygons, extent, cellsize,
+                                               shape, band_rows=3):
+        banded[r0:r0 + len(band)] = band
+    assert (banded == arr).all()
+
+
+def test_rasterize_polygons_shared_edges_do_not_overlap():
+    extent, cellsize, shape = (0, 0, 10, 10), (1, 1), (10, 10)
+    left = [(0, 0), (5, 0), (5, 10), (0, 10)]
+    right = [(5, 0), (10, 0), (10, 10), (5, 10)]
+    arr = grid.rasterize_polygons([([left], 1), ([right], 2)], extent,
+                                  cellsize, shape)
+    assert (arr[:, :5] == 1).all() and (arr[:, 5:] == 2).all()
+
+
+def test_snap_extent_expands_outward():
+    extent, shape = grid.snap_extent((0.3, 0.2, 2.5, 3.9), (0, 0), (1, 1))
+    assert extent == (0, 0, 3, 4) and shape == (4, 3)
+    extent, shape = grid.snap_extent((10.5, 20.5, 11.5, 21.5), (0.5, 0.5),
+                                     (1, 1))
+    assert extent == (10.5, 20.5, 11.5, 21.5) and shape == (1, 1)
+
+
+def test_overlap_windows():
+    windows = grid.overlap_windows((0, 0, 10, 10), (5, 5, 15, 15), (1, 1))
+    assert windows == ((0, 5, 5, 10), (5, 10, 0, 5))
+    assert grid.overlap_windows((0, 0, 10, 10), (10, 0, 20, 10),
+                                (1, 1)) is None
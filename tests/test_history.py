@@ -0,0 +1,70 @@
+################################################################################
+# Name:    test_history.py
+# Purpose: This module tests the bit packing and queries of the history
+#          module.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+import pytest
+from canopy import history
+
+
+def _arrays(nyears, shape=(20, 30), seed=0):
+    # Returns random canopy arrays with nodata 3
+    rng = np.random.default_rng(seed)
+    return [rng.choice(np.array([0, 1, 3], dtype=np.uint8), shape,
+                       p=[0.4, 0.4, 0.2]) for _ in range(nyears)]
+
+
+def test_round_trip():
+    arrays = _arrays(history.MAX_YEARS)
+    stack = history.encode(arrays)
+    assert stack.dtype == np.uint16
+    assert (history.decode(stack, len(arrays)) == np.array(arrays)).all()
+    # cells without any valid years are NODATA
+    nodata = (np.array(arrays) == 3).all(axis=0)
+    assert ((stack == history.NODATA) == nodata).all()
+
+
+def test_inverted():
+    arrays = _arrays(3)
+    flipped = [np.where(x == 3, 3, 1 - x).astype(np.uint8) for x in arrays]
+    stack = history.encode([arrays[0], flipped[1], arrays[2]],
+                           [False, True, False])
+    assert (stack == history.encode(arrays)).all()
+
+
+def test_too_many_years():
+    with pytest.raises(ValueError):
+        history.encode(_arrays(history.MAX_YEARS + 1, (2, 2)))
+
+
+def test_persistence():
+    arrays = np.array(_arrays(5))
+    canopy, valid = history.persistence(history.encode(list(arrays)))
+    assert (canopy == (arrays == 1).sum(axis=0)).all()
+    assert (valid == (arrays != 3).sum(axis=0)).all()
+
+
+def test_first_loss():
+    # cells by year: loss in 2019, loss across an invalid year in 2021, gain,
+    # never canopy, and loss only after regrowth in 2023
+    arrays = np.array([[1, 1, 0, 0, 1],
+                       [0, 3, 1, 0, 1],
+                       [0, 0, 1, 0, 1],
+                       [1, 1, 1, 3, 0]], dtype=np.uint8)[:, None, :]
+    stack = history.encode(list(arrays))
+    loss = history.first_loss(stack, [2017, 2019, 2021, 2023])
+    assert loss.tolist() == [[2019, 2021, 0, 0, 2023]]
+
+
+def test_years(tmp_path):
+    history_path = str(tmp_path / 'history_2017_2023.tif')
+    history.save_years(history_path, [2017, 2019, 2021, 2023])
+    assert history.get_years_path(history_path).endswith(
+        'history_2017_2023.json')
+    assert history.read_years(history_path) == [2017, 2019, 2021, 2023]
@@ -0,0 +1,80 @@
+################################################################################
+# Name:    test_inversion.py
+# Purpose: This module tests the evidence and union-find parity of the
+#          inversion module.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+from canopy import inversion
+
+
+def _pairs(inverted, rng, extra=20):
+    # Returns a random spanning tree plus extra pairs of tiles and their
+    # agreements consistent with the inverted tiles
+    n = len(inverted)
+    pairs = [(rng.integers(i), i) for i in range(1, n)]
+    pairs += [tuple(rng.choice(n, 2, replace=False)) for _ in range(extra)]
+    pairs = np.array(pairs)
+    same = inverted[pairs[:, 0]] == inverted[pairs[:, 1]]
+    return pairs, np.where(same, 0.95, 0.05)
+
+
+def test_agreement():
+    arr1 = np.array([[0, 1, 3], [1, 1, 0]])
+    arr2 = np.array([[0, 0, 1], [1, 3, 1]])
+    assert inversion.agreement(arr1, arr2) == (2, 4)
+
+
+def test_contrast_score():
+    rng = np.random.default_rng(0)
+    arr = rng.integers(0, 2, (100, 100)).astype(np.uint8)
+    values = np.where(arr == 1, 0.6, 0.2) + rng.normal(0, 0.05, arr.shape)
+    valid = np.ones(arr.shape, dtype=bool)
+    sums = inversion.ndvi_contrast(arr, values, valid)
+    assert inversion.contrast_score(sums) == 1
+    sums = inversion.ndvi_contrast(1 - arr, values, valid)
+    assert inversion.contrast_score(sums) == -1
+    # block sums accumulate to the sums of the whole array
+    blocks = sum(inversion.ndvi_contrast(arr[i:i+30], values[i:i+30],
+                                         valid[i:i+30])
+                 for i in range(0, 100, 30))
+    assert np.allclose(blocks, inversion.ndvi_contrast(arr, values, valid))
+    # not enough evidence
+    assert inversion.contrast_score(sums, min_cells=10**5) == 0
+
+
+def test_parity():
+    # one tile with NDVI evidence orients all tiles linked by pairs
+    rng = np.random.default_rng(1)
+    inverted = rng.random(50) < 0.3
+    pairs, agreements = _pairs(inverted, rng)
+    scores = np.zeros(50)
+    scores[7] = -1 if inverted[7] else 1
+    assert (inversion.detect_inverted(scores, pairs, agreements) ==
+            inverted).all()
+
+
+def test_noisy_scores():
+    # pairs outvote wrong NDVI scores of some tiles
+    rng = np.random.default_rng(2)
+    inverted = rng.random(50) < 0.3
+    pairs, agreements = _pairs(inverted, rng)
+    scores = np.where(inverted, -0.5, 0.5)
+    wrong = rng.choice(50, 10, replace=False)
+    scores[wrong] = -scores[wrong]
+    assert (inversion.detect_inverted(scores, pairs, agreements) ==
+            inverted).all()
+
+
+def test_components():
+    # unlinked groups of tiles are oriented by their own scores, and pairs
+    # without evidence do not link tiles
+    scores = np.array([-0.5, 0, 0, 0.5, 0, 0])
+    pairs = np.array([[0, 1], [1, 2], [3, 4], [4, 5], [2, 3]])
+    agreements = np.array([0.9, 0.1, 0.1, 0.9, np.nan])
+    assert inversion.detect_inverted(scores, pairs, agreements).tolist() == [
+        True, True, False, False, True, True]
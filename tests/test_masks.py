@@ -0,0 +1,81 @@
+################################################################################
+# Name:    test_masks.py
+# Purpose: This module tests that windows of bit-packed region masks match
+#          unpacked masks and that masks are cached on disk.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import numpy as np
+import pytest
+from canopy import masks
+
+# triangle and a square hole on a grid with an odd origin
+RINGS = [np.array([[3.5, 2.5], [60.5, 6.5], [20.5, 41.5], [3.5, 2.5]]),
+         np.array([[15.5, 10.5], [25.5, 10.5], [25.5, 20.5], [15.5, 20.5],
+                   [15.5, 10.5]])]
+ORIGIN = (0.5, 0.5)
+CELLSIZE = (1.0, 1.0)
+
+
+def _mask(seed=0, shape=(20, 37)):
+    # Returns a random mask whose width is not a multiple of 8 and its cells
+    rng = np.random.default_rng(seed)
+    cells = rng.random(shape) < 0.5
+    return masks.RegionMask(np.packbits(cells, axis=1), (10, 5, 47, 25),
+                            (1, 1), shape), cells
+
+
+@pytest.mark.parametrize('c0', [0, 3, 5, 8, 13, 30])
+def test_window_unaligned_columns(c0):
+    mask, cells = _mask()
+    for r0, r1, c1 in ((0, 20, 37), (2, 7, c0 + 1), (4, 18, min(c0 + 9, 37))):
+        extent = (10 + c0, 25 - r1, 10 + c1, 25 - r0)
+        assert (mask.window(extent) == cells[r0:r1, c0:c1]).all()
+
+
+def test_window_outside_mask():
+    mask, cells = _mask(1)
+    # 3 columns and 2 rows outside on each side
+    window = mask.window((7, 3, 50, 27))
+    assert window.shape == (24, 43)
+    assert not window[:2].any() and not window[-2:].any()
+    assert not window[:, :3].any() and not window[:, -3:].any()
+    assert (window[2:-2, 3:-3] == cells).all()
+    assert not mask.window((100, 100, 105, 103)).any()
+
+
+def test_apply():
+    mask, cells = _mask(2)
+    arr = np.ones((10, 11), dtype=np.uint8)
+    # unaligned window starting at column 5 of the mask
+    assert mask.apply(arr, (15, 10, 26, 20)) is arr
+    assert (arr == np.where(cells[5:15, 5:16], 1, 3)).all()
+
+
+def test_rasterize():
+    mask = masks.RegionMask.rasterize(RINGS, ORIGIN, CELLSIZE, band_rows=7)
+    cells = mask.window(mask.extent)
+    assert cells.shape == mask.shape
+    # cell centers inside the triangle and outside the hole
+    assert cells[-1 - 10, 10] and not cells[-1 - 15, 20]
+    assert not cells[0, 0]
+    assert (cells == masks.RegionMask.rasterize(
+        RINGS, (100.5, 200.5), CELLSIZE).window(mask.extent)).all()
+
+
+def test_mask_cache(tmp_path):
+    cache = masks.MaskCache(str(tmp_path / 'masks'))
+    mask = cache.get(RINGS, ORIGIN, CELLSIZE)
+    assert cache.get(RINGS, (10.5, 20.5), CELLSIZE) is mask
+    key = masks.mask_key(RINGS, ORIGIN, CELLSIZE)
+    assert (tmp_path / 'masks' / ('%s.npz' % key)).exists()
+
+    loaded = masks.MaskCache(str(tmp_path / 'masks')).get(RINGS, ORIGIN,
+                                                          CELLSIZE)
+    assert loaded is not mask
+    assert loaded.extent == mask.extent and loaded.shape == mask.shape
+    assert (loaded.bits == mask.bits).all()
+    assert masks.mask_key(RINGS, ORIGIN, (2.0, 2.0)) != key
@@ -0,0 +1,66 @@
+################################################################################
+# Name:    test_naipqq.py
+# Purpose: This module tests the QQ numbering and round trips of the naipqq
+#          module, and optionally checks it against a NAIP QQ layer.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import numpy as np
+import pytest
+from canopy import naipqq
+
+
+def test_corners():
+    # quadrangles are numbered from 01 at the northwest corner of the block
+    # west to east and then north to south
+    lon = np.array([-83.99, -83.01, -83.99, -83.01, -83.8, -83.7])
+    lat = np.array([34.99, 34.99, 34.01, 34.01, 34.99, 34.99])
+    assert naipqq.qq_ids(lon, lat) == [
+        'm_3408301_nw', 'm_3408308_ne', 'm_3408357_sw', 'm_3408364_se',
+        'm_3408302_ne', 'm_3408303_nw']
+
+
+def test_bbox():
+    assert naipqq.qq_bbox('m_3408301_nw') == (-84, 34.9375, -83.9375, 35)
+    assert naipqq.qq_bbox('m_3408364_se_17_1') == (-83.0625, 34, -83,
+                                                   34.0625)
+
+
+def test_round_trip():
+    rng = np.random.default_rng(0)
+    lon = rng.uniform(-86, -80, 1000)
+    lat = rng.uniform(30, 35, 1000)
+    ids = naipqq.qq_ids(lon, lat)
+    for qq_id, x, y in zip(ids, lon, lat):
+        west, south, east, north = naipqq.qq_bbox(qq_id)
+        assert west <= x <= east and south <= y <= north
+    bboxes = np.array([naipqq.qq_bbox(x) for x in ids])
+    centers = ((bboxes[:, 0] + bboxes[:, 2]) / 2,
+               (bboxes[:, 1] + bboxes[:, 3]) / 2)
+    assert naipqq.qq_ids(*centers) == ids
+
+
+def test_resolve():
+    lookup = naipqq.QQLookup(['m_3408301_nw_17_1', 'm_3408364_se_17_1'])
+    assert lookup.resolve(np.array([-83.99, -83.01, -83.5]),
+                          np.array([34.99, 34.01, 34.5])) == [
+        'm_3408301_nw_17_1', 'm_3408364_se_17_1', None]
+
+
+def test_layer():
+    # checks the numbering against the tiles of a NAIP QQ layer, e.g.,
+    # CANOPY_NAIPQQ_LAYER=C:/Data/naipqq.shp
+    naipqq_layer = os.environ.get('CANOPY_NAIPQQ_LAYER')
+    if not naipqq_layer:
+        pytest.skip('CANOPY_NAIPQQ_LAYER not set')
+    pytest.importorskip('arcpy')
+    from canopy import catalog
+    centroids = catalog.read_tile_centroids(naipqq_layer,
+                                            naipqq.SPATREF_WKID)
+    filenames = list(centroids)
+    lon, lat = np.array([centroids[x] for x in filenames]).T
+    assert naipqq.qq_ids(lon, lat) == [x[:12] for x in filenames]
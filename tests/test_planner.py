@@ -0,0 +1,117 @@
+################################################################################
+# Name:    test_planner.py
+# Purpose: This module tests the pending work listed for regions and the
+#          costs estimated from recorded timings.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+from canopy import planner
+
+PATHS = ('in', 'out', 'region')
+
+
+def _plan(timings, tiles, inputs, outputs, region_outputs, naip_files=None):
+    # Returns the tasks of region A by (stage, item)
+    tasks = planner.plan_region('A', tiles, inputs, outputs, region_outputs,
+                                naip_files or {}, 2019, timings, PATHS)
+    return {(x.stage, x.item): x for x in tasks}
+
+
+def test_timing_log(tmp_path):
+    timings_path = str(tmp_path / 'timings.json')
+    timings = planner.TimingLog(timings_path)
+    assert timings.estimate('clip_final_tiles', 100) == \
+        planner.DEFAULT_SECONDS['clip_final_tiles']
+    assert timings.estimate('unknown') == 60
+
+    timings.record('clip_final_tiles', 100, 2.0)
+    timings.record('clip_final_tiles', 300, 6.0)
+    # in proportion to the size, or the average without it
+    assert timings.estimate('clip_final_tiles', 200) == 4.0
+    assert timings.estimate('clip_final_tiles') == 4.0
+
+    timings.record('sieve_canopy_tif', None, 10.0)
+    assert timings.estimate('sieve_canopy_tif', 1000) == 10.0
+    timings.save()
+    loaded = planner.TimingLog(timings_path)
+    assert loaded.estimate('clip_final_tiles', 50) == 1.0
+
+    # not saved if the folder does not exist
+    planner.TimingLog(str(tmp_path / 'none' / 'timings.json')).save()
+    assert not (tmp_path / 'none').exists()
+
+
+def test_plan_region_tiles(tmp_path):
+    tiles = ['m_3408301_ne_17_1', 'm_3408301_nw_17_1', 'm_3408302_ne_17_1',
+             'm_3408302_nw_17_1']
+    inputs = {'rm_3408301_nw_17_1.tif': 10, 'rm_3408302_ne_17_1.tif': 10,
+              'rm_3408302_nw_17_1.tif': 10}
+    outputs = {'rm_3408301_nw_17_1.shp': 5,
+               'frm_3408302_ne_17_1.tif': 20,
+               'cfrm_3408302_nw_17_1.tif': 30}
+    naip_files = {'34083': {'m_3408301_ne_17_1_20190601.tif': 1000}}
+    tasks = _plan(planner.TimingLog(str(tmp_path / 'timings.json')), tiles,
+                  inputs, outputs, {}, naip_files)
+
+    # no outputs yet; NAIP tile ready to be reprojected
+    task = tasks['reproject_naip_tiles', 'm_3408301_ne_17_1']
+    assert task.status == 'ready' and task.size == 1000
+    assert task.path == 'in/rm_3408301_ne_17_1.tif'
+    assert tasks['convert_afe_to_final_tiles',
+                 'm_3408301_ne_17_1'].status == 'waiting'
+    # AFE output ready to be converted
+    task = tasks['convert_afe_to_final_tiles', 'm_3408301_nw_17_1']
+    assert task.status == 'ready' and task.size == 5
+    assert ('reproject_naip_tiles', 'm_3408301_nw_17_1') not in tasks
+    # final tile ready to be clipped
+    task = tasks['clip_final_tiles', 'm_3408302_ne_17_1']
+    assert task.status == 'ready' and task.path == \
+        'out/cfrm_3408302_ne_17_1.tif'
+    assert ('convert_afe_to_final_tiles', 'm_3408302_ne_17_1') not in tasks
+    # clipped tile done
+    assert not [x for x in tasks if x[1] == 'm_3408302_nw_17_1']
+
+    # one clipped tile is enough to mosaic
+    task = tasks['mosaic_clipped_final_tiles', 'A']
+    assert task.status == 'ready' and task.size == 30
+    assert task.path == 'region/canopy_2019_A.tif'
+    for stage in planner.STAGES[4:]:
+        assert tasks[stage, 'A'].status == 'waiting'
+
+
+def test_plan_region_estimates(tmp_path):
+    timings = planner.TimingLog(str(tmp_path / 'timings.json'))
+    timings.record('clip_final_tiles', 100, 1.0)
+    tasks = _plan(timings, ['m_3408301_ne_17_1', 'm_3408301_nw_17_1'], {},
+                  {'frm_3408301_ne_17_1.tif': 300,
+                   'frm_3408301_nw_17_1.tif': 100}, {})
+    ordered = planner.longest_first(list(tasks.values()))
+    assert ordered[0].stage == 'convert_canopy_tif_to_shp'
+    assert [x.item for x in ordered if x.stage == 'clip_final_tiles'] == [
+        'm_3408301_ne_17_1', 'm_3408301_nw_17_1']
+    assert tasks['clip_final_tiles', 'm_3408301_ne_17_1'].seconds == 3.0
+    assert tasks['clip_final_tiles', 'm_3408301_nw_17_1'].seconds == 1.0
+    # no clipped tiles to mosaic yet
+    assert tasks['mosaic_clipped_final_tiles', 'A'].status == 'waiting'
+
+
+def test_plan_region_reclaimed(tmp_path):
+    timings = planner.TimingLog(str(tmp_path / 'timings.json'))
+    # reprojected tiles of clipped tiles may have been reclaimed
+    tasks = _plan(timings, ['m_3408301_ne_17_1', 'm_3408301_nw_17_1'], {},
+                  {'cfrm_3408301_ne_17_1.tif': 30}, {})
+    assert ('reproject_naip_tiles', 'm_3408301_ne_17_1') not in tasks
+    assert tasks['reproject_naip_tiles',
+                 'm_3408301_nw_17_1'].status == 'waiting'
+
+    # intermediate tiles of a mosaicked region are not listed
+    tasks = _plan(timings, ['m_3408301_ne_17_1'], {}, {},
+                  {'canopy_2019_A.tif': 500, 'filled_canopy_2019_A.tif': 400})
+    assert sorted(tasks) == [('convert_canopy_tif_to_shp', 'A'),
+                             ('sieve_canopy_tif', 'A')]
+    task = tasks['sieve_canopy_tif', 'A']
+    assert task.status == 'ready' and task.size == 500
+    assert task.path == 'region/sieved_canopy_2019_A.tif'
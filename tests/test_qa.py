@@ -0,0 +1,76 @@
+################################################################################
+# Name:    test_qa.py
+# Purpose: This module tests the block statistics and anomaly scan of the qa
+#          module.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import csv
+import numpy as np
+import pytest
+from canopy import blocks, qa
+
+
+def _stats(arr, block_size=64):
+    # Returns the statistics of a tile added block by block
+    stats = qa.new_stats(arr.shape)
+    for block, _ in blocks.iter_blocks(arr.shape, block_size):
+        r0, r1, c0, c1 = block
+        qa.add_block(stats, arr[r0:r1, c0:c1], block)
+    return stats
+
+
+def test_add_block():
+    rng = np.random.default_rng(0)
+    arr = rng.choice(np.array([0, 1, 3], dtype=np.uint8), (150, 200))
+    stats = _stats(arr)
+    assert stats['counts'].tolist() == [(arr == 0).sum(), (arr == 1).sum(),
+                                        (arr == 3).sum()]
+    assert (stats['row_canopy'] == (arr == 1).sum(axis=1)).all()
+    assert (stats['col_valid'] == (arr != 3).sum(axis=0)).all()
+
+
+def test_summarize():
+    arr = np.zeros((200, 200), dtype=np.uint8)
+    arr[:, :50] = 1
+    arr[:20] = 3
+    summary = qa.summarize(_stats(arr), footprint_cells=200 * 200)
+    assert summary['canopy'] == 0.25
+    assert summary['nodata'] == pytest.approx(0.1)
+    assert summary['banding'] < 0.01
+    # striped rows
+    arr = np.zeros((200, 200), dtype=np.uint8)
+    arr[::2] = 1
+    assert qa.summarize(_stats(arr))['banding'] == 1
+
+
+def test_find_neighbors():
+    extents = [(0, 0, 10, 10), (10, 0, 20, 10), (30, 0, 40, 10),
+               (0, 10.5, 10, 20)]
+    assert qa.find_neighbors(extents) == [[1], [0], [], []]
+    assert qa.find_neighbors(extents, 1) == [[1, 3], [0, 3], [], [0, 1]]
+
+
+def test_scan(tmp_path):
+    # a 3 x 3 tile grid with a center tile classified all canopy
+    tiles = ['t%d' % i for i in range(9)]
+    extents = [(c * 10, r * 10, c * 10 + 10, r * 10 + 10) for r in range(3)
+               for c in range(3)]
+    summaries = [{'canopy': 0.3 + i * 0.01, 'nodata': 0., 'banding': 0.}
+                 for i in range(9)]
+    summaries[4]['canopy'] = 1.
+    rows = qa.scan(tiles, summaries, qa.find_neighbors(extents))
+    assert rows[0]['tile'] == 't4'
+    assert rows[0]['flags'].split() == ['all_canopy', 'neighbor', 'region']
+    assert all(x['score'] < 1 for x in rows[1:])
+
+    report_path = str(tmp_path / 'anomalies.csv')
+    qa.write_report(report_path, rows)
+    with open(report_path, newline='') as f:
+        report = list(csv.reader(f))
+    assert report[0] == list(qa.COLUMNS)
+    assert report[1][:3] == ['t4', '%.4f' % rows[0]['score'],
+                             rows[0]['flags']]
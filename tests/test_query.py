@@ -0,0 +1,129 @@
+################################################################################
+# Name:    test_query.py
+# Purpose: This module tests the block cache and point and bounding box
+#          queries of the query module with in-memory rasters.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import types
+import numpy as np
+from canopy import query
+
+
+def _query(block_size=16):
+    # Returns a query object for two overlapping region rasters of 2019 and
+    # one of 2021, and their arrays by path
+    rng = np.random.default_rng(0)
+    arrays = {
+        'a': rng.choice(np.array([0, 1, 3], dtype=np.uint8), (40, 50)),
+        'b': rng.choice(np.array([0, 1, 3], dtype=np.uint8), (30, 30)),
+        'c': rng.choice(np.array([0, 1], dtype=np.uint8), (40, 50)),
+    }
+    rasters = [
+        query.RegionRaster(2019, 'A', 'a', (0, 0, 50, 40), (1, 1), (40, 50)),
+        query.RegionRaster(2019, 'B', 'b', (40, 20, 70, 50), (1, 1),
+                           (30, 30)),
+        query.RegionRaster(2021, 'A', 'c', (0, 0, 50, 40), (1, 1), (40, 50)),
+    ]
+
+    def read_window(path, window):
+        r0, r1, c0, c1 = window
+        return arrays[path][r0:r1, c0:c1].copy()
+
+    return query.CanopyQuery(rasters, block_size, read_window=read_window), \
+        arrays
+
+
+def test_block_cache():
+    cache = query.BlockCache(max_bytes=200)
+    reads = []
+
+    def read(key):
+        reads.append(key)
+        return np.zeros(100, dtype=np.uint8)
+
+    for key in ('a', 'b', 'a', 'c', 'b'):
+        cache.get(key, lambda: read(key))
+    # b is evicted by c because a was used more recently
+    assert reads == ['a', 'b', 'c', 'b']
+    assert cache.hits == 1 and cache.misses == 4
+    assert cache.nbytes == 200
+
+
+def test_points():
+    q, arrays = _query()
+    rng = np.random.default_rng(1)
+    xy = rng.uniform(-5, 75, (500, 2))
+    values, regions = q.points(xy, 2019)
+    for (x, y), value, region in zip(xy, values, regions):
+        expected, expected_region = 3, None
+        # the first raster with a valid value wins
+        for path, name, (xmin, ymax) in (('a', 'A', (0, 40)),
+                                         ('b', 'B', (40, 50))):
+            arr = arrays[path]
+            row, col = int(np.floor(ymax - y)), int(np.floor(x - xmin))
+            if (0 <= row < arr.shape[0] and 0 <= col < arr.shape[1] and
+                    arr[row, col] < 3):
+                expected, expected_region = arr[row, col], name
+                break
+        assert value == expected and region == expected_region
+
+
+def test_point():
+    q, arrays = _query()
+    assert q.point(10.5, 30.5) == {
+        2019: (None if arrays['a'][9, 10] == 3 else int(arrays['a'][9, 10]),
+               None if arrays['a'][9, 10] == 3 else 'A'),
+        2021: (int(arrays['c'][9, 10]), 'A')}
+
+
+def test_bbox():
+    q, arrays = _query()
+    stats = q.bbox((3.2, 5.7, 45.1, 38.4), 2019)
+    # cells whose centers are in the bounding box
+    a = arrays['a'][2:34, 3:45]
+    b = arrays['b'][12:30, 0:5]
+    assert stats['canopy'] == (a == 1).sum() + (b == 1).sum()
+    assert stats['valid'] == (a < 3).sum() + (b < 3).sum()
+    assert stats['regions'] == ['A', 'B']
+    assert q.bbox((100, 100, 110, 110), 2019) == {
+        'canopy': 0, 'valid': 0, 'percent': None, 'regions': []}
+
+
+def test_find_region_rasters(tmp_path):
+    for path in ('A/Outputs/canopy_2019_A.tif',
+                 'A/Outputs/sieved_canopy_2019_A.tif',
+                 'B/Outputs/canopy_2019_B.tif',
+                 'B/Outputs/canopy_2021_B.tif',
+                 'C/Outputs/canopy_2019_C.tif',
+                 'C/Outputs/corrected_canopy_2019_C.tif'):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_bytes(b'')
+    canopy = types.SimpleNamespace(
+        results_path=str(tmp_path), analysis_year=2019,
+        is_region_inverted=lambda name: name in ('B', 'C'))
+    rasters = query.find_region_rasters(
+        canopy, lambda path: ((0, 0, 1, 1), (1, 1), (1, 1)))
+    # corrected files are not inverted
+    assert [(x.region, x.path.replace('\\', '/').split('/')[-1], x.inverted)
+            for x in rasters] == [
+                ('A', 'sieved_canopy_2019_A.tif', False),
+                ('B', 'canopy_2019_B.tif', True),
+                ('C', 'corrected_canopy_2019_C.tif', False)]
+
+
+def test_inverted_raster():
+    q, arrays = _query()
+    q.rasters[0] = q.rasters[0]._replace(inverted=True)
+    a = arrays['a']
+    values = q.points([(10.5, 30.5)], 2019)[0]
+    assert values[0] == (3 if a[9, 10] == 3 else 1 - a[9, 10])
+    # outside region B
+    stats = q.bbox((0, 0, 40, 20), 2019)
+    assert stats['canopy'] == (a[20:, :40] == 0).sum()
+    assert stats['valid'] == (a[20:, :40] < 3).sum()
+    # cached blocks are not inverted again
+    assert q.bbox((0, 0, 40, 20), 2019) == stats
@@ -0,0 +1,90 @@
+################################################################################
+# Name:    test_retention.py
+# Purpose: This module tests the retention policy of intermediate files in the
+#          retention module.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import configparser
+import pytest
+from canopy import retention
+
+
+def _conf(**options):
+    # Returns a configuration with a [retention] section
+    conf = configparser.ConfigParser()
+    conf['retention'] = options
+    return conf
+
+
+def _write(path, size, mtime):
+    # Writes a file of a size and modification time
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_read_policy():
+    policy = retention.read_policy(_conf())
+    assert policy.protected
+    assert policy.actions['temporary'] == 'delete'
+    assert all(policy.actions[x] == 'keep' for x in retention.KINDS
+               if x != 'temporary')
+    with pytest.raises(ValueError):
+        retention.read_policy(_conf(afe='remove'))
+    with pytest.raises(ValueError):
+        retention.read_policy(_conf(afe='archive'))
+
+
+def test_protected():
+    policy = retention.read_policy(_conf(
+        **{x: 'delete' for x in retention.KINDS}))
+    for kind in retention.KINDS:
+        assert retention.get_action(policy, kind) == (
+            'keep' if kind in retention.PROTECTED_KINDS else 'delete')
+    policy = policy._replace(protected=False)
+    assert all(retention.get_action(policy, x) == 'delete'
+               for x in retention.KINDS)
+
+
+def test_is_complete(tmp_path):
+    rtif = _write(str(tmp_path / 'r.tif'), 10, 1000)
+    frtif = str(tmp_path / 'fr.tif')
+    assert not retention.is_complete([rtif], [frtif])
+    _write(frtif, 10, 2000)
+    assert retention.is_complete([rtif], [frtif])
+    # outputs older than their inputs are stale
+    os.utime(rtif, (3000, 3000))
+    assert not retention.is_complete([rtif], [frtif])
+    assert not retention.is_complete([rtif], [])
+
+
+def test_get_size(tmp_path):
+    folder = tmp_path / 'tmp_canopy'
+    folder.mkdir()
+    _write(str(folder / 'block_0_0.tif'), 100, 1000)
+    path = _write(str(tmp_path / 'r.tif'), 50, 1000)
+    assert retention.get_size([str(folder), path]) == 150
+    # a hard link outside the paths keeps the file
+    os.link(path, str(tmp_path / 'link.tif'))
+    assert retention.get_size([str(folder), path]) == 100
+
+
+def test_reclaim(tmp_path):
+    path = _write(str(tmp_path / 'r.tif'), 100, 1000)
+    assert retention.reclaim([path], 'keep') == 0
+    assert retention.reclaim([path], 'delete', dry_run=True) == 100
+    assert os.path.exists(path)
+    archive_path = str(tmp_path / 'archive')
+    assert retention.reclaim([path], 'archive', archive_path) == 100
+    assert not os.path.exists(path)
+    assert os.path.exists(os.path.join(archive_path, os.path.splitdrive(
+        path)[1].lstrip('/\\')))
+    path = _write(path, 100, 1000)
+    assert retention.reclaim([path], 'delete') == 100
+    assert not os.path.exists(path)
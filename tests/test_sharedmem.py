@@ -0,0 +1,93 @@
+################################################################################
+# Name:    test_sharedmem.py
+# Purpose: This module tests publishing arrays in shared memory, attaching
+#          them, and removing the blocks of closed and crashed processes.
+# Authors: Huidae Cho, Ph.D., Owen Smith, IESA, University of North Georgia
+# Since:   October 18, 2026
+# Grant:   Sponsored by the Georgia Forestry Commission through the Georgia
+#          Statewide Canopy Assessment Project
+################################################################################
+
+import os
+import sys
+import subprocess
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+from canopy import sharedmem
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason='blocks are freed by '
+                                'the OS on Windows')
+
+
+def _exists(name):
+    # Returns True if a shared memory block exists
+    try:
+        shm = shared_memory.SharedMemory(name)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    return True
+
+
+def _read_manifest(manifest_path):
+    # Returns the (pid, name) entries of a manifest
+    with open(manifest_path) as f:
+        return [tuple(line.split()) for line in f if line.strip()]
+
+
+def _dead_pid():
+    # Returns the ID of a process that has exited
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+def test_publish_attach_close(tmp_path):
+    manifest_path = str(tmp_path / 'shm' / 'shared_memory.txt')
+    arr = np.arange(24, dtype=np.uint16).reshape(4, 6)
+    with sharedmem.SharedArrays(manifest_path) as arrays:
+        handle = arrays.publish(('mask', 'a'), arr)
+        # published once by key
+        assert arrays.publish(('mask', 'a'), arr * 2) == handle
+        other = arrays.publish(('mask', 'b'), arr[:2])
+        assert _read_manifest(manifest_path) == [
+            (str(os.getpid()), handle.name), (str(os.getpid()), other.name)]
+
+        attached = sharedmem.attach(handle)
+        assert attached.dtype == np.uint16 and (attached == arr).all()
+        assert not attached.flags.writeable
+        assert sharedmem.attach(arr) is arr
+
+        # entries of other processes are kept
+        with open(manifest_path, 'a') as f:
+            f.write('%d canopy_other\n' % os.getppid())
+    assert not _exists(handle.name) and not _exists(other.name)
+    assert _read_manifest(manifest_path) == [(str(os.getppid()),
+                                              'canopy_other')]
+
+
+def test_cleanup_removes_blocks_of_dead_processes(tmp_path):
+    manifest_path = str(tmp_path / 'shared_memory.txt')
+    dead_name = 'canopy_test_dead_%d' % os.getpid()
+    live_name = 'canopy_test_live_%d' % os.getpid()
+    dead = shared_memory.SharedMemory(dead_name, create=True, size=16)
+    live = shared_memory.SharedMemory(live_name, create=True, size=16)
+    try:
+        dead_pid = _dead_pid()
+        with open(manifest_path, 'w') as f:
+            f.write('%d %s\n' % (dead_pid, dead_name))
+            f.write('%d %s\n' % (os.getpid(), live_name))
+            # blocks that are already gone are dropped
+            f.write('%d canopy_test_gone_%d\n' % (dead_pid, os.getpid()))
+        assert sharedmem.cleanup(manifest_path) == [dead_name]
+        assert not _exists(dead_name) and _exists(live_name)
+        assert _read_manifest(manifest_path) == [(str(os.getpid()),
+                                                  live_name)]
+        assert sharedmem.cleanup(str(tmp_path / 'none.txt')) == []
+    finally:
+        dead.close()
+        live.close()
+        live.unlink()
+        if _exists(dead_name):
+            dead.unlink()